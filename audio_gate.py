@@ -0,0 +1,84 @@
+import threading
+
+import numpy as np
+
+
+class CryGate(object):
+    """
+    Cheap pre-stage in front of YAMNet. A window only goes to the model if
+    enough short frames look like a cry:
+      - RMS energy above a noise floor (something is making sound)
+      - spectral flatness below a limit (tonal, not fan/hiss noise)
+      - a good share of the energy in the 300-600 Hz cry fundamental band
+    All features are computed for every frame of the window at once with numpy.
+    """
+
+    def __init__(self, samplerate=16000, frame_len=512, hop=256,
+                 rms_floor=0.01, max_flatness=0.4, min_band_ratio=0.15,
+                 band=(300.0, 600.0), min_active_fraction=0.1):
+        self.samplerate = samplerate
+        self.frame_len = frame_len
+        self.hop = hop
+        self.rms_floor = rms_floor
+        self.max_flatness = max_flatness
+        self.min_band_ratio = min_band_ratio
+        self.min_active_fraction = min_active_fraction
+
+        self._window = np.hanning(frame_len).astype(np.float32)
+        freqs = np.fft.rfftfreq(frame_len, d=1.0 / samplerate)
+        self._band = (freqs >= band[0]) & (freqs <= band[1])
+        self._speech = (freqs >= 100.0) & (freqs <= 4000.0)
+
+        self._lock = threading.Lock()
+        self.evaluated = 0     # windows passed on to YAMNet
+        self.skipped = 0       # windows rejected by the gate
+
+    def features(self, audio):
+        """Per-frame (rms, flatness, band_ratio) arrays for a mono window."""
+        audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+        n_frames = 1 + (len(audio) - self.frame_len) // self.hop
+        if n_frames <= 0:
+            empty = np.zeros(0, dtype=np.float32)
+            return empty, empty, empty
+
+        frames = np.lib.stride_tricks.as_strided(
+            audio,
+            shape=(n_frames, self.frame_len),
+            strides=(audio.strides[0] * self.hop, audio.strides[0]),
+        )
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+
+        power = np.abs(np.fft.rfft(frames * self._window, axis=1)) ** 2 + 1e-12
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+        band_ratio = power[:, self._band].sum(axis=1) / power[:, self._speech].sum(axis=1)
+        return rms, flatness, band_ratio
+
+    def check(self, audio):
+        """True if the window is worth running the cry model on."""
+        rms, flatness, band_ratio = self.features(audio)
+        if rms.size == 0:
+            active = 0.0
+        else:
+            cry_like = (
+                (rms > self.rms_floor)
+                & (flatness < self.max_flatness)
+                & (band_ratio > self.min_band_ratio)
+            )
+            active = float(np.mean(cry_like))
+
+        passed = active >= self.min_active_fraction
+        with self._lock:
+            if passed:
+                self.evaluated += 1
+            else:
+                self.skipped += 1
+        return passed
+
+    def stats(self):
+        with self._lock:
+            total = self.evaluated + self.skipped
+            return {
+                "evaluated": self.evaluated,
+                "skipped": self.skipped,
+                "skip_ratio": round(self.skipped / total, 3) if total else 0.0,
+            }
@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+
+YAMNET_URL = "https://tfhub.dev/google/yamnet/1"
+
+
+class ModelRegistry(object):
+    """
+    Process-wide registry of loaded models.
+
+    load(name, loader, warmup) loads a model once, runs one warmup inference
+    so graph tracing happens at boot instead of on the first real request,
+    and records how long both steps took (see report()).
+    """
+
+    def __init__(self):
+        self._models = {}
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    def load(self, name, loader, warmup=None):
+        t0 = time.perf_counter()
+        model = loader()
+        load_s = time.perf_counter() - t0
+
+        first_s = None
+        if warmup is not None:
+            t1 = time.perf_counter()
+            warmup(model)
+            first_s = time.perf_counter() - t1
+
+        with self._lock:
+            self._models[name] = model
+            self.timings[name] = {
+                "load_s": round(load_s, 3),
+                "first_inference_s": round(first_s, 3) if first_s is not None else None,
+                "loaded_at": time.time(),
+            }
+        warm = f", warmup {first_s:.2f}s" if first_s is not None else ""
+        print(f"✅ [models] {name} loaded in {load_s:.2f}s{warm}")
+        return model
+
+    def get(self, name):
+        return self._models.get(name)
+
+    def report(self):
+        with self._lock:
+            return {name: dict(t) for name, t in self.timings.items()}
+
+
+registry = ModelRegistry()
+
+
+def load_yamnet(local_path, url=YAMNET_URL):
+    """
+    Load YAMNet from a vendored SavedModel directory. If it is missing, fetch
+    it from TF Hub once and save it to `local_path`, so every later boot is offline.
+    """
+    import tensorflow as tf
+
+    if os.path.isdir(local_path):
+        return tf.saved_model.load(local_path)
+
+    import tensorflow_hub as hub
+    print(f"⚠️ [models] {local_path} missing — downloading YAMNet from {url}")
+    model = hub.load(url)
+    try:
+        tf.saved_model.save(model, local_path)
+        print(f"💾 [models] YAMNet vendored to {local_path}")
+    except Exception as e:
+        print("⚠️ [models] could not vendor YAMNet:", e)
+    return model
+
+
+def load_keras(path):
+    from tensorflow.keras.models import load_model
+    return load_model(path)
+
+
+def load_tflite(path, num_threads=2):
+    from tflite_models import TFLiteModel
+    return TFLiteModel(path, num_threads=num_threads)
+
+
+def load_tflite_yamnet(path, num_threads=2):
+    from tflite_models import TFLiteYamnet
+    return TFLiteYamnet(path, num_threads=num_threads)
+
+
+def load_classifier(path):
+    """Keras .h5 or exported .tflite, picked by file extension."""
+    if path.endswith(".tflite"):
+        return load_tflite(path)
+    return load_keras(path)
+
+
+def warmup_yamnet(samplerate=16000, seconds=1.0):
+    def _warm(model):
+        model(np.zeros(int(samplerate * seconds), dtype=np.float32))
+    return _warm
+
+
+def warmup_keras(input_shape):
+    def _warm(model):
+        model.predict(np.zeros((1,) + tuple(input_shape), dtype=np.float32), verbose=0)
+    return _warm
@@ -0,0 +1,214 @@
+import collections
+import queue
+import subprocess
+import threading
+import time
+
+import numpy as np
+
+
+def decode_to_pcm(path, samplerate=44100, channels=2):
+    """Decode any ffmpeg-readable file (mp3, wav, ...) to float32 frames of shape (N, channels)."""
+    out = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", path,
+         "-f", "f32le", "-ar", str(samplerate), "-ac", str(channels), "pipe:1"],
+        capture_output=True, check=True,
+    ).stdout
+    return np.frombuffer(out, dtype=np.float32).reshape(-1, channels)
+
+
+class _Source(object):
+    """A preloaded sound being played (optionally looped) with a gain ramp."""
+
+    def __init__(self, pcm, loop, duckable):
+        self.pcm = pcm
+        self.loop = loop
+        self.duckable = duckable
+        self.pos = 0
+        self.gain = 0.0
+        self.target = 1.0
+        self.step = 1.0          # gain change per frame
+        self.stop_at_zero = False
+
+    def read(self, frames):
+        out = np.zeros((frames, self.pcm.shape[1]), dtype=np.float32)
+        filled = 0
+        while filled < frames:
+            chunk = self.pcm[self.pos:self.pos + frames - filled]
+            out[filled:filled + len(chunk)] = chunk
+            filled += len(chunk)
+            self.pos += len(chunk)
+            if self.pos >= len(self.pcm):
+                if not self.loop:
+                    break
+                self.pos = 0
+        return out, self.pos >= len(self.pcm) and not self.loop
+
+
+class _StreamSource(object):
+    """Live PCM pushed from another thread (e.g. the parent's voice)."""
+
+    def __init__(self, channels):
+        self.channels = channels
+        self._blocks = collections.deque()
+        self._offset = 0
+        self._lock = threading.Lock()
+        self.last_write = 0.0
+        self.closed = False
+
+    def write_s16(self, raw):
+        pcm = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+        self.write(pcm.reshape(-1, self.channels))
+
+    def write(self, pcm):
+        with self._lock:
+            self._blocks.append(pcm)
+            self.last_write = time.monotonic()
+
+    def close(self):
+        self.closed = True
+
+    def active(self, hold=0.3):
+        return bool(self._blocks) or time.monotonic() - self.last_write < hold
+
+    def read(self, frames):
+        out = np.zeros((frames, self.channels), dtype=np.float32)
+        filled = 0
+        with self._lock:
+            while filled < frames and self._blocks:
+                block = self._blocks[0]
+                take = min(frames - filled, len(block) - self._offset)
+                out[filled:filled + take] = block[self._offset:self._offset + take]
+                filled += take
+                self._offset += take
+                if self._offset >= len(block):
+                    self._blocks.popleft()
+                    self._offset = 0
+            drained = self.closed and not self._blocks
+        return out, drained
+
+
+class AudioMixer(object):
+    """
+    The one long-lived audio output of the incubator.
+
+    Soothing sounds are decoded once into a PCM cache (load_sound) and mixed in
+    a sounddevice OutputStream callback together with any live voice streams.
+    While a voice is talking, "duckable" sounds (the heartbeat) are faded down
+    to `duck_gain`. All public methods only enqueue a command and return
+    immediately, so they are safe to call from async handlers and worker threads.
+    """
+
+    def __init__(self, samplerate=44100, channels=2, blocksize=1024, duck_gain=0.2, duck_fade=0.15):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.duck_gain = duck_gain
+        self.duck_fade = duck_fade
+
+        self.sounds = {}                 # name -> PCM cache
+        self._playing = {}               # name -> _Source (callback thread only)
+        self._voices = []                # _StreamSource list (callback thread only)
+        self._commands = queue.SimpleQueue()
+        self._duck = 1.0
+        self._stream = None
+        self.underflows = 0
+
+    # ---------- setup ----------
+
+    def load_sound(self, name, path):
+        self.sounds[name] = decode_to_pcm(path, self.samplerate, self.channels)
+        print(f"🔊 [mixer] cached '{name}' ({len(self.sounds[name]) / self.samplerate:.1f}s)")
+
+    def start(self):
+        import sounddevice as sd
+
+        self._stream = sd.OutputStream(
+            samplerate=self.samplerate, channels=self.channels, dtype="float32",
+            blocksize=self.blocksize, callback=self._callback,
+        )
+        self._stream.start()
+        print(f"🔊 [mixer] output open ({self.samplerate} Hz, block={self.blocksize})")
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    # ---------- non-blocking command API ----------
+
+    def play(self, name, loop=False, fade=0.0, duckable=True):
+        pcm = self.sounds[name]
+        self._commands.put(("play", name, pcm, loop, fade, duckable))
+
+    def stop(self, name, fade=0.0):
+        self._commands.put(("stop", name, fade))
+
+    def open_voice(self):
+        """Return a stream source; push PCM with write_s16()/write(), then close()."""
+        voice = _StreamSource(self.channels)
+        self._commands.put(("voice", voice))
+        return voice
+
+    def is_playing(self, name):
+        return name in self._playing
+
+    # ---------- callback (audio thread) ----------
+
+    def _apply_commands(self):
+        while True:
+            try:
+                cmd = self._commands.get_nowait()
+            except queue.Empty:
+                return
+            if cmd[0] == "play":
+                _, name, pcm, loop, fade, duckable = cmd
+                src = _Source(pcm, loop, duckable)
+                src.gain = 0.0 if fade > 0 else 1.0
+                src.step = 1.0 / (fade * self.samplerate) if fade > 0 else 1.0
+                self._playing[name] = src
+            elif cmd[0] == "stop":
+                _, name, fade = cmd
+                src = self._playing.get(name)
+                if src is not None:
+                    src.target = 0.0
+                    src.stop_at_zero = True
+                    src.step = 1.0 / (fade * self.samplerate) if fade > 0 else 1.0
+            elif cmd[0] == "voice":
+                self._voices.append(cmd[1])
+
+    @staticmethod
+    def _ramp(start, target, step, frames):
+        end = target if abs(target - start) <= step * frames else start + np.sign(target - start) * step * frames
+        return np.linspace(start, end, frames, dtype=np.float32)[:, None], float(end)
+
+    def _callback(self, outdata, frames, time_info, status):
+        if status and status.output_underflow:
+            self.underflows += 1
+        self._apply_commands()
+
+        mix = np.zeros((frames, self.channels), dtype=np.float32)
+
+        voice_active = False
+        for voice in list(self._voices):
+            pcm, drained = voice.read(frames)
+            mix += pcm
+            voice_active = voice_active or voice.active()
+            if drained:
+                self._voices.remove(voice)
+
+        duck_target = self.duck_gain if voice_active else 1.0
+        duck_step = 1.0 / (self.duck_fade * self.samplerate)
+        duck_ramp, self._duck = self._ramp(self._duck, duck_target, duck_step, frames)
+
+        for name, src in list(self._playing.items()):
+            pcm, finished = src.read(frames)
+            gain, src.gain = self._ramp(src.gain, src.target, src.step, frames)
+            if src.duckable:
+                gain = gain * duck_ramp
+            mix += pcm * gain
+            if finished or (src.stop_at_zero and src.gain <= 0.0):
+                del self._playing[name]
+
+        np.clip(mix, -1.0, 1.0, out=outdata)
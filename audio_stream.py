@@ -0,0 +1,91 @@
+import threading
+import time
+
+import numpy as np
+
+
+class AudioRing(object):
+    """
+    Fixed-size ring buffer of mono float32 samples.
+
+    write() is called from the sounddevice callback (must stay cheap and never
+    block on inference); latest(n) returns a contiguous copy of the newest n samples.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._buf = np.zeros(self.capacity, dtype=np.float32)
+        self._pos = 0             # next write index
+        self.total = 0            # samples written since start
+        self._lock = threading.Lock()
+
+    def write(self, samples):
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        n = samples.shape[0]
+        if n >= self.capacity:
+            samples = samples[-self.capacity:]
+            n = self.capacity
+        with self._lock:
+            end = self._pos + n
+            if end <= self.capacity:
+                self._buf[self._pos:end] = samples
+            else:
+                first = self.capacity - self._pos
+                self._buf[self._pos:] = samples[:first]
+                self._buf[:n - first] = samples[first:]
+            self._pos = end % self.capacity
+            self.total += n
+
+    def latest(self, n):
+        n = min(int(n), self.capacity)
+        with self._lock:
+            start = self._pos - n
+            if start >= 0:
+                return self._buf[start:self._pos].copy()
+            return np.concatenate((self._buf[start:], self._buf[:self._pos]))
+
+
+class MicStream(object):
+    """
+    Gap-free microphone capture: a long-lived sd.InputStream whose callback
+    only copies blocks into an AudioRing. Consumers read overlapping windows
+    from the ring at their own pace.
+    """
+
+    def __init__(self, samplerate=16000, ring_seconds=15.0, blocksize=1600, device=None):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.device = device
+        self.ring = AudioRing(samplerate * ring_seconds)
+        self.overflows = 0
+        self._stream = None
+
+    def _callback(self, indata, frames, time_info, status):
+        if status and status.input_overflow:
+            self.overflows += 1
+        self.ring.write(indata[:, 0] if indata.ndim > 1 else indata)
+
+    def start(self):
+        import sounddevice as sd
+
+        self._stream = sd.InputStream(
+            samplerate=self.samplerate, channels=1, dtype="float32",
+            blocksize=self.blocksize, device=self.device, callback=self._callback,
+        )
+        self._stream.start()
+        print(f"🎙️ Mic stream open ({self.samplerate} Hz, block={self.blocksize})")
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    def wait_for(self, n_samples, timeout=None):
+        """Block until at least n_samples have been captured since start."""
+        deadline = None if timeout is None else time.time() + timeout
+        while self.ring.total < n_samples:
+            if deadline is not None and time.time() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
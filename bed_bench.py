@@ -0,0 +1,102 @@
+"""
+Bed-motion benchmark on the simulated PCA9685 (no hardware needed).
+
+    python bed_bench.py                      # all presets + rock + breathe
+    python bed_bench.py --i2c-delay 0.0004   # mimic ~0.4 ms per I2C block write
+    python bed_bench.py --json bench.json
+
+Reports, per scenario: achieved step rate, tick jitter, I2C write count,
+and for the motion patterns the stop-to-halt latency.
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("BED_SERVO_BACKEND", "sim")
+
+import bed_control  # noqa: E402  (backend must be chosen before import)
+from bed_trajectory import JitterStats  # noqa: E402
+
+
+def _reset():
+    bed_control.pca.reset_log()
+    bed_control.runner.stats = JitterStats()
+
+
+def _summary(elapsed):
+    writes = bed_control.pca.writes
+    span = writes[-1][0] - writes[0][0] if len(writes) > 1 else 0.0
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "i2c_writes": len(writes),
+        "step_rate_hz": round((len(writes) - 1) / span, 1) if span else 0.0,
+        "jitter": bed_control.runner.stats.summary(),
+    }
+
+
+def bench_preset(mode):
+    _reset()
+    t0 = time.monotonic()
+    ack = bed_control.actuator.submit("preset", mode=mode).result()
+    result = _summary(time.monotonic() - t0)
+    result["status"] = ack["status"]
+    return result
+
+
+def bench_motion(kind, run_s):
+    """Run a motion for `run_s`, then stop it and time how long until the servos halt."""
+    _reset()
+    start = bed_control.start_gentle_rock if kind == "rock" else bed_control.start_womb_breathing
+    t0 = time.monotonic()
+    fut = start(duration_seconds=3600)
+    time.sleep(run_s)
+
+    n_before = len(bed_control.pca.writes)
+    t_stop = time.monotonic()
+    stop_fut = bed_control.stop_motion()
+    while bed_control._motion_running:
+        time.sleep(0.0005)
+    t_halt = time.monotonic()
+    # the motion's last tick: the last write recorded before the motion loop exited
+    motion_writes = [w for w in bed_control.pca.writes[n_before:] if w[0] <= t_halt]
+    last_motion_write = motion_writes[-1][0] if motion_writes else t_stop
+
+    fut.result()
+    result = _summary(t_halt - t0)
+    result["stop_to_halt_ms"] = round((t_halt - t_stop) * 1000, 2)
+    result["stop_to_last_write_ms"] = round(max(last_motion_write - t_stop, 0.0) * 1000, 2)
+    stop_fut.result()
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--i2c-delay", type=float, default=0.0, help="simulated seconds per I2C write")
+    ap.add_argument("--rock-s", type=float, default=6.0, help="how long to rock before stopping")
+    ap.add_argument("--breathe-s", type=float, default=10.0, help="how long to breathe before stopping")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    if bed_control.SERVO_BACKEND != "sim":
+        raise SystemExit("bed_bench.py must run with BED_SERVO_BACKEND=sim")
+    bed_control.pca.write_delay = args.i2c_delay
+
+    results = {"tick_hz": bed_control.TICK_HZ, "i2c_delay_s": args.i2c_delay, "presets": {}}
+    for mode in bed_control.PRESETS:
+        results["presets"][mode] = bench_preset(mode)
+        print(f"[BENCH] preset {mode}: {results['presets'][mode]}")
+
+    results["rock"] = bench_motion("rock", args.rock_s)
+    print("[BENCH] rock:", results["rock"])
+    results["breathe"] = bench_motion("breathe", args.breathe_s)
+    print("[BENCH] breathe:", results["breathe"])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print("[BENCH] results written to", args.json)
+
+
+if __name__ == "__main__":
+    main()
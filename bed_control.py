@@ -1,16 +1,121 @@
-from adafruit_servokit import ServoKit
+import os
 import time
 import threading
+import queue
+import json
+import math
+import collections
+from concurrent.futures import Future
+import numpy as np
+
+import metrics
+import tracing
+from bed_trajectory import TrajectoryRunner, min_jerk, sinusoid, breath
+
+I2C_ACCEL_READS = metrics.registry.counter(
+    "i2c_transactions_total", "I2C transactions per device", device="adxl345")
+I2C_SERVO_WRITES = metrics.registry.counter(
+    "i2c_transactions_total", "I2C transactions per device", device="pca9685")
 
 # channels physically wired
 ACTIVE_CHANNELS = [0, 1, 2]
 
-# Servo driver
-kit = ServoKit(channels=16)
+# calibrated pulse range (microseconds) and servo travel
+MIN_PULSE_US = 1000
+MAX_PULSE_US = 2000
+ACTUATION_RANGE = 180
+
+# Servo backend: "pca9685" (real board via ServoKit), "sim" (servo_backend.SimulatedPCA9685,
+# no hardware needed; used by bed_bench.py) or "auto" (real board, sim if it is missing)
+SERVO_BACKEND = os.environ.get("BED_SERVO_BACKEND", "pca9685")
+
+kit = None
+if SERVO_BACKEND != "sim":
+    try:
+        from adafruit_servokit import ServoKit
+
+        # Servo driver
+        kit = ServoKit(channels=16)
+        SERVO_BACKEND = "pca9685"
+    except Exception as e:
+        if SERVO_BACKEND != "auto":
+            raise
+        print("[bed_control] no servo board, using simulated PCA9685:", e)
+        SERVO_BACKEND = "sim"
+
+if SERVO_BACKEND == "sim":
+    from servo_backend import SimulatedPCA9685
+    pca = SimulatedPCA9685(frequency=50)
+else:
+    # match your working calibration
+    for ch in ACTIVE_CHANNELS:
+        kit.servo[ch].set_pulse_width_range(MIN_PULSE_US, MAX_PULSE_US)
+    pca = kit._pca
+
+
+class Pca9685BlockWriter(object):
+    """
+    Fast servo output: writes the ON/OFF registers of all active channels in
+    ONE auto-increment I2C block write, instead of one transaction per
+    kit.servo[ch].angle assignment. Angle -> 12-bit OFF count comes from a
+    table precomputed (0.1 deg steps) from the calibrated pulse range.
+    Needs contiguous channels (0,1,2 here); the PCA9685 library enables
+    register auto-increment when it sets the PWM frequency.
+    """
 
-# match your working calibration
-for ch in ACTIVE_CHANNELS:
-    kit.servo[ch].set_pulse_width_range(1000, 2000)
+    LED0_ON_L = 0x06
+    RESOLUTION = 0.1   # degrees per table entry
+
+    def __init__(self, pca, channels, min_us=MIN_PULSE_US, max_us=MAX_PULSE_US,
+                 actuation_range=ACTUATION_RANGE):
+        self.pca = pca
+        self.channels = sorted(channels)
+        if self.channels != list(range(self.channels[0], self.channels[-1] + 1)):
+            raise ValueError("block writes need contiguous channels")
+
+        period_us = 1000000.0 / pca.frequency
+        n = int(round(actuation_range / self.RESOLUTION)) + 1
+        self._table = [
+            int(round((min_us + (max_us - min_us) * i / (n - 1)) / period_us * 4096)) & 0x0FFF
+            for i in range(n)
+        ]
+        self._buf = bytearray(1 + 4 * len(self.channels))
+        self._buf[0] = self.LED0_ON_L + 4 * self.channels[0]
+        self.writes = 0
+
+    def write_angles(self, angles):
+        """angles: {channel: degrees}; one I2C transaction for all channels."""
+        buf = self._buf
+        for i, ch in enumerate(self.channels):
+            idx = int(round(angles[ch] / self.RESOLUTION))
+            off = self._table[min(max(idx, 0), len(self._table) - 1)]
+            o = 1 + 4 * i
+            buf[o] = 0                 # ON_L
+            buf[o + 1] = 0             # ON_H
+            buf[o + 2] = off & 0xFF    # OFF_L
+            buf[o + 3] = off >> 8      # OFF_H
+        with self.pca.i2c_device as dev:
+            dev.write(buf)
+        self.writes += 1
+
+
+try:
+    servo_out = Pca9685BlockWriter(pca, ACTIVE_CHANNELS)
+except Exception as e:
+    servo_out = None
+    print("[bed_control] block writer unavailable, using per-channel writes:", e)
+
+
+def write_servos(angles):
+    """Send {channel: degrees} to the servos (one block write when possible)."""
+    with tracing.span("i2c.pca9685", "i2c"):
+        if servo_out is not None:
+            servo_out.write_angles(angles)
+            I2C_SERVO_WRITES.inc()
+        else:
+            for ch in ACTIVE_CHANNELS:
+                kit.servo[ch].angle = angles[ch]
+            I2C_SERVO_WRITES.inc(len(ACTIVE_CHANNELS))
 
 # store last known angles
 last_angles = {
@@ -32,6 +137,15 @@ def clamp_angle(deg: float) -> float:
         return 120
     return deg
 
+# measured state of the bed (closed-loop mode fills tilt / settle time)
+bed_status = {
+    "stable": True,
+    "tilt": None,          # (pitch, roll) in degrees from the accelerometer
+    "settle_ms": None,     # time from end of trajectory until the bed stopped moving
+    "tilt_error": None,    # degrees between expected and measured tilt after correction
+    "move_ms": None,       # whole closed-loop move, trajectory start -> settled
+}
+
 def get_bed_state(label="Neutral", description="Flat, centered position"):
     return {
         "label": label,
@@ -39,39 +153,52 @@ def get_bed_state(label="Neutral", description="Flat, centered position"):
         "x": last_angles[ACTIVE_CHANNELS[0]],
         "y": last_angles[ACTIVE_CHANNELS[1]],
         "z": last_angles[ACTIVE_CHANNELS[2]],
-        "stable": True,
+        "stable": bed_status["stable"],
+        "tilt": bed_status["tilt"],
+        "settle_ms": bed_status["settle_ms"],
+        "tilt_error": bed_status["tilt_error"],
+        "move_ms": bed_status["move_ms"],
     }
 
-def smooth_move(target_angles, duration=1.0, steps=40):
-    """
-    Interpolate from last_angles -> target_angles with clamping so we never
-    send illegal values to the servo driver.
-    """
-    start = {ch: last_angles[ch] for ch in ACTIVE_CHANNELS}
+# --- trajectory engine: fixed-rate playback on the monotonic clock ---
+TICK_HZ = 50
 
-    print("[bed_control] smooth_move start ->", target_angles)
+def _write_vector(row):
+    angles = {ch: float(row[i]) for i, ch in enumerate(ACTIVE_CHANNELS)}
+    write_servos(angles)
+    # last_angles always holds the position actually commanded, so a stopped
+    # or preempted move continues from where it really is
+    last_angles.update(angles)
 
-    for i in range(steps + 1):
-        t = i / steps
-        for ch in ACTIVE_CHANNELS:
-            a_start = start[ch]
-            a_end   = clamp_angle(target_angles[ch])
-            a_now   = a_start + (a_end - a_start) * t
-            a_now   = clamp_angle(a_now)
+runner = TrajectoryRunner(_write_vector, rate=TICK_HZ)
 
-            kit.servo[ch].angle = a_now
+def get_motion_stats():
+    """Timing jitter of the trajectory ticks so far."""
+    return runner.stats.summary()
 
-            # debug at beginning / mid / end
-            if i in (0, steps // 2, steps):
-                print(f"[bed_control] ch {ch} -> {a_now:.1f} deg (step {i}/{steps})")
+def _clamped(traj):
+    return np.clip(traj, 0, 120)
+
+def smooth_move(target_angles, duration=1.0, steps=None, should_stop=None):
+    """
+    Minimum-jerk move from last_angles -> target_angles with clamping so we
+    never send illegal values to the servo driver. Played at TICK_HZ (or
+    `steps` samples, if given); should_stop() is checked every tick.
+    Returns True if the target was reached.
+    """
+    start = [last_angles[ch] for ch in ACTIVE_CHANNELS]
+    end = [clamp_angle(target_angles[ch]) for ch in ACTIVE_CHANNELS]
+    # a zero-length move is a single jump to the target at the normal tick rate
+    rate = steps / duration if steps and duration > 0 else TICK_HZ
 
-        time.sleep(duration / steps)
+    print("[bed_control] smooth_move start ->", target_angles)
 
-    # commit final
-    for ch in ACTIVE_CHANNELS:
-        last_angles[ch] = clamp_angle(target_angles[ch])
+    traj = _clamped(min_jerk(start, end, duration, rate))
+    last = runner.run(traj, should_stop=should_stop, rate=rate)
 
-    print("[bed_control] smooth_move done. last_angles:", last_angles)
+    reached = last is not None and np.allclose(last, traj[-1])
+    print("[bed_control] smooth_move", "done." if reached else "stopped.", "last_angles:", last_angles)
+    return reached
 
 # Preset poses (ensure within 0-120 range)
 POSE_NEUTRAL = {0: 60, 1: 60, 2: 60}
@@ -101,9 +228,9 @@ def go_right_side():
     print("[POSE] Right Side Tilt")
     smooth_move(POSE_RIGHT_SIDE, duration=1.0)
 
-def go_sleep():
+def go_sleep(should_stop=None):
     print("[POSE] Sleep / Cozy")
-    smooth_move(POSE_SLEEP, duration=1.0)
+    return smooth_move(POSE_SLEEP, duration=1.0, should_stop=should_stop)
 
 def manual_set(x, y, z):
     """
@@ -166,77 +293,68 @@ def nudge(axis: str, delta: float):
 # MOTION PATTERNS (LOOPS)
 # ==============================
 
-def _run_motion_for_duration(worker_fn, duration_seconds):
+def _motion_should_stop():
+    # a newer actuator command also preempts the motion (latest wins)
+    return _motion_stop_flag or actuator.has_pending()
+
+def _run_motion_for_duration(base, cycle_traj, duration_seconds):
     """
     Internal helper:
-    - worker_fn(): one 'cycle' of the motion (rock once, or breathe once)
-    - run repeatedly until duration is up OR stop flag set
+    - ease into `base`, then play the precomputed one-cycle trajectory
+      (rock once, or breathe once) back to back
+    - run until duration is up OR stop flag set (checked every tick)
     """
     global _motion_running, _motion_stop_flag
     _motion_running = True
     _motion_stop_flag = False
 
-    start_t = time.time()
-    while True:
-        if _motion_stop_flag:
-            break
-        if (time.time() - start_t) >= duration_seconds:
-            break
-        worker_fn()
+    start_t = time.monotonic()
+    if smooth_move(base, duration=1.0, should_stop=_motion_should_stop):
+        while not _motion_should_stop() and (time.monotonic() - start_t) < duration_seconds:
+            runner.run(cycle_traj, should_stop=_motion_should_stop)
 
-    # after done, return to safe pose (sleep pose feels comforting)
-    go_sleep()
+    # after done, return to safe pose (sleep pose feels comforting),
+    # unless a newer command already took over the bed (or does so on the way)
+    _motion_stop_flag = False
+    if not actuator.has_pending():
+        go_sleep(should_stop=actuator.has_pending)
 
     _motion_running = False
-    _motion_stop_flag = False
-    print("[MOTION] finished, returned to sleep")
+    print("[MOTION] finished. jitter:", get_motion_stats())
 
 def stop_motion():
     """
-    Can be called to force-stop any running motion.
+    Can be called to force-stop any running motion: it halts on the next
+    tick and the bed returns to the sleep pose. Returns the actuator Future.
     """
     global _motion_stop_flag
     _motion_stop_flag = True
     print("[MOTION] stop requested")
+    return actuator.submit("stop")
 
 
 def start_gentle_rock(duration_seconds=1800, amplitude_deg=5.0, period=4.0):
     """
     Public API:
     - duration_seconds: how long to keep rocking (e.g. 1800s = 30min)
-    Spawns a background thread so server.py doesn't block.
+    Queued on the bed actuator thread, so server.py doesn't block.
     """
-    if _motion_running:
-        print("[MOTION] already running, ignoring new request")
-        return
+    return actuator.submit("rock", duration_seconds=duration_seconds,
+                           amplitude_deg=amplitude_deg, period=period)
 
-    def one_cycle():
-        # base pose is neutral. you can change to POSE_SLEEP if you prefer
-        base = POSE_NEUTRAL
-
-        left_tilt = {
-            0: clamp_angle(base[0] - amplitude_deg),
-            1: clamp_angle(base[1] + amplitude_deg),
-            2: base[2],
-        }
-        right_tilt = {
-            0: clamp_angle(base[0] + amplitude_deg),
-            1: clamp_angle(base[1] - amplitude_deg),
-            2: base[2],
-        }
-
-        # tilt left slowly half period
-        smooth_move(left_tilt, duration=period/2.0)
-        # tilt right slowly half period
-        smooth_move(right_tilt, duration=period/2.0)
+
+def _gentle_rock(duration_seconds, amplitude_deg, period):
+    # base pose is neutral. you can change to POSE_SLEEP if you prefer
+    base = POSE_NEUTRAL
+    # tilt left then right: ch0 down / ch1 up, then the reverse, as one sine period
+    cycle = _clamped(sinusoid(
+        [base[ch] for ch in ACTIVE_CHANNELS],
+        [-amplitude_deg, amplitude_deg, 0.0],
+        period, TICK_HZ,
+    ))
 
     print(f"[MOTION] Gentle Rock start for {duration_seconds}s")
-    th = threading.Thread(
-        target=_run_motion_for_duration,
-        args=(one_cycle, duration_seconds),
-        daemon=True
-    )
-    th.start()
+    _run_motion_for_duration(base, cycle, duration_seconds)
 
 
 def start_womb_breathing(duration_seconds=1800, lift_deg=3.0, period=8.0):
@@ -245,36 +363,410 @@ def start_womb_breathing(duration_seconds=1800, lift_deg=3.0, period=8.0):
     - duration_seconds: e.g. 1200s = 20min
     Breathing = lift whole bed slightly up/down smoothly.
     """
-    if _motion_running:
-        print("[MOTION] already running, ignoring new request")
-        return
+    return actuator.submit("breathe", duration_seconds=duration_seconds,
+                           lift_deg=lift_deg, period=period)
 
-    def one_cycle():
-        base = POSE_SLEEP
-
-        def elevated_pose(sign):
-            # sign=+1 inhale (up), sign=-1 exhale (back down / below)
-            return {
-                0: clamp_angle(base[0] + sign * lift_deg),
-                1: clamp_angle(base[1] + sign * lift_deg),
-                2: clamp_angle(base[2] + sign * lift_deg),
-            }
-
-        # inhale up: ~45% period
-        smooth_move(elevated_pose(+1), duration=period * 0.45, steps=50)
-        # small hold ~10%
-        time.sleep(period * 0.10)
-        # exhale back to base ~45%
-        smooth_move(base, duration=period * 0.45, steps=50)
-        # optional tiny rest could be added
+
+def _womb_breathing(duration_seconds, lift_deg, period):
+    base = POSE_SLEEP
+    # inhale up ~45%, hold ~10%, exhale back to base ~45%
+    cycle = _clamped(breath(
+        [base[ch] for ch in ACTIVE_CHANNELS],
+        [lift_deg, lift_deg, lift_deg],
+        period, TICK_HZ,
+    ))
 
     print(f"[MOTION] Womb Breathing start for {duration_seconds}s")
-    th = threading.Thread(
-        target=_run_motion_for_duration,
-        args=(one_cycle, duration_seconds),
-        daemon=True
-    )
-    th.start()
+    _run_motion_for_duration(base, cycle, duration_seconds)
+
+
+# ==============================
+# CLOSED LOOP (ADXL345 tilt feedback)
+# ==============================
+
+TILT_SAMPLE_HZ = 100
+TILT_EMA_TAU_S = 0.05          # low-pass on the tilt; raw ADXL345 noise is ~0.1-0.3 deg
+TILT_NOISE_SAMPLE_S = 0.5      # at-rest sampling used to measure the sensor noise
+TILT_TOL_SIGMAS = 4.0          # settle tolerance = this many filtered-noise sigmas...
+TILT_TOL_MIN_DEG = 0.05        # ...but never tighter than this
+SETTLE_TOL_DEG = 0.3           # tolerance until the noise has been measured
+SETTLE_WINDOW_S = 0.2          # filtered tilt must stay within tolerance for this long
+SETTLE_TIMEOUT_S = 2.0
+TILT_CORRECTION_TOL_DEG = 0.5
+MAX_CORRECTION_DEG = 3.0       # never correct a servo by more than this
+FINISH_MAX_DEG = 1.5           # early finish only when every servo is this close to its target
+FINISH_MOVE_S = 0.1            # ...and the rest of the way is played over this long
+TILT_CALIBRATION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                     "bed_tilt_calibration.json")
+
+_tilt_read = None              # () -> (x, y, z) in m/s^2, set by set_tilt_sensor()
+_tilt_cal = None               # {"ref_angles", "ref_tilt", "jacobian"} (2x3, deg tilt per deg servo)
+_tilt_noise = None             # raw tilt noise sigma (deg), measured at rest
+
+
+class TiltFilter(object):
+    """Exponential moving average of (pitch, roll), time constant TILT_EMA_TAU_S."""
+
+    def __init__(self, rate, tau=TILT_EMA_TAU_S):
+        self.alpha = 1.0 - math.exp(-1.0 / (rate * tau))
+        self.value = None
+
+    def add(self, tilt):
+        tilt = np.asarray(tilt, dtype=float)
+        if self.value is None:
+            self.value = tilt
+        else:
+            self.value = self.value + self.alpha * (tilt - self.value)
+        return self.value
+
+
+def set_tilt_sensor(read_fn):
+    """Enable closed-loop mode with an accelerometer read function (x, y, z)."""
+    global _tilt_read, _tilt_cal
+    _tilt_read = read_fn
+    try:
+        with open(TILT_CALIBRATION_FILE) as f:
+            _tilt_cal = json.load(f)
+        print("[CLOSED LOOP] tilt calibration loaded")
+    except (OSError, ValueError):
+        print("[CLOSED LOOP] no tilt calibration yet; settle detection only")
+    try:
+        measure_tilt_noise()
+    except Exception as e:
+        print("[CLOSED LOOP] could not measure tilt noise:", e)
+
+
+def closed_loop_enabled():
+    return _tilt_read is not None
+
+
+def read_tilt():
+    """(pitch, roll) in degrees from the accelerometer's gravity vector."""
+    with tracing.span("i2c.adxl345", "i2c"):
+        x, y, z = _tilt_read()
+    I2C_ACCEL_READS.inc()
+    pitch = math.degrees(math.atan2(x, math.sqrt(y * y + z * z)))
+    roll = math.degrees(math.atan2(y, math.sqrt(x * x + z * z)))
+    return pitch, roll
+
+
+def measure_tilt_noise(seconds=TILT_NOISE_SAMPLE_S):
+    """Sample the tilt with the bed at rest; the sigma sets the settle tolerance."""
+    global _tilt_noise
+    period = 1.0 / TILT_SAMPLE_HZ
+    samples = []
+    for _ in range(max(int(seconds * TILT_SAMPLE_HZ), 10)):
+        samples.append(read_tilt())
+        time.sleep(period)
+    _tilt_noise = float(np.array(samples).std(axis=0).max())
+    print(f"[CLOSED LOOP] tilt noise {_tilt_noise:.3f} deg -> settle tolerance {tilt_tolerance():.3f} deg")
+    return _tilt_noise
+
+
+def tilt_tolerance(rate=TILT_SAMPLE_HZ):
+    """How much the filtered tilt may still wander for the bed to count as settled."""
+    if _tilt_noise is None:
+        return SETTLE_TOL_DEG
+    alpha = TiltFilter(rate).alpha
+    filtered_sigma = _tilt_noise * math.sqrt(alpha / (2.0 - alpha))
+    return max(TILT_TOL_SIGMAS * filtered_sigma, TILT_TOL_MIN_DEG)
+
+
+def wait_settled(should_stop=None, tilt_filter=None):
+    """
+    Sample the tilt at TILT_SAMPLE_HZ until the filtered tilt stays within
+    tilt_tolerance() for SETTLE_WINDOW_S (or SETTLE_TIMEOUT_S passes).
+    Returns (settled, settle_seconds, filtered_tilt).
+    """
+    period = 1.0 / TILT_SAMPLE_HZ
+    tol = tilt_tolerance()
+    filt = tilt_filter or TiltFilter(TILT_SAMPLE_HZ)
+    window = collections.deque(maxlen=max(int(SETTLE_WINDOW_S * TILT_SAMPLE_HZ), 2))
+    t0 = time.monotonic()
+    due = t0
+    while True:
+        if should_stop is not None and should_stop():
+            break
+        try:
+            window.append(filt.add(read_tilt()))
+        except Exception as e:
+            print("[CLOSED LOOP] accel read error:", e)
+        now = time.monotonic()
+        if len(window) == window.maxlen:
+            arr = np.array(window)
+            if np.all(arr.max(axis=0) - arr.min(axis=0) < tol):
+                return True, now - t0, tuple(filt.value.tolist())
+        if now - t0 > SETTLE_TIMEOUT_S:
+            break
+        due += period
+        time.sleep(max(due - time.monotonic(), 0))
+    tilt = tuple(filt.value.tolist()) if filt.value is not None else None
+    return False, time.monotonic() - t0, tilt
+
+
+def _angles_vec(angles):
+    return np.array([angles[ch] for ch in ACTIVE_CHANNELS], dtype=float)
+
+
+def expected_tilt(angles):
+    ref = np.array(_tilt_cal["ref_tilt"])
+    J = np.array(_tilt_cal["jacobian"])
+    return ref + J.dot(_angles_vec(angles) - np.array(_tilt_cal["ref_angles"]))
+
+
+def calibrate_tilt(delta_deg=4.0, should_stop=None):
+    """
+    Learn how each servo tilts the bed: from neutral, move one channel by
+    delta_deg at a time and measure the settled tilt change. Saved to
+    TILT_CALIBRATION_FILE. Runs on the actuator thread (see BedActuator).
+    should_stop() aborts it between and during moves; returns None then
+    (the previous calibration is kept).
+    """
+    global _tilt_cal
+    if not closed_loop_enabled():
+        raise RuntimeError("no tilt sensor registered")
+
+    def stopped():
+        return should_stop is not None and should_stop()
+
+    if not smooth_move(POSE_NEUTRAL, duration=1.0, should_stop=should_stop):
+        return None
+    _, _, ref_tilt = wait_settled(should_stop)
+    measure_tilt_noise()
+    cols = []
+    for ch in ACTIVE_CHANNELS:
+        if stopped():
+            return None
+        pose = dict(POSE_NEUTRAL)
+        pose[ch] = clamp_angle(pose[ch] + delta_deg)
+        if not smooth_move(pose, duration=0.5, should_stop=should_stop):
+            return None
+        _, _, tilt = wait_settled(should_stop)
+        cols.append((np.array(tilt) - np.array(ref_tilt)) / delta_deg)
+    if not smooth_move(POSE_NEUTRAL, duration=0.5, should_stop=should_stop) or stopped():
+        return None
+
+    _tilt_cal = {
+        "ref_angles": _angles_vec(POSE_NEUTRAL).tolist(),
+        "ref_tilt": list(ref_tilt),
+        "jacobian": np.array(cols).T.tolist(),
+    }
+    with open(TILT_CALIBRATION_FILE, "w") as f:
+        json.dump(_tilt_cal, f, indent=2)
+    print("[CLOSED LOOP] calibration:", _tilt_cal)
+    return _tilt_cal
+
+
+def closed_loop_move(target_angles, duration=1.0, should_stop=None):
+    """
+    Preset move with tilt feedback. The trajectory keeps the caller's
+    duration (same speed as open loop), but the tilt is read on every tick:
+    with a calibration, the move ends as soon as the filtered tilt is within
+    TILT_CORRECTION_TOL_DEG of the target's expected tilt and the servos are
+    within FINISH_MAX_DEG of the target (the rest is played over FINISH_MOVE_S).
+    Otherwise the trajectory runs to the end and the bed is verified to have
+    settled, with a residual-error correction when calibrated.
+    Fills bed_status; returns True if the target was reached.
+    """
+    t0 = time.monotonic()
+    filt = TiltFilter(TICK_HZ)
+    expected = expected_tilt(target_angles) if _tilt_cal is not None else None
+    end = _angles_vec({ch: clamp_angle(target_angles[ch]) for ch in ACTIVE_CHANNELS})
+    arrived = []
+
+    def tick():
+        if should_stop is not None and should_stop():
+            return True
+        try:
+            tilt = filt.add(read_tilt())
+        except Exception as e:
+            print("[CLOSED LOOP] accel read error:", e)
+            return False
+        if expected is not None and np.abs(expected - tilt).max() <= TILT_CORRECTION_TOL_DEG \
+                and np.abs(_angles_vec(last_angles) - end).max() <= FINISH_MAX_DEG:
+            arrived.append(time.monotonic())
+            return True
+        return False
+
+    reached = smooth_move(target_angles, duration=duration, should_stop=tick)
+    if arrived:
+        # the bed already shows the target tilt: close the last fraction of a degree and stop
+        finish_s = min(FINISH_MOVE_S, max(duration - (arrived[0] - t0), 1.0 / TICK_HZ))
+        reached = smooth_move(target_angles, duration=finish_s, should_stop=should_stop)
+        if reached:
+            error = float(np.abs(expected - filt.value).max())
+            bed_status.update({
+                "stable": True,
+                "tilt": [round(v, 2) for v in filt.value.tolist()],
+                "settle_ms": 0.0,
+                "tilt_error": round(error, 2),
+                "move_ms": round((time.monotonic() - t0) * 1000, 1),
+            })
+        return reached
+    if reached:
+        closed_loop_finish(target_angles, should_stop=should_stop)
+        bed_status["move_ms"] = round((time.monotonic() - t0) * 1000, 1)
+    return reached
+
+
+def closed_loop_finish(target_angles, should_stop=None, max_iters=2):
+    """
+    After a trajectory: wait until the filtered tilt has settled, then (if
+    calibrated) correct the residual tilt error with small servo adjustments.
+    Fills bed_status with the measured tilt, settle time and stability.
+    """
+    t_end = time.monotonic()
+    settled, _, tilt = wait_settled(should_stop)
+    error = None
+
+    if _tilt_cal is not None and tilt is not None:
+        J_pinv = np.linalg.pinv(np.array(_tilt_cal["jacobian"]))
+        nominal = expected_tilt(target_angles)
+        for _ in range(max_iters):
+            err = nominal - np.array(tilt)
+            error = float(np.abs(err).max())
+            if error <= TILT_CORRECTION_TOL_DEG or (should_stop is not None and should_stop()):
+                break
+            corr = np.clip(J_pinv.dot(err), -MAX_CORRECTION_DEG, MAX_CORRECTION_DEG)
+            fixed = {ch: clamp_angle(last_angles[ch] + float(corr[i])) for i, ch in enumerate(ACTIVE_CHANNELS)}
+            print(f"[CLOSED LOOP] tilt error {error:.2f} deg -> correcting by {np.round(corr, 2)}")
+            smooth_move(fixed, duration=0.3, should_stop=should_stop)
+            settled, _, tilt = wait_settled(should_stop)
+            error = float(np.abs(nominal - np.array(tilt)).max()) if tilt is not None else None
+
+    bed_status.update({
+        "stable": bool(settled),
+        "tilt": [round(v, 2) for v in tilt] if tilt is not None else None,
+        "settle_ms": round((time.monotonic() - t_end) * 1000, 1),
+        "tilt_error": round(error, 2) if error is not None else None,
+    })
+    return settled
+
+
+# ==============================
+# BED ACTUATOR (single thread + command queue)
+# ==============================
+
+PRESETS = {
+    "flat": POSE_NEUTRAL,
+    "head_elevated": POSE_HEAD_UP,
+    "left_side": POSE_LEFT_SIDE,
+    "right_side": POSE_RIGHT_SIDE,
+    "feeding": POSE_FEEDING,
+    "sleep": POSE_SLEEP,
+}
+AXIS_TO_CH = {"x": ACTIVE_CHANNELS[0], "y": ACTIVE_CHANNELS[1], "z": ACTIVE_CHANNELS[2]}
+
+
+class BedActuator(object):
+    """
+    The only thread that drives the servos.
+
+    submit(kind, **args) queues a command and returns a Future that resolves
+    with {"status", "angles"} once the bed has finished acting on it. Kinds:
+      "preset" (mode), "manual" (x, y, z), "nudge" (axis, delta),
+      "rock" / "breathe" (motion args), "stop", "calibrate" (tilt calibration)
+    Commands are handled latest-wins: everything waiting in the queue is
+    folded into one target (consecutive nudges add up, a preset replaces
+    earlier nudges), and a running move or motion is preempted on its next
+    tick, continuing from its current interpolated position.
+    """
+
+    def __init__(self):
+        self._q = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._motion_preempted = False   # last action was a motion cut short
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, daemon=True, name="bed-actuator")
+                self._thread.start()
+
+    def has_pending(self):
+        return not self._q.empty()
+
+    def submit(self, kind, **args):
+        self.start()
+        fut = Future()
+        self._q.put((kind, args, fut))
+        return fut
+
+    def _drain(self):
+        cmds = [self._q.get()]
+        while True:
+            try:
+                cmds.append(self._q.get_nowait())
+            except queue.Empty:
+                return cmds
+
+    def _loop(self):
+        while True:
+            cmds = self._drain()
+            futures = [fut for _, _, fut in cmds]
+
+            # fold the queue into one action (latest wins)
+            target = {ch: last_angles[ch] for ch in ACTIVE_CHANNELS}
+            motion = None
+            duration = 1.0
+            in_motion = self._motion_preempted
+            for kind, args, _ in cmds:
+                if kind == "preset" and args.get("mode") in PRESETS:
+                    target, motion, duration = dict(PRESETS[args["mode"]]), None, 1.0
+                elif kind == "manual":
+                    target = {ch: clamp_angle(float(args[a])) for a, ch in AXIS_TO_CH.items()}
+                    motion, duration = None, 1.0
+                elif kind == "nudge" and args.get("axis") in AXIS_TO_CH:
+                    ch = AXIS_TO_CH[args["axis"]]
+                    if motion is not None:
+                        target, motion = {c: last_angles[c] for c in ACTIVE_CHANNELS}, None
+                    target[ch] = clamp_angle(target[ch] + float(args.get("delta", 0)))
+                    duration = 0.7
+                elif kind in ("rock", "breathe"):
+                    motion = (kind, args)
+                    in_motion = True
+                elif kind == "calibrate":
+                    motion = ("calibrate", args)
+                elif kind == "stop":
+                    # stopping a motion returns the bed to the sleep pose
+                    if in_motion:
+                        target, duration = dict(POSE_SLEEP), 1.0
+                    motion, in_motion = None, False
+                else:
+                    print("[ACTUATOR] ignoring bad command:", kind, args)
+
+            if len(cmds) > 1:
+                print(f"[ACTUATOR] folded {len(cmds)} commands ->",
+                      motion[0] if motion else target)
+
+            self._motion_preempted = False
+            bed_status["stable"] = False
+            try:
+                if motion is not None and motion[0] == "calibrate":
+                    reached = calibrate_tilt(should_stop=self.has_pending, **motion[1]) is not None
+                elif motion is not None:
+                    kind, args = motion
+                    (_gentle_rock if kind == "rock" else _womb_breathing)(**args)
+                    reached = not self.has_pending()
+                    self._motion_preempted = not reached
+                    bed_status["stable"] = reached
+                elif closed_loop_enabled():
+                    reached = closed_loop_move(target, duration=duration, should_stop=self.has_pending)
+                else:
+                    reached = smooth_move(target, duration=duration, should_stop=self.has_pending)
+                    bed_status["stable"] = reached
+                status = "done" if reached else "preempted"
+            except Exception as e:
+                print("[ACTUATOR] error:", e)
+                status = "error"
+
+            result = {"status": status, "angles": dict(last_angles)}
+            for fut in futures:
+                fut.set_result(result)
+
+
+actuator = BedActuator()
 
 # def gentle_rock(cycles=5, amplitude_deg=5.0, period=4.0):
 #     """
@@ -0,0 +1,118 @@
+import collections
+import threading
+import time
+
+import numpy as np
+
+
+# ==============================
+# TRAJECTORIES (precomputed)
+# ==============================
+# Every trajectory is an array of shape (samples, channels) sampled at `rate` Hz.
+
+def min_jerk(start, end, duration, rate):
+    """Minimum-jerk point-to-point move: smooth start and stop, no velocity jumps."""
+    n = max(int(round(duration * rate)), 1) + 1
+    t = np.linspace(0.0, 1.0, n)
+    s = 10 * t**3 - 15 * t**4 + 6 * t**5
+    start = np.asarray(start, dtype=float)
+    end = np.asarray(end, dtype=float)
+    return start + (end - start) * s[:, None]
+
+
+def sinusoid(base, amplitude, period, rate):
+    """One full period of base + amplitude * sin(2*pi*t/period) (per-channel amplitude)."""
+    n = max(int(round(period * rate)), 1)
+    t = np.arange(n) / rate
+    wave = np.sin(2 * np.pi * t / period)
+    return np.asarray(base, dtype=float) + np.outer(wave, np.asarray(amplitude, dtype=float))
+
+
+def breath(base, lift, period, rate, rise=0.45, hold=0.10):
+    """Inhale (raised-cosine up), hold, exhale (raised-cosine down); one period."""
+    n = max(int(round(period * rate)), 1)
+    t = np.arange(n) / float(n)
+    profile = np.zeros(n)
+    up = t < rise
+    top = (t >= rise) & (t < rise + hold)
+    down = (t >= rise + hold) & (t < 2 * rise + hold)
+    profile[up] = 0.5 - 0.5 * np.cos(np.pi * t[up] / rise)
+    profile[top] = 1.0
+    profile[down] = 0.5 + 0.5 * np.cos(np.pi * (t[down] - rise - hold) / rise)
+    return np.asarray(base, dtype=float) + np.outer(profile, np.asarray(lift, dtype=float))
+
+
+# ==============================
+# FIXED-RATE RUNNER
+# ==============================
+
+class JitterStats(object):
+    """Lateness of each tick against its scheduled time (seconds)."""
+
+    def __init__(self, keep=2000):
+        self._late = collections.deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self.ticks = 0
+        self.skipped = 0
+
+    def add(self, late):
+        with self._lock:
+            self._late.append(late)
+            self.ticks += 1
+
+    def summary(self):
+        with self._lock:
+            late = np.array(self._late) if self._late else np.zeros(1)
+            return {
+                "ticks": self.ticks,
+                "skipped": self.skipped,
+                "mean_ms": round(float(late.mean()) * 1000, 3),
+                "p99_ms": round(float(np.percentile(late, 99)) * 1000, 3),
+                "max_ms": round(float(late.max()) * 1000, 3),
+            }
+
+
+class TrajectoryRunner(object):
+    """
+    Plays a precomputed trajectory against the monotonic clock at `rate` Hz.
+
+    Sample k is due at t0 + k/rate, so time spent in I2C writes or the loop
+    never accumulates as drift; if we fall behind, late samples are skipped
+    rather than played slowly. should_stop() is checked on every tick, so a
+    stop/preempt takes effect within one tick. Returns the last sample written.
+    """
+
+    def __init__(self, write_fn, rate=50.0):
+        self.write_fn = write_fn
+        self.rate = float(rate)
+        self.stats = JitterStats()
+
+    def run(self, traj, should_stop=None, rate=None):
+        rate = float(rate or self.rate)
+        period = 1.0 / rate
+        t0 = time.monotonic()
+        k = 0
+        last = None
+        n = len(traj)
+        while k < n:
+            if should_stop is not None and should_stop():
+                break
+
+            due = t0 + k * period
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            now = time.monotonic()
+            self.stats.add(max(now - due, 0.0))
+
+            last = traj[k]
+            self.write_fn(last)
+
+            # next sample: whichever is due now (skip ahead if we overran)
+            nxt = int((time.monotonic() - t0) * rate) + 1
+            if nxt > k + 1:
+                self.stats.skipped += nxt - (k + 1)
+                k = min(nxt, n - 1) if k < n - 1 else n
+            else:
+                k += 1
+        return last
@@ -0,0 +1,158 @@
+import collections
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+
+class ClipRecorder(object):
+    """
+    Rolling in-memory ring of the most recent JPEG frames (already-encoded
+    bytes, never re-encoded) that can be dumped to disk when something happens.
+
+    - add_frame(jpeg_bytes) is called by the camera stream loop for every frame
+    - trigger(reason) writes the last `pre_seconds` plus the next `post_seconds`
+      to <out_dir>/<reason>_<timestamp>.mjpeg on a background writer thread,
+      together with a .jpg poster of the trigger frame
+    Memory use is bounded by both `pre_seconds` and `max_bytes`.
+    """
+
+    CLIP_EXT = ".mjpeg"
+
+    def __init__(self, out_dir, pre_seconds=10.0, post_seconds=10.0, max_bytes=32 * 1024 * 1024):
+        self.out_dir = out_dir
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.max_bytes = max_bytes
+
+        self._ring = collections.deque()   # (ts, jpeg_bytes)
+        self._ring_bytes = 0
+        self._lock = threading.Lock()
+        self._active = None                # (post_deadline, frame_queue)
+        self._jobs = queue.Queue()
+        self.on_saved = None               # optional callback(filename)
+
+        os.makedirs(out_dir, exist_ok=True)
+        threading.Thread(target=self._writer_loop, daemon=True).start()
+
+    def add_frame(self, jpeg_bytes, ts=None):
+        ts = ts or time.time()
+        with self._lock:
+            self._ring.append((ts, jpeg_bytes))
+            self._ring_bytes += len(jpeg_bytes)
+            while self._ring and (
+                self._ring_bytes > self.max_bytes or ts - self._ring[0][0] > self.pre_seconds
+            ):
+                _, old = self._ring.popleft()
+                self._ring_bytes -= len(old)
+
+            if self._active is not None:
+                deadline, frames = self._active
+                if ts <= deadline:
+                    frames.put(jpeg_bytes)
+                else:
+                    frames.put(None)
+                    self._active = None
+
+    def is_recording(self):
+        return self._active is not None
+
+    def trigger(self, reason="event"):
+        """Start a clip; returns its filename, or None if one is already recording."""
+        with self._lock:
+            if self._active is not None:
+                return None
+            pre = [jpeg for _, jpeg in self._ring]
+            frames = queue.Queue()
+            self._active = (time.time() + self.post_seconds, frames)
+
+        name = f"{reason}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{self.CLIP_EXT}"
+        self._jobs.put((name, pre, frames))
+        print(f"🎞️ [clip] recording {name} ({len(pre)} pre-event frames)")
+        return name
+
+    def _writer_loop(self):
+        while True:
+            name, pre, frames = self._jobs.get()
+            path = os.path.join(self.out_dir, name)
+            tmp_path = path + ".part"
+            count = 0
+            try:
+                with open(tmp_path, "wb") as f:
+                    for jpeg in pre:
+                        f.write(jpeg)
+                        count += 1
+                    while True:
+                        try:
+                            jpeg = frames.get(timeout=self.post_seconds + 5.0)
+                        except queue.Empty:
+                            break  # camera stopped feeding us
+                        if jpeg is None:
+                            break
+                        f.write(jpeg)
+                        count += 1
+
+                if pre:
+                    poster = os.path.splitext(path)[0] + ".jpg"
+                    with open(poster, "wb") as f:
+                        f.write(pre[-1])
+                os.replace(tmp_path, path)
+                print(f"✅ [clip] saved {path} ({count} frames)")
+                if self.on_saved:
+                    self.on_saved(name)
+            except Exception as e:
+                print("❌ [clip] write error:", e)
+            finally:
+                with self._lock:
+                    if self._active is not None and self._active[1] is frames:
+                        self._active = None
+
+
+class VitalsClipWatch(object):
+    """
+    Decides when out-of-range vitals start an event clip.
+
+    Each vital has its own episode: it begins when the value leaves its
+    (lo, hi) range and only ends once the value has been back in range for
+    `clear_s` seconds. An episode records at most `max_clips` clips, at least
+    `repeat_s` apart, so a reading that stays out of range doesn't write clip
+    after clip until the disk is full. A value of 0 means "no reading yet".
+    """
+
+    def __init__(self, recorder, limits, clear_s=30.0, repeat_s=300.0, max_clips=2):
+        self.recorder = recorder
+        self.limits = limits
+        self.clear_s = clear_s
+        self.repeat_s = repeat_s
+        self.max_clips = max_clips
+        self.episodes = {}      # key -> {"clips", "last_clip", "in_range_since"}
+        self._lock = threading.Lock()
+
+    def update(self, data, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for key, (lo, hi) in self.limits.items():
+                val = data.get(key) or 0
+                if not val:
+                    continue
+                episode = self.episodes.get(key)
+                if not (lo <= val <= hi):
+                    if episode is None:
+                        episode = {"clips": 0, "last_clip": None, "in_range_since": None}
+                        self.episodes[key] = episode
+                        print(f"⚠️ Vitals out of range ({key}={val})")
+                    episode["in_range_since"] = None
+                    if episode["clips"] < self.max_clips and (
+                        episode["last_clip"] is None or now - episode["last_clip"] >= self.repeat_s
+                    ):
+                        if self.recorder.trigger("vitals"):
+                            episode["clips"] += 1
+                            episode["last_clip"] = now
+                            print(f"🎞️ Vitals clip {episode['clips']}/{self.max_clips} ({key}={val})")
+                elif episode is not None:
+                    if episode["in_range_since"] is None:
+                        episode["in_range_since"] = now
+                    elif now - episode["in_range_since"] >= self.clear_s:
+                        del self.episodes[key]
+                        print(f"🙂 Vitals back in range ({key}={val})")
@@ -0,0 +1,109 @@
+import math
+import threading
+import time
+
+
+def _logit(p, lo=1e-4, hi=1.0 - 1e-4):
+    p = min(max(p, lo), hi)
+    return math.log(p / (1.0 - p))
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + math.exp(-x))
+
+
+class CryFusion(object):
+    """
+    Event-driven camera + mic cry fusion.
+
+    Each detector calls observe(source, prob) whenever it has a new score.
+    A source's evidence decays towards "not crying" as it ages (time constant
+    `decay_s[source]`), and the sources are combined as a weighted average in
+    log-odds space into a posterior that drives the intensity. Probabilities
+    are clipped to `prob_clip` first, so a hard 0.0 (e.g. a YOLO frame with no
+    cry box) counts as weak evidence instead of an overwhelming "calm" vote.
+    Crying only starts when both agree: the posterior has to reach
+    `on_threshold` and every source's decayed evidence has to reach its own
+    `source_thresholds[source]`, so one confident source can't outvote the
+    other. It only ends once every source has been below its threshold
+    (calm, or decayed because it went stale) for `calm_s` seconds.
+
+    Callbacks (all optional, called on the observing thread):
+      on_start(intensity), on_stop(), on_intensity(intensity)   # intensity 0-99
+    """
+
+    def __init__(self, weights=None, decay_s=None, source_thresholds=None, on_threshold=0.6,
+                 calm_s=5.0, intensity_step=5, prob_clip=(0.05, 0.95)):
+        self.weights = weights or {"camera": 0.5, "mic": 0.5}
+        self.decay_s = decay_s or {"camera": 10.0, "mic": 4.0}
+        self.source_thresholds = source_thresholds or {"camera": 0.5, "mic": 0.5}
+        self.on_threshold = on_threshold
+        self.prob_clip = prob_clip
+        self.calm_s = calm_s
+        self.intensity_step = intensity_step
+
+        self.on_start = None
+        self.on_stop = None
+        self.on_intensity = None
+
+        self._obs = {}            # source -> (prob, monotonic ts)
+        self._lock = threading.Lock()
+        self.active = False
+        self.posterior = 0.0
+        self.intensity = 0
+        self._below_since = None
+
+    def _effective(self, source, now):
+        prob, ts = self._obs.get(source, (0.0, now))
+        tau = self.decay_s.get(source, 5.0)
+        return prob * math.exp(-max(now - ts, 0.0) / tau)
+
+    def evidence(self):
+        """Current decayed probability per source."""
+        now = time.monotonic()
+        with self._lock:
+            return {src: round(self._effective(src, now), 3) for src in self.weights}
+
+    def observe(self, source, prob, ts=None):
+        now = time.monotonic() if ts is None else ts
+        events = []
+        with self._lock:
+            self._obs[source] = (float(prob), now)
+
+            total_w = sum(self.weights.values())
+            lo, hi = self.prob_clip
+            score = sum(w * _logit(self._effective(src, now), lo, hi) for src, w in self.weights.items())
+            self.posterior = _sigmoid(score / total_w)
+            intensity = int(min(99, max(0, round(self.posterior * 99))))
+            above = [self._effective(src, now) >= th for src, th in self.source_thresholds.items()]
+            agree = all(above)
+
+            if not self.active:
+                if agree and self.posterior >= self.on_threshold:
+                    self.active = True
+                    self._below_since = None
+                    self.intensity = intensity
+                    events.append(("start", intensity))
+            else:
+                if not any(above):
+                    if self._below_since is None:
+                        self._below_since = now
+                    elif now - self._below_since >= self.calm_s:
+                        self.active = False
+                        self.intensity = 0
+                        events.append(("stop", 0))
+                else:
+                    self._below_since = None
+                if self.active and abs(intensity - self.intensity) >= self.intensity_step:
+                    self.intensity = intensity
+                    events.append(("intensity", intensity))
+
+        # callbacks outside the lock
+        for kind, value in events:
+            cb = {"start": self.on_start, "stop": self.on_stop, "intensity": self.on_intensity}[kind]
+            if cb is None:
+                continue
+            try:
+                cb() if kind == "stop" else cb(value)
+            except Exception as e:
+                print(f"⚠️ [fusion] {kind} callback error:", e)
@@ -0,0 +1,228 @@
+import collections
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+import audio_models
+import metrics
+import tracing
+
+QUEUE_LATENCY = metrics.registry.histogram(
+    "cry_reason_latency_seconds", "Cry-reason job time from submit to result (queue + decode + predict)")
+PREDICT_SECONDS = metrics.registry.histogram(
+    "cry_reason_predict_seconds", "Cry-reason CNN predict time per batch")
+
+
+# Define your class names (must match your training)
+CLASS_NAMES = ['belly_pain', 'burping', 'discomfort', 'hungry', 'tired']
+IMG_SIZE = (128, 128)
+
+
+# --- Config for mel-spectrogram preprocessing (must match training) ---
+class conf:
+    sampling_rate = 16000
+    duration = 7
+    hop_length = 100 * duration
+    fmin = 20
+    fmax = sampling_rate // 2
+    n_mels = 128
+    n_fft = n_mels * 20
+    samples = sampling_rate * duration
+
+
+class CryReasonClassifier(object):
+    """
+    Process-wide cache for the cry-reason CNN (custom_cnn.h5, or its .tflite export).
+
+    The model is loaded lazily on first use (with a warmup inference) and
+    reloaded only when the .h5 file's mtime changes. The mel filterbank is
+    built once, so a repeat request only pays STFT + inference.
+    """
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self._model = None
+        self._mtime = None
+        self._mel_basis = None
+        self._lock = threading.Lock()
+
+    # ---------- model ----------
+
+    def model(self):
+        mtime = os.path.getmtime(self.model_path)
+        with self._lock:
+            if self._model is None or mtime != self._mtime:
+                if self._model is not None:
+                    print(f"🔄 [cry_reason] {self.model_path} changed on disk — reloading")
+                self._model = audio_models.registry.load(
+                    "cry_reason",
+                    lambda: audio_models.load_classifier(self.model_path),
+                    warmup=audio_models.warmup_keras(IMG_SIZE + (3,)),
+                )
+                self._mtime = mtime
+            return self._model
+
+    # ---------- preprocessing ----------
+
+    def mel_basis(self):
+        if self._mel_basis is None:
+            import librosa
+            self._mel_basis = librosa.filters.mel(
+                sr=conf.sampling_rate, n_fft=conf.n_fft, n_mels=conf.n_mels,
+                fmin=conf.fmin, fmax=conf.fmax,
+            )
+        return self._mel_basis
+
+    def decode_audio(self, audio_bytes):
+        """Decode an uploaded WAV straight from memory to mono 16 kHz."""
+        import io
+        import soundfile as sf
+        y, sr = sf.read(io.BytesIO(audio_bytes), dtype="float32", always_2d=True)
+        y = y.mean(axis=1)
+        if sr != conf.sampling_rate:
+            import librosa
+            y = librosa.resample(y, orig_sr=sr, target_sr=conf.sampling_rate)
+        return y
+
+    def fit_length(self, y):
+        if len(y) > conf.samples:
+            return y[:conf.samples]
+        return np.pad(y, (0, conf.samples - len(y)), mode='constant')
+
+    def audio_to_melspectrogram(self, audio):
+        # same as librosa.feature.melspectrogram(power=2.0) with the cached filterbank
+        import librosa
+        S = np.abs(librosa.stft(audio, n_fft=conf.n_fft, hop_length=conf.hop_length)) ** 2
+        mels = librosa.power_to_db(self.mel_basis().dot(S))
+        return mels.astype(np.float32)
+
+    @staticmethod
+    def mono_to_color(X, eps=1e-6):
+        X = np.stack([X, X, X], axis=-1)
+        mean = X.mean()
+        std = X.std()
+        Xstd = (X - mean) / (std + eps)
+        _min, _max = Xstd.min(), Xstd.max()
+        V = 255 * (Xstd - _min) / (_max - _min)
+        return V.astype(np.uint8)
+
+    def preprocess(self, y):
+        """Raw 16 kHz samples -> (128, 128, 3) float image in [0, 1]."""
+        from PIL import Image
+        mels = self.audio_to_melspectrogram(self.fit_length(y))
+        img = self.mono_to_color(mels)
+        img = np.array(Image.fromarray(img).resize(IMG_SIZE))
+        return img / 255.0
+
+    # ---------- inference ----------
+
+    def predict_batch(self, imgs):
+        """Return [(label, scores), ...] for a list of preprocessed images, in one predict call."""
+        pred = self.model().predict(np.stack(imgs), verbose=0)
+        results = []
+        for row in pred:
+            scores = {cls: float(row[i]) for i, cls in enumerate(CLASS_NAMES)}
+            results.append((CLASS_NAMES[int(np.argmax(row))], scores))
+        return results
+
+
+class QueueFull(Exception):
+    pass
+
+
+class ClassificationQueue(object):
+    """
+    Bounded job queue in front of the classifier, served by one worker thread
+    so decoding, mel-spectrograms and model.predict never run on the event loop.
+
+    Jobs that arrive while the worker is busy are micro-batched: the worker
+    takes up to `max_batch` jobs (waiting at most `batch_wait` seconds for
+    stragglers) and runs them through a single predict call. submit() raises
+    QueueFull once `max_pending` jobs are waiting.
+    """
+
+    def __init__(self, classifier, max_pending=8, max_batch=4, batch_wait=0.05):
+        self.classifier = classifier
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait
+        self._jobs = queue.Queue(maxsize=max_pending)
+
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=100)
+        self.processed = 0
+        self.rejected = 0
+        self.batches = 0
+
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def submit(self, load_fn):
+        """
+        load_fn() -> 16 kHz samples; it runs on the worker thread.
+        Returns a concurrent.futures.Future resolving to (label, scores).
+        """
+        fut = Future()
+        try:
+            self._jobs.put_nowait((load_fn, fut, time.perf_counter()))
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise QueueFull(f"cry classifier busy ({self._jobs.qsize()} jobs waiting)")
+        return fut
+
+    def _take_batch(self):
+        batch = [self._jobs.get()]
+        deadline = time.perf_counter() + self.batch_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._jobs.get(timeout=max(remaining, 0)) if remaining > 0
+                             else self._jobs.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker(self):
+        while True:
+            batch = self._take_batch()
+
+            ready = []
+            for load_fn, fut, t0 in batch:
+                try:
+                    ready.append((self.classifier.preprocess(load_fn()), fut, t0))
+                except Exception as e:
+                    fut.set_exception(e)
+
+            if ready:
+                try:
+                    with PREDICT_SECONDS.time(), tracing.span("cry_reason.predict", "model", {"batch": len(ready)}):
+                        results = self.classifier.predict_batch([img for img, _, _ in ready])
+                    for (_, fut, _), result in zip(ready, results):
+                        fut.set_result(result)
+                except Exception as e:
+                    for _, fut, _ in ready:
+                        fut.set_exception(e)
+
+            done = time.perf_counter()
+            with self._lock:
+                self.batches += 1
+                for _, _, t0 in batch:
+                    self._latencies.append(done - t0)
+                    QUEUE_LATENCY.observe(done - t0)
+                self.processed += len(batch)
+
+    def stats(self):
+        with self._lock:
+            lat = sorted(self._latencies)
+            return {
+                "depth": self._jobs.qsize(),
+                "processed": self.processed,
+                "rejected": self.rejected,
+                "batches": self.batches,
+                "avg_batch": round(self.processed / self.batches, 2) if self.batches else 0.0,
+                "latency_avg_s": round(sum(lat) / len(lat), 3) if lat else None,
+                "latency_p95_s": round(lat[int(0.95 * (len(lat) - 1))], 3) if lat else None,
+            }
@@ -0,0 +1,590 @@
+import bisect
+import csv
+import math
+import os
+import random
+import threading
+import time
+
+import numpy as np
+
+import metrics
+import tracing
+from audio_output import AudioMixer
+from audio_stream import MicStream
+
+
+# Device mode for the whole server: "real" (Pi hardware), "sim" (synthetic /
+# file-backed devices, runs on any Linux host) or "auto" (real, falling back to
+# sim per device when the hardware is missing). A single device can be forced
+# with BABY_DEVICE_<NAME>=real|sim, e.g. BABY_DEVICE_CAMERA=real.
+DEVICE_MODE = os.environ.get("BABY_DEVICES", "real")
+
+SIM_VIDEO_FILE = os.environ.get("BABY_SIM_VIDEO", "")    # played as /dev/video0 (loops)
+SIM_AUDIO_FILE = os.environ.get("BABY_SIM_WAV", "")      # played as the microphone (loops)
+SIM_SENSOR_TRACE = os.environ.get("BABY_SIM_TRACE", "")  # recorded sensor CSV (see SensorTrace)
+SIM_BPM = float(os.environ.get("BABY_SIM_BPM", "130"))
+SIM_SPO2_RATIO = 0.5                                     # red/ir AC ratio -> ~97% SpO2 in hrcalc
+
+# the bed picks its servo backend at import time; keep it in step with the device mode
+if DEVICE_MODE in ("sim", "auto"):
+    os.environ.setdefault("BED_SERVO_BACKEND", DEVICE_MODE)
+
+
+# ==============================
+# SIMULATED DEVICES
+# ==============================
+
+class SensorTrace(object):
+    """
+    Recorded sensor data replayed in real time (looping), for the simulated
+    PPG, accelerometer and DHT11. CSV with a header row:
+
+        t,red,ir,ax,ay,az,temperature,humidity
+
+    t is seconds from the start of the recording. PPG rows are the 25 Hz
+    FIFO samples; accelerometer / DHT columns may be left empty on rows
+    where that sensor wasn't read (the previous value holds).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.ppg = []                                   # [(red, ir)] in order
+        self._series = {"accel": ([], []), "env": ([], [])}
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                t = float(row["t"])
+                if row.get("red") and row.get("ir"):
+                    self.ppg.append((int(float(row["red"])), int(float(row["ir"]))))
+                if row.get("ax") and row.get("ay") and row.get("az"):
+                    self._add("accel", t, (float(row["ax"]), float(row["ay"]), float(row["az"])))
+                if row.get("temperature") and row.get("humidity"):
+                    self._add("env", t, (float(row["temperature"]), float(row["humidity"])))
+                self.duration = t
+        self.duration = max(getattr(self, "duration", 0.0), 1e-3)
+        self.t0 = time.monotonic()
+        print(f"📼 Sensor trace {path}: {self.duration:.0f}s, {len(self.ppg)} PPG samples")
+
+    def _add(self, kind, t, value):
+        ts, values = self._series[kind]
+        ts.append(t)
+        values.append(value)
+
+    def has(self, kind):
+        return bool(self._series[kind][0])
+
+    def at(self, kind):
+        """Most recent recorded value of `kind` ("accel" / "env") for the current replay time."""
+        ts, values = self._series[kind]
+        t = (time.monotonic() - self.t0) % self.duration
+        return values[max(bisect.bisect_right(ts, t) - 1, 0)]
+
+
+_sim_trace = None
+_sim_trace_lock = threading.Lock()
+
+
+def sim_trace():
+    """The shared SensorTrace (BABY_SIM_TRACE), loaded on first use; None without one."""
+    global _sim_trace
+    with _sim_trace_lock:
+        if _sim_trace is None and SIM_SENSOR_TRACE:
+            _sim_trace = SensorTrace(SIM_SENSOR_TRACE)
+        return _sim_trace
+
+
+class SimAccelerometer(object):
+    """
+    ADXL345 stand-in: gravity plus a little noise. With `angles_fn`
+    (() -> {channel: degrees}, e.g. the bed's last_angles) the bed tilt follows
+    the servos, so the closed-loop bed code has something to settle on.
+    With a SensorTrace that has accelerometer columns, those are replayed instead.
+    """
+
+    PITCH_PER_DEG = (0.3, -0.1, 0.0)    # deg of tilt per deg of servo, per channel
+    ROLL_PER_DEG = (0.0, 0.2, 0.0)
+    NEUTRAL_DEG = 60.0
+
+    def __init__(self, angles_fn=None, noise=0.02, trace=None):
+        self.angles_fn = angles_fn
+        self.noise = noise
+        self.trace = trace if trace is not None and trace.has("accel") else None
+        self.data_rate = None
+
+    @property
+    def acceleration(self):
+        if self.trace is not None:
+            return self.trace.at("accel")
+        pitch = roll = 0.0
+        if self.angles_fn is not None:
+            angles = self.angles_fn()
+            for i, ch in enumerate(sorted(angles)[:3]):
+                d = angles[ch] - self.NEUTRAL_DEG
+                pitch += self.PITCH_PER_DEG[i] * d
+                roll += self.ROLL_PER_DEG[i] * d
+        p, r = math.radians(pitch), math.radians(roll)
+        g = 9.81
+        return (g * math.sin(p) + random.gauss(0, self.noise),
+                g * math.sin(r) + random.gauss(0, self.noise),
+                g * math.cos(p) * math.cos(r) + random.gauss(0, self.noise))
+
+
+class SimDHT(object):
+    """DHT11 stand-in: nursery temperature/humidity drifting slowly around a set point (or a trace)."""
+
+    def __init__(self, temperature=24.0, humidity=50.0, trace=None):
+        self.base_t = temperature
+        self.base_h = humidity
+        self.trace = trace if trace is not None and trace.has("env") else None
+        self._t0 = time.monotonic()
+
+    @property
+    def temperature(self):
+        if self.trace is not None:
+            return self.trace.at("env")[0]
+        t = time.monotonic() - self._t0
+        return round(self.base_t + 0.5 * math.sin(t / 300.0), 1)
+
+    @property
+    def humidity(self):
+        if self.trace is not None:
+            return self.trace.at("env")[1]
+        t = time.monotonic() - self._t0
+        return round(self.base_h + 2.0 * math.sin(t / 450.0), 1)
+
+
+class SimMAX30102(object):
+    """
+    MAX30102 stand-in producing a synthetic PPG (red, ir) at the sensor's
+    effective 25 Hz, paced against the clock like the real FIFO; with a
+    SensorTrace the recorded PPG samples are replayed instead.
+    Same methods as max30102.MAX30102 that the server and HeartRateMonitor use.
+    """
+
+    SAMPLE_HZ = 25   # 100 Hz with 4-sample averaging (see max30102.setup / hrcalc)
+
+    def __init__(self, bpm=SIM_BPM, ratio=SIM_SPO2_RATIO, trace=None):
+        self.bpm = bpm
+        self.ratio = ratio
+        self.trace = trace if trace is not None and trace.ppg else None
+        self._t0 = time.monotonic()
+        self._read = 0        # samples handed out so far
+
+    def _sample(self, k):
+        if self.trace is not None:
+            return self.trace.ppg[k % len(self.trace.ppg)]
+        t = k / float(self.SAMPLE_HZ)
+        bpm = self.bpm + 3.0 * math.sin(2 * math.pi * t / 60.0)
+        wave = math.sin(2 * math.pi * bpm / 60.0 * t)
+        noise = random.gauss(0, 40)
+        ir = int(100000 + 1500 * wave + noise)
+        red = int(80000 + 1500 * self.ratio * 0.8 * wave + noise)
+        return red, ir
+
+    def get_data_present(self):
+        due = int((time.monotonic() - self._t0) * self.SAMPLE_HZ)
+        return max(min(due - self._read, 32), 0)   # FIFO holds 32 samples
+
+    def read_fifo(self):
+        sample = self._sample(self._read)
+        self._read += 1
+        return sample
+
+    def read_sequential(self, amount=100):
+        red_buf, ir_buf = [], []
+        while len(red_buf) < amount:
+            n = self.get_data_present()
+            if n == 0:
+                time.sleep(1.0 / self.SAMPLE_HZ)
+                continue
+            for _ in range(min(n, amount - len(red_buf))):
+                red, ir = self.read_fifo()
+                red_buf.append(red)
+                ir_buf.append(ir)
+        return red_buf, ir_buf
+
+    def shutdown(self):
+        pass
+
+
+class FileCamera(object):
+    """
+    cv2.VideoCapture stand-in that plays a video file (looping) at its own
+    frame rate, or a synthetic test pattern when no file is given.
+    A decoder thread keeps the newest frame, so several readers (YOLO loop,
+    stream loop) all see a live camera, like /dev/video0.
+    """
+
+    def __init__(self, path="", width=640, height=480, fps=15.0):
+        import cv2
+
+        self._cv2 = cv2
+        self.path = path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self._cap = None
+        if path:
+            self._cap = cv2.VideoCapture(path)
+            if not self._cap.isOpened():
+                raise RuntimeError(f"cannot open video file {path}")
+            self.fps = self._cap.get(cv2.CAP_PROP_FPS) or fps
+        self._frame = None
+        self._cond = threading.Condition()
+        self._stopped = False
+        self.frames = 0
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _next_frame(self):
+        cv2 = self._cv2
+        if self._cap is None:
+            frame = np.full((self.height, self.width, 3), 40, dtype=np.uint8)
+            cv2.putText(frame, f"SIM {self.frames}", (20, 50),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 2)
+            return frame
+        ok, frame = self._cap.read()
+        if not ok:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)   # loop
+            ok, frame = self._cap.read()
+            if not ok:
+                return None
+        if frame.shape[1] != self.width or frame.shape[0] != self.height:
+            frame = cv2.resize(frame, (self.width, self.height))
+        return frame
+
+    def _run(self):
+        period = 1.0 / self.fps
+        due = time.monotonic()
+        while not self._stopped:
+            frame = self._next_frame()
+            with self._cond:
+                if frame is not None:
+                    self._frame = frame
+                    self.frames += 1
+                self._cond.notify_all()
+            due += period
+            time.sleep(max(due - time.monotonic(), 0))
+
+    # --- the bits of cv2.VideoCapture the server uses ---
+
+    def read(self):
+        with self._cond:
+            if self._frame is None:
+                self._cond.wait(2.0)
+            if self._frame is None:
+                return False, None
+            return True, self._frame.copy()
+
+    def set(self, prop, value):
+        return True
+
+    def isOpened(self):
+        return not self._stopped
+
+    def release(self):
+        self._stopped = True
+        if self._cap is not None:
+            self._cap.release()
+
+
+class WavMicStream(MicStream):
+    """
+    MicStream fed from a WAV file (looping, real-time pace) instead of a
+    sound card; quiet noise when no file is given. Consumers use the same ring.
+    """
+
+    def __init__(self, path="", samplerate=16000, ring_seconds=15.0, blocksize=1600):
+        super(WavMicStream, self).__init__(samplerate=samplerate, ring_seconds=ring_seconds,
+                                           blocksize=blocksize)
+        self.path = path
+        self._stopped = False
+        self._thread = None
+        self.started_at = None    # wall-clock time of sample 0 (replay benchmarks align to this)
+        self.loop_s = None
+
+    def _load(self):
+        if not self.path:
+            return None
+        import soundfile as sf
+
+        audio, sr = sf.read(self.path, dtype="float32", always_2d=True)
+        audio = audio.mean(axis=1)
+        if sr != self.samplerate:
+            n = int(len(audio) * self.samplerate / float(sr))
+            audio = np.interp(np.linspace(0, len(audio) - 1, n), np.arange(len(audio)), audio)
+        return audio.astype(np.float32)
+
+    def _run(self, audio):
+        period = self.blocksize / float(self.samplerate)
+        pos = 0
+        due = time.monotonic()
+        while not self._stopped:
+            if audio is None:
+                block = np.random.normal(0, 0.002, self.blocksize).astype(np.float32)
+            else:
+                idx = (pos + np.arange(self.blocksize)) % len(audio)
+                block = audio[idx]
+                pos = (pos + self.blocksize) % len(audio)
+            self.ring.write(block)
+            due += period
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                self.overflows += 1   # fell behind real time
+                due = time.monotonic()
+
+    def start(self):
+        audio = self._load()
+        self._stopped = False
+        self.loop_s = len(audio) / float(self.samplerate) if audio is not None else None
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, args=(audio,), daemon=True)
+        self._thread.start()
+        print(f"🎙️ Simulated mic from {self.path or 'noise'} ({self.samplerate} Hz)")
+
+    def stop(self):
+        self._stopped = True
+
+
+class SimAudioMixer(AudioMixer):
+    """
+    AudioMixer without a sound card: the mix callback runs on a timer thread
+    (so playback, fades and ducking behave the same) and the output is dropped.
+    Sounds that cannot be decoded become one second of silence.
+    """
+
+    def load_sound(self, name, path):
+        try:
+            super(SimAudioMixer, self).load_sound(name, path)
+        except Exception as e:
+            print(f"⚠️ [mixer] '{name}' unavailable in sim ({e}); using silence")
+            self.sounds[name] = np.zeros((self.samplerate, self.channels), dtype=np.float32)
+
+    def _run(self):
+        out = np.zeros((self.blocksize, self.channels), dtype=np.float32)
+        period = self.blocksize / float(self.samplerate)
+        due = time.monotonic()
+        while self._stream is not None:
+            self._callback(out, self.blocksize, None, None)
+            due += period
+            time.sleep(max(due - time.monotonic(), 0))
+
+    def start(self):
+        self._stream = "sim"
+        threading.Thread(target=self._run, daemon=True).start()
+        print(f"🔊 [mixer] simulated output ({self.samplerate} Hz, block={self.blocksize})")
+
+    def close(self):
+        self._stream = None
+
+
+# ==============================
+# REAL DEVICES (imports stay inside, so sim mode needs none of them)
+# ==============================
+
+ACCEL_ADDR = 0x53   # SDO tied to VCC (0x1D if SDO to GND)
+
+
+def _real_i2c():
+    import board, busio
+
+    # Slower clock is safest for mixed devices
+    i2c = busio.I2C(board.SCL, board.SDA, frequency=100_000)
+    print("🔎 Locking I2C and scanning...")
+    while not i2c.try_lock():
+        time.sleep(0.01)
+    try:
+        print("🚌 I2C scan:", [hex(a) for a in i2c.scan()])
+    finally:
+        i2c.unlock()
+    time.sleep(0.05)   # settle delay helps some breakouts after power-up
+    return i2c
+
+
+def _real_accelerometer():
+    import adafruit_adxl34x
+
+    i2c = registry.get("i2c")
+    # one retry in case of a first-write hiccup
+    for attempt in range(2):
+        try:
+            accel = adafruit_adxl34x.ADXL345(i2c, address=ACCEL_ADDR)
+            break
+        except Exception as e:
+            print(f"⚠️ ADXL345 init failed (attempt {attempt+1}): {e}")
+            time.sleep(0.1)
+    else:
+        raise RuntimeError("ADXL345 not available")
+    # high-rate tilt feedback for the bed's closed-loop mode
+    accel.data_rate = adafruit_adxl34x.DataRate.RATE_400_HZ
+    print("✅ ADXL345 ready @ 0x%02X" % ACCEL_ADDR)
+    return accel
+
+
+def _real_dht():
+    import board, adafruit_dht
+
+    return adafruit_dht.DHT11(board.D4)
+
+
+class CountingBus(object):
+    """smbus2.SMBus wrapper: counts transactions (i2c_transactions_total{device=...}) and traces them."""
+
+    def __init__(self, bus, device):
+        self._bus = bus
+        self._span = "i2c." + device
+        self._count = metrics.registry.counter(
+            "i2c_transactions_total", "I2C transactions per device", device=device)
+
+    def read_byte_data(self, *args):
+        self._count.inc()
+        with tracing.span(self._span, "i2c"):
+            return self._bus.read_byte_data(*args)
+
+    def read_i2c_block_data(self, *args):
+        self._count.inc()
+        with tracing.span(self._span, "i2c"):
+            return self._bus.read_i2c_block_data(*args)
+
+    def write_i2c_block_data(self, *args):
+        self._count.inc()
+        with tracing.span(self._span, "i2c"):
+            return self._bus.write_i2c_block_data(*args)
+
+    def __getattr__(self, name):
+        return getattr(self._bus, name)
+
+
+def _real_ppg():
+    import max30102
+
+    sensor = max30102.MAX30102()
+    sensor.bus = CountingBus(sensor.bus, "max30102")
+    return sensor
+
+
+def _real_camera():
+    import cv2
+
+    print("🎥 Initializing camera at /dev/video0 ...")
+    camera = cv2.VideoCapture("/dev/video0", cv2.CAP_V4L2)
+    camera.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+    camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+    camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    if not camera.isOpened():
+        raise RuntimeError("❌ Camera failed to initialize — check connection or permissions.")
+    time.sleep(1)
+    ret, _ = camera.read()
+    if ret:
+        print("✅ Camera test frame captured successfully — LED ON.")
+    else:
+        print("⚠️ Failed to capture frame from /dev/video0.")
+    return camera
+
+
+def _real_mic(**kwargs):
+    import sounddevice as sd
+
+    stream = MicStream(**kwargs)
+    # MicStream only opens the sound card in start(); probe it now so a
+    # missing or unsupported input raises here (and "auto" falls back to sim)
+    sd.check_input_settings(device=stream.device, samplerate=stream.samplerate,
+                            channels=1, dtype="float32")
+    return stream
+
+
+def _real_audio_out(**kwargs):
+    import sounddevice as sd
+
+    mixer = AudioMixer(**kwargs)
+    sd.check_output_settings(samplerate=mixer.samplerate, channels=mixer.channels, dtype="float32")
+    return mixer
+
+
+def _sim_accelerometer():
+    import bed_control
+
+    return SimAccelerometer(angles_fn=lambda: dict(bed_control.last_angles), trace=sim_trace())
+
+
+# ==============================
+# REGISTRY
+# ==============================
+
+class DeviceRegistry(object):
+    """
+    Named devices with a real and a simulated factory each.
+
+    get(name) builds the device once (per the mode) and caches it; new(name)
+    builds a fresh, uncached instance.
+    Different devices can be opened from parallel threads.
+    Factories take keyword arguments, which are passed through.
+    status() reports which implementation each device ended up with.
+    """
+
+    def __init__(self, mode=DEVICE_MODE):
+        if mode not in ("real", "sim", "auto"):
+            raise ValueError(f"unknown device mode {mode!r} (real, sim or auto)")
+        self.mode = mode
+        self._factories = {}     # name -> (real_fn, sim_fn)
+        self._devices = {}
+        self._kinds = {}         # name -> "real" | "sim" | "error: ..."
+        self._locks = {}         # name -> RLock, so different devices can open in parallel
+        self._lock = threading.Lock()
+
+    def register(self, name, real, sim):
+        self._factories[name] = (real, sim)
+
+    def mode_for(self, name):
+        return os.environ.get("BABY_DEVICE_" + name.upper(), self.mode)
+
+    def new(self, name, **kwargs):
+        real, sim = self._factories[name]
+        mode = self.mode_for(name)
+        if mode == "sim":
+            self._kinds[name] = "sim"
+            return sim(**kwargs)
+        try:
+            device = real(**kwargs)
+            self._kinds[name] = "real"
+            return device
+        except Exception as e:
+            if mode != "auto":
+                self._kinds[name] = f"error: {e}"
+                raise
+            print(f"⚠️ [devices] {name}: real device unavailable ({e}); using simulation")
+            self._kinds[name] = "sim"
+            return sim(**kwargs)
+
+    def get(self, name, **kwargs):
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.RLock())
+        with lock:
+            if name not in self._devices:
+                self._devices[name] = self.new(name, **kwargs)
+            return self._devices[name]
+
+    def status(self):
+        return dict(self._kinds)
+
+    def sim_info(self):
+        """Replay alignment for benchmarks: when the simulated mic started and its loop length."""
+        mic = self._devices.get("mic")
+        return {
+            "video": SIM_VIDEO_FILE or None,
+            "wav": SIM_AUDIO_FILE or None,
+            "sensor_trace": SIM_SENSOR_TRACE or None,
+            "mic_started_at": getattr(mic, "started_at", None),
+            "mic_loop_s": getattr(mic, "loop_s", None),
+        }
+
+
+registry = DeviceRegistry()
+registry.register("i2c", _real_i2c, lambda: None)
+registry.register("accelerometer", _real_accelerometer, _sim_accelerometer)
+registry.register("dht", _real_dht, lambda: SimDHT(trace=sim_trace()))
+registry.register("ppg", _real_ppg, lambda: SimMAX30102(trace=sim_trace()))
+registry.register("camera", _real_camera, lambda: FileCamera(SIM_VIDEO_FILE))
+registry.register("mic", _real_mic, lambda **kw: WavMicStream(SIM_AUDIO_FILE, **kw))
+registry.register("audio_out", _real_audio_out, lambda **kw: SimAudioMixer(**kw))
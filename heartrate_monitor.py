@@ -1,10 +1,14 @@
 
-from max30102 import MAX30102
 import hrcalc
+import metrics
+import tracing
 import threading
 import time
 import numpy as np
 
+HR_CALC_SECONDS = metrics.registry.histogram(
+    "hr_calc_seconds", "calc_hr_and_spo2 run time", source="monitor")
+
 
 class HeartRateMonitor(object):
     """
@@ -13,15 +17,20 @@ class HeartRateMonitor(object):
 
     LOOP_TIME = 0.01
 
-    def __init__(self, print_raw=False, print_result=False):
+    def __init__(self, print_raw=False, print_result=False, sensor_factory=None):
         self.bpm = 0
+        self.sensor_factory = sensor_factory
         if print_raw is True:
             print('IR, Red')
         self.print_raw = print_raw
         self.print_result = print_result
 
     def run_sensor(self):
-        sensor = MAX30102()
+        if self.sensor_factory is None:
+            from max30102 import MAX30102
+            sensor = MAX30102()
+        else:
+            sensor = self.sensor_factory()
         ir_data = []
         red_data = []
         bpms = []
@@ -32,20 +41,22 @@ class HeartRateMonitor(object):
             num_bytes = sensor.get_data_present()
             if num_bytes > 0:
                 # grab all the data and stash it into arrays
-                while num_bytes > 0:
-                    red, ir = sensor.read_fifo()
-                    num_bytes -= 1
-                    ir_data.append(ir)
-                    red_data.append(red)
-                    if self.print_raw:
-                        print("{0}, {1}".format(ir, red))
+                with tracing.span("hrm.fifo", "sensor", {"samples": num_bytes}):
+                    while num_bytes > 0:
+                        red, ir = sensor.read_fifo()
+                        num_bytes -= 1
+                        ir_data.append(ir)
+                        red_data.append(red)
+                        if self.print_raw:
+                            print("{0}, {1}".format(ir, red))
 
                 while len(ir_data) > 100:
                     ir_data.pop(0)
                     red_data.pop(0)
 
                 if len(ir_data) == 100:
-                    bpm, valid_bpm, spo2, valid_spo2 = hrcalc.calc_hr_and_spo2(ir_data, red_data)
+                    with HR_CALC_SECONDS.time(), tracing.span("hrm.calc", "sensor"):
+                        bpm, valid_bpm, spo2, valid_spo2 = hrcalc.calc_hr_and_spo2(ir_data, red_data)
                     if valid_bpm:
                         bpms.append(bpm)
                         while len(bpms) > 4:
@@ -0,0 +1,199 @@
+import bisect
+import threading
+import time
+
+
+# seconds; covers ~1 ms I2C reads up to multi-second model calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# loop periods that should sit around 1 s
+PERIOD_BUCKETS = (0.5, 0.75, 0.9, 1.0, 1.1, 1.25, 1.5, 2.0, 3.0, 5.0, 10.0)
+# queue depths
+DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128)
+
+
+def _fmt_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join('%s="%s"' % (k, str(v).replace('"', '\\"')) for k, v in labels) + "}"
+
+
+def _fmt_value(v):
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Counter(object):
+    """Monotonic count. inc() is a lock + add, cheap enough for hot loops."""
+
+    kind = "counter"
+
+    def __init__(self, name, labels=()):
+        self.name = name
+        self.labels = labels
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, n=1):
+        with self._lock:
+            self._value += n
+
+    def samples(self):
+        return [(self.name, self.labels, self._value)]
+
+
+class Gauge(object):
+    """Value that goes up and down; or, with `fn`, read at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name, labels=(), fn=None):
+        self.name = name
+        self.labels = labels
+        self.fn = fn
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def set(self, v):
+        self._value = v
+
+    def inc(self, n=1):
+        with self._lock:
+            self._value += n
+
+    def dec(self, n=1):
+        with self._lock:
+            self._value -= n
+
+    @property
+    def value(self):
+        return self._value
+
+    def samples(self):
+        value = self._value
+        if self.fn is not None:
+            try:
+                value = self.fn()
+            except Exception:
+                return []
+        return [(self.name, self.labels, value)]
+
+
+class CounterFunc(Gauge):
+    """A counter someone else already keeps (e.g. MicStream.overflows), read at scrape time."""
+
+    kind = "counter"
+
+
+class _Timer(object):
+    def __init__(self, hist):
+        self.hist = hist
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0)
+        return False
+
+
+class Histogram(object):
+    """
+    Fixed-bucket histogram (Prometheus semantics: cumulative buckets, sum, count).
+    observe() is a bisect plus one locked increment; nothing is allocated.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)   # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+            self._count += 1
+
+    def time(self):
+        """with hist.time(): ... observes the block's wall time in seconds."""
+        return _Timer(self)
+
+    def samples(self):
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        out = []
+        cumulative = 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            cumulative += n
+            out.append((self.name + "_bucket", self.labels + (("le", _fmt_value(bound)),), cumulative))
+        out.append((self.name + "_sum", self.labels, total))
+        out.append((self.name + "_count", self.labels, count))
+        return out
+
+
+class MetricsRegistry(object):
+    """
+    Process-wide metrics, rendered in the Prometheus text format by render().
+
+    counter()/gauge()/histogram() return the existing metric for the same
+    name + labels, so modules can declare what they need at import time:
+
+        YOLO_SECONDS = metrics.registry.histogram("yolo_inference_seconds", "YOLO latency")
+        with YOLO_SECONDS.time():
+            ...
+    """
+
+    def __init__(self):
+        self._metrics = {}      # (name, labels) -> metric
+        self._help = {}         # name -> (kind, help)
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, labels, **kwargs):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            metric = self._metrics.get(key)
+            if metric is None:
+                metric = cls(name, key[1], **kwargs)
+                self._metrics[key] = metric
+                self._help.setdefault(name, (cls.kind, help))
+            return metric
+
+    def counter(self, name, help="", **labels):
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name, help="", fn=None, **labels):
+        return self._get(Gauge, name, help, labels, fn=fn)
+
+    def counter_func(self, name, help="", fn=None, **labels):
+        return self._get(CounterFunc, name, help, labels, fn=fn)
+
+    def histogram(self, name, help="", buckets=LATENCY_BUCKETS, **labels):
+        return self._get(Histogram, name, help, labels, buckets=buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines = []
+        seen = set()
+        for (name, _), metric in metrics:
+            if name not in seen:
+                seen.add(name)
+                kind, help = self._help[name]
+                if help:
+                    lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+            for sample, labels, value in metric.samples():
+                lines.append(f"{sample}{_fmt_labels(labels)} {_fmt_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
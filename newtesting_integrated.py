@@ -1,75 +1,50 @@
 import asyncio
 import base64
+import collections
 import cv2
 import numpy as np
-import pygame
 import time
 import os
-import subprocess
 import threading
+import uuid
+from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 
-import board, busio, adafruit_adxl34x, adafruit_dht, lgpio as GPIO
-import max30102, hrcalc
+import hrcalc
 from heartrate_monitor import HeartRateMonitor
-from ultralytics import YOLO
 
 import socketio
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Response
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 import uvicorn
-import simpleaudio as sa
-import sounddevice as sd
-import librosa, tensorflow_hub as hub
-from tensorflow.keras.models import load_model
 import warnings, logging
 
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
+import devices   # before bed_control: picks the servo backend for the device mode
 import bed_control
-
-# --- I2C setup & ADXL345 init (drop this before using the accelerometer) ---
-import time, board, busio
-import adafruit_adxl34x
-
-# Slower clock is safest for mixed devices
-i2c = busio.I2C(board.SCL, board.SDA, frequency=100_000)
-
-# Optional: prove bus is free and the device is visible
-print("🔎 Locking I2C and scanning...")
-while not i2c.try_lock():
-    time.sleep(0.01)
-try:
-    addrs = i2c.scan()
-    print("🚌 I2C scan:", [hex(a) for a in addrs])  # should include 0x53
-finally:
-    i2c.unlock()
-
-# A short settle delay helps on some breakouts after power-up
-time.sleep(0.05)
-
-# Force the correct address you saw in i2cdetect
-# (SDO tied to VCC -> 0x53; if SDO to GND it would be 0x1D)
-ACCEL_ADDR = 0x53
-
-# Robust init with one retry in case of a first-write hiccup
-for attempt in range(2):
-    try:
-        accelerometer = adafruit_adxl34x.ADXL345(i2c, address=ACCEL_ADDR)
-        print("✅ ADXL345 ready @ 0x%02X" % ACCEL_ADDR)
-        break
-    except Exception as e:
-        print(f"⚠️ ADXL345 init failed (attempt {attempt+1}): {e}")
-        time.sleep(0.1)
-else:
-    accelerometer = None
-    print("❌ ADXL345 not available; continuing without it.")
-
-# Later, when reading:
-if accelerometer:
-    x, y, z = accelerometer.acceleration  # m/s^2
-else:
-    x, y, z = (0.0, 0.0, 0.0)             # fallback so the app doesn't crash
+from roi_tracker import RoiTracker
+from vision_worker import VisionWorker
+from clip_recorder import ClipRecorder, VitalsClipWatch
+from photo_index import PhotoIndex
+from audio_gate import CryGate
+from talk_stream import TalkSession
+from cry_fusion import CryFusion
+import audio_models
+from cry_reason import CryReasonClassifier, ClassificationQueue, QueueFull
+import aiofiles
+import metrics
+import tracing
+from startup import StartupManager
+
+# --- Devices: real hardware or simulation, one switch (BABY_DEVICES=real|sim|auto) ---
+# See devices.py; with "sim" the whole server runs on any Linux host.
+print(f"🔌 Device mode: {devices.registry.mode}")
+
+# --- Staged startup: device inits and model loads run in parallel once the
+# web server is up (see startup.py); /health and /ready report progress ---
+startup = StartupManager()
 
 # ======================================================
 # ----------------- INITIAL SETUP ----------------------
@@ -102,7 +77,11 @@ app = FastAPI()
 sio_app = socketio.ASGIApp(sio, app)
 executor = ThreadPoolExecutor(max_workers=4)
 
-CAPTURE_DIR = "/home/baby5/yolo/baby_images"
+# models, captures, clips and thumbnails all live under one base directory;
+# BABY_BASE_DIR moves it (e.g. for sim mode on a host without /home/baby5)
+BASE_DIR = os.environ.get("BABY_BASE_DIR", "/home/baby5/yolo")
+
+CAPTURE_DIR = os.path.join(BASE_DIR, "baby_images")
 os.makedirs(CAPTURE_DIR, exist_ok=True)
 
 app.add_middleware(
@@ -110,130 +89,125 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],   # paginated listings; the gallery runs on another origin
 )
-app.mount("/baby_images", StaticFiles(directory=CAPTURE_DIR), name="baby_images")
+
+# Captures never change once written (unique names), so let browsers keep them.
+PHOTO_CACHE_CONTROL = "public, max-age=86400"
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles (already sends ETag/Last-Modified) plus a Cache-Control header."""
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = PHOTO_CACHE_CONTROL
+        return response
+
+app.mount("/baby_images", CachedStaticFiles(directory=CAPTURE_DIR), name="baby_images")
+
+# In-memory photo index + lazily generated, disk-cached thumbnails
+THUMB_DIR = os.path.join(BASE_DIR, "baby_thumbs")
+photo_index = PhotoIndex(CAPTURE_DIR, THUMB_DIR)
+photo_index.start()
+
+# --- Event clips: rolling pre-event JPEG ring + next few seconds on cry/vitals alerts ---
+CLIP_DIR = os.path.join(BASE_DIR, "baby_clips")
+CLIP_PRE_SECONDS = 10.0
+CLIP_POST_SECONDS = 10.0
+CLIP_MAX_RING_BYTES = 32 * 1024 * 1024   # hard cap on the in-memory ring
+clip_recorder = ClipRecorder(CLIP_DIR, pre_seconds=CLIP_PRE_SECONDS,
+                             post_seconds=CLIP_POST_SECONDS, max_bytes=CLIP_MAX_RING_BYTES)
+# same index as the captures, fed by the recorder as each clip is finished
+clip_index = PhotoIndex(CLIP_DIR, os.path.join(THUMB_DIR, "clips"),
+                        exts=(ClipRecorder.CLIP_EXT,), label="clips")
+clip_index.start()
+clip_recorder.on_saved = clip_index.add
+app.mount("/baby_clips", StaticFiles(directory=CLIP_DIR), name="baby_clips")
 
 # ======================================================
 # ----------------- SOUND SETUP ------------------------
 # ======================================================
-HEARTBEAT_SOUND = "/home/baby5/yolo/heartbeat.mp3"
-pygame.mixer.init()
-pygame.mixer.music.load(HEARTBEAT_SOUND)
+HEARTBEAT_SOUND = os.path.join(BASE_DIR, "heartbeat.mp3")
+HEARTBEAT_FADE_IN = 1.5      # seconds
+HEARTBEAT_FADE_OUT = 3.0
+
+# one long-lived output for soothing sounds + parent voice (see audio_output.py)
+audio_out = None
+
+def init_audio_out():
+    global audio_out
+    mixer = devices.registry.get("audio_out", samplerate=44100, channels=2)
+    mixer.load_sound("heartbeat", HEARTBEAT_SOUND)
+    mixer.start()
+    audio_out = mixer
 
-is_playing = False
-last_cry_time = 0
-CRY_DELAY = 5.0
+startup.add("audio_out", init_audio_out)
 
 # ======================================================
 # ----------------- CAMERA SETUP -----------------------
 # ======================================================
-print("🎥 Initializing camera at /dev/video0 ...")
-camera = cv2.VideoCapture("/dev/video0", cv2.CAP_V4L2)
-camera.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
-camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-time.sleep(1)
-ret, frame = camera.read()
-if ret:
-    print("✅ Camera test frame captured successfully — LED ON.")
-else:
-    print("⚠️ Failed to capture frame from /dev/video0.")
-if not camera.isOpened():
-    raise RuntimeError("❌ Camera failed to initialize — check connection or permissions.")
+camera = None   # /dev/video0, or a video file in sim mode
+
+def init_camera():
+    global camera
+    camera = devices.registry.get("camera")
+
+startup.add("camera", init_camera)
 
 # ======================================================
 # ----------------- AUDIO MODEL SETUP ------------------
 # ======================================================
 
+# "tflite" runs the exported models (see tflite_export.py) without importing TensorFlow:
+# YAMNet, the cry detector and the cry-reason CNN all switch together
+AUDIO_BACKEND = "keras"
+TFLITE_DIR = os.path.join(BASE_DIR, "models", "tflite")
+
+CRY_SAVE_DIR = os.path.join(BASE_DIR, "cry_uploads")
+if AUDIO_BACKEND == "tflite":
+    CRY_REASON_MODEL = os.path.join(TFLITE_DIR, "custom_cnn.tflite")
+else:
+    CRY_REASON_MODEL = os.path.join(BASE_DIR, "custom_cnn.h5")
+cry_reason_classifier = CryReasonClassifier(CRY_REASON_MODEL)
+# off-loop, micro-batched classification; uploads beyond max_pending are rejected
+cry_queue = ClassificationQueue(cry_reason_classifier, max_pending=8, max_batch=4)
+
+CRY_ARCHIVE_UPLOADS = True   # keep a copy of each upload (e.g. for a representative dataset)
+
+async def archive_cry_upload(audio_bytes):
+    try:
+        os.makedirs(CRY_SAVE_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        saved_path = os.path.join(CRY_SAVE_DIR, f"cry_{stamp}_{uuid.uuid4().hex[:8]}.wav")
+        async with aiofiles.open(saved_path, "wb") as f:
+            await f.write(audio_bytes)
+        print(f"✅ Archived uploaded cry audio to {saved_path}")
+    except Exception as e:
+        print("⚠️ Cry upload archive failed:", e)
+
 @sio.on("cry_file")
 async def handle_cry_file(sid, data):
-    import base64, aiofiles, numpy as np, soundfile as sf, os, librosa
-    from tensorflow.keras.models import load_model
-    from PIL import Image
-
     try:
         print("📩 Received audio file for cry classification...")
 
         # Decode base64 to bytes
         audio_bytes = base64.b64decode(data["base64"])
 
-        # --- Step 1: Save permanently as cry_upload.wav ---
-        SAVE_DIR = "/home/baby5/yolo/cry_uploads"
-        os.makedirs(SAVE_DIR, exist_ok=True)
-        filename = "cry_upload.wav"
-        saved_path = os.path.join(SAVE_DIR, filename)
-
-        async with aiofiles.open(saved_path, "wb") as f:
-            await f.write(audio_bytes)
+        # --- Step 1: Optionally archive the upload (unique name, in the background) ---
+        if CRY_ARCHIVE_UPLOADS:
+            asyncio.create_task(archive_cry_upload(audio_bytes))
 
-        print(f"✅ Saved uploaded cry audio to {saved_path}")
-
-        # --- Step 2: Load trained CNN model ---
-        model_path = os.path.join(SAVE_DIR, "..", "custom_cnn.h5")
-        model = load_model(model_path)
-
-        # Define your class names (must match your training)
-        class_names = ['belly_pain', 'burping', 'discomfort', 'hungry', 'tired']
-
-        # --- Step 3: Config for mel-spectrogram preprocessing ---
-        class conf:
-            sampling_rate = 16000
-            duration = 7
-            hop_length = 100 * duration
-            fmin = 20
-            fmax = sampling_rate // 2
-            n_mels = 128
-            n_fft = n_mels * 20
-            samples = sampling_rate * duration
-
-        def read_audio(path, conf):
-            y, sr = librosa.load(path, sr=conf.sampling_rate)
-            if len(y) > conf.samples:
-                y = y[:conf.samples]
-            else:
-                y = np.pad(y, (0, conf.samples - len(y)), mode='constant')
-            return y
-
-        def audio_to_melspectrogram(conf, audio):
-            mels = librosa.feature.melspectrogram(
-                y=audio,
-                sr=conf.sampling_rate,
-                n_mels=conf.n_mels,
-                hop_length=conf.hop_length,
-                n_fft=conf.n_fft,
-                fmin=conf.fmin,
-                fmax=conf.fmax,
-            )
-            mels = librosa.power_to_db(mels)
-            return mels.astype(np.float32)
-
-        def mono_to_color(X, eps=1e-6):
-            X = np.stack([X, X, X], axis=-1)
-            mean = X.mean()
-            std = X.std()
-            Xstd = (X - mean) / (std + eps)
-            _min, _max = Xstd.min(), Xstd.max()
-            V = 255 * (Xstd - _min) / (_max - _min)
-            return V.astype(np.uint8)
-
-        # --- Step 4: Preprocess the uploaded file ---
-        img_size = (128, 128)
-        y = read_audio(saved_path, conf)
-        mels = audio_to_melspectrogram(conf, y)
-        img = mono_to_color(mels)
-        img = np.array(Image.fromarray(img).resize(img_size))
-        img = img / 255.0
-        img = np.expand_dims(img, axis=0)
-
-        # --- Step 5: Predict reason for cry ---
-        pred = model.predict(img)
-        pred_class = np.argmax(pred, axis=1)[0]
-        #confidence = float(np.max(pred))
-        predicted_label = class_names[pred_class]
+        # --- Step 2: Decode in memory + predict on the classification worker (see cry_reason.py) ---
+        try:
+            fut = cry_queue.submit(lambda: cry_reason_classifier.decode_audio(audio_bytes))
+        except QueueFull as e:
+            print("⚠️ Cry classification rejected:", e)
+            await sio.emit("cry_result", {"error": "Classifier busy, please try again"}, to=sid)
+            return
+        predicted_label, scores = await asyncio.wrap_future(fut)
 
         print(f"🧠 Predicted reason: {predicted_label}")
 
-        # --- Step 6: Send result to web UI ---
+        # --- Step 3: Send result to web UI ---
         await sio.emit(
             "cry_result",
             {
@@ -253,81 +227,241 @@ async def handle_cry_file(sid, data):
 # ======================================================
 # ----------------- YOLO MODEL SETUP -------------------
 # ======================================================
-print("🧠 Loading YOLO model...")
-yolo_model = YOLO("/home/baby5/yolo/best2.pt")
-yolo_labels = yolo_model.names
-print(f"✅ YOLO model ready with classes: {yolo_labels}")
+YOLO_MODEL_PATH = os.path.join(BASE_DIR, "best2.pt")
+VISION_WORKER_ENABLED = True   # run YOLO in a separate process (see vision_worker.py)
+VISION_TORCH_THREADS = 2       # intra-op threads for the worker's PyTorch
+
+vision_worker = None
+yolo_model = None
+yolo_labels = {}
+if VISION_WORKER_ENABLED:
+    # start it first so the model loads in the worker
+    # while the rest of the boot carries on (the "vision" stage waits for it)
+    print("🧠 Starting YOLO vision worker process...")
+    vision_worker = VisionWorker(YOLO_MODEL_PATH, torch_threads=VISION_TORCH_THREADS)
+    vision_worker.start(wait=False)
+
+def init_vision():
+    global yolo_model, yolo_labels
+    if vision_worker is not None:
+        vision_worker.wait_ready()
+        yolo_labels = vision_worker.labels
+    else:
+        from ultralytics import YOLO
+        print("🧠 Loading YOLO model...")
+        yolo_model = YOLO(YOLO_MODEL_PATH)
+        yolo_labels = yolo_model.names
+        print(f"✅ YOLO model ready with classes: {yolo_labels}")
+
+startup.add("vision", init_vision)
+
+# --- ROI mode: run YOLO on a crop around the last detection ---
+YOLO_ROI_ENABLED = True
+YOLO_FULL_FRAME_EVERY = 6      # force a full-frame pass every N inferences
+roi_tracker = RoiTracker(frame_w=640, frame_h=480, full_frame_every=YOLO_FULL_FRAME_EVERY)
+last_detections = []           # latest YOLO boxes, full-frame coordinates
+
+def run_yolo(frame):
+    """Run YOLO (on the ROI crop if enabled); returns (full-frame detections, offset, is_full)."""
+    if YOLO_ROI_ENABLED:
+        image, offset, is_full = roi_tracker.crop(frame)
+    else:
+        image, offset, is_full = frame, (0, 0), True
+
+    # smaller input -> smaller letterbox -> lower latency (multiple of 32 for YOLO)
+    imgsz = min(640, int(np.ceil(max(image.shape[:2]) / 32.0) * 32))
+    if vision_worker is not None:
+        detections = vision_worker.infer(np.ascontiguousarray(image), imgsz=imgsz)
+    else:
+        results = yolo_model.predict(image, imgsz=imgsz, device="cpu", verbose=False)
+        detections = [
+            {
+                "label": yolo_labels[int(box.cls[0])],
+                "conf": float(box.conf[0]),
+                "xyxy": tuple(float(v) for v in box.xyxy[0]),
+            }
+            for box in results[0].boxes
+        ]
+    if YOLO_ROI_ENABLED:
+        detections = roi_tracker.update(detections, offset, is_full)
+    return detections, offset, is_full
 
 # ======================================================
 # ----------------- AUTO CAMERA + AUDIO INFERENCE -------
 # ======================================================
-import sounddevice as sd
-import librosa, tensorflow_hub as hub
-from tensorflow.keras.models import load_model
 
 # --- Audio Model Setup ---
 SAMPLE_RATE = 16000
 DURATION = 5.0
 THRESHOLD = 0.6
 PRINT_INTERVAL = 3
-CRY_DELAY = 5.0
-
-mic_detected = False
-camera_detected = False
-last_cry_time = 0
-is_playing = False
-
-print("🎧 Loading YAMNet feature extractor + baby cry classifier...")
-yamnet_model = hub.load("https://tfhub.dev/google/yamnet/1")
-cry_classifier = load_model("/home/baby5/yolo/baby_cry_detector.h5")
-print("✅ Audio models loaded successfully.")
+CRY_DELAY = 5.0              # calm period before soothing stops (fusion hysteresis)
+MIC_HOP_SECONDS = 1.0        # run inference on a fresh DURATION-long window every hop
+MIC_SMOOTH_WINDOWS = 3       # moving average over the last N window probabilities
+
+mic_confidence = 0.0
+mic_stream = None   # opened and started on the "mic" startup stage
+cry_gate = CryGate(samplerate=SAMPLE_RATE)   # energy/flatness/band pre-check before YAMNet
+
+YAMNET_LOCAL_PATH = os.path.join(BASE_DIR, "models", "yamnet")   # vendored SavedModel (offline boot)
+CRY_DETECTOR_PATH = os.path.join(BASE_DIR, "baby_cry_detector.h5")
+
+if AUDIO_BACKEND == "tflite":
+    CRY_DETECTOR_PATH = os.path.join(TFLITE_DIR, "baby_cry_detector.tflite")
+
+# YAMNet, the cry detector and the cry-reason CNN load on parallel startup stages
+yamnet_model = None
+cry_classifier = None
+
+def init_yamnet():
+    global yamnet_model
+    if AUDIO_BACKEND == "tflite":
+        loader = lambda: audio_models.load_tflite_yamnet(os.path.join(TFLITE_DIR, "yamnet.tflite"))
+    else:
+        loader = lambda: audio_models.load_yamnet(YAMNET_LOCAL_PATH)
+    yamnet_model = audio_models.registry.load(
+        "yamnet", loader, warmup=audio_models.warmup_yamnet(SAMPLE_RATE, DURATION))
+
+def init_cry_detector():
+    global cry_classifier
+    cry_classifier = audio_models.registry.load(
+        "cry_detector",
+        lambda: audio_models.load_classifier(CRY_DETECTOR_PATH),
+        warmup=audio_models.warmup_keras((1024,)),   # YAMNet embedding size
+    )
+
+startup.add("yamnet", init_yamnet)
+startup.add("cry_detector", init_cry_detector)
+# only needed for parent uploads (it loads lazily otherwise), so not required for /ready
+startup.add("cry_reason", cry_reason_classifier.model, required=False)
+
+YAMNET_SECONDS = metrics.registry.histogram("yamnet_seconds", "YAMNet latency per 5 s window")
+CRY_DETECTOR_SECONDS = metrics.registry.histogram("cry_detector_seconds", "Cry classifier latency on YAMNet embeddings")
 
 def predict_audio(audio_data):
     """Return crying probability from audio clip"""
     if len(audio_data.shape) > 1:
         audio_data = np.mean(audio_data, axis=1)  # convert to mono
     if audio_data.shape[0] != int(SAMPLE_RATE * DURATION):
+        import librosa
         audio_data = librosa.resample(
             audio_data, orig_sr=int(len(audio_data)/DURATION), target_sr=SAMPLE_RATE
         )
-    _, embeddings, _ = yamnet_model(audio_data)
-    emb_mean = np.mean(embeddings.numpy(), axis=0).reshape(1, -1)
-    prob = cry_classifier.predict(emb_mean, verbose=0)[0][0]
+    with YAMNET_SECONDS.time(), tracing.span("yamnet", "model"):
+        _, embeddings, _ = yamnet_model(audio_data)
+    emb_mean = np.mean(np.asarray(embeddings), axis=0).reshape(1, -1)
+    with CRY_DETECTOR_SECONDS.time(), tracing.span("cry_detector", "model"):
+        prob = cry_classifier.predict(emb_mean, verbose=0)[0][0]
     return prob
 
 def run_audio_detector():
-    """Continuously analyze microphone input and update mic_detected"""
-    global mic_detected, last_cry_time
+    """
+    Continuously analyze microphone input and feed its cry probability into cry_fusion.
+    The mic stream never stops: its callback fills a ring buffer while we run
+    inference on overlapping DURATION-second windows every MIC_HOP_SECONDS.
+    """
+    global mic_confidence
     print("🎙️ Audio detection thread started.")
+
+    window = int(SAMPLE_RATE * DURATION)
+    recent = collections.deque(maxlen=MIC_SMOOTH_WINDOWS)
+    last_print = 0
+    detected = False
+    mic_stream.wait_for(window)
+
+    next_hop = time.monotonic()
     while True:
         try:
-            audio = sd.rec(int(SAMPLE_RATE * DURATION),
-                           samplerate=SAMPLE_RATE, channels=1, dtype='float32')
-            sd.wait()
-            prob = predict_audio(audio)
-            mic_detected = prob > THRESHOLD
-            if mic_detected:
-                last_cry_time = time.time()
-                print(f"🍼 Mic: Cry Detected (conf={prob:.2f})")
+            audio = mic_stream.ring.latest(window)
+            with tracing.span("mic.gate", "audio"):
+                passed = cry_gate.check(audio)
+            if passed:
+                recent.append(float(predict_audio(audio)))
             else:
-                print(f"😴 Mic: Not Crying (conf={prob:.2f})")
+                recent.append(0.0)   # quiet / non-tonal window: no model run
+            prob = sum(recent) / len(recent)
+            was_detected = detected
+            mic_confidence = prob
+            cry_fusion.observe("mic", prob)
+            detected = prob > THRESHOLD
+
+            now = time.time()
+            if detected != was_detected or now - last_print > PRINT_INTERVAL:
+                last_print = now
+                if detected:
+                    print(f"🍼 Mic: Cry Detected (conf={prob:.2f})")
+                else:
+                    print(f"😴 Mic: Not Crying (conf={prob:.2f})")
         except Exception as e:
             print("⚠️ Mic error:", e)
-        time.sleep(PRINT_INTERVAL)
 
-# Start mic detector in background
-threading.Thread(target=run_audio_detector, daemon=True).start()
+        # fixed hop on a monotonic clock; if inference ran long, skip ahead
+        next_hop += MIC_HOP_SECONDS
+        delay = next_hop - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_hop = time.monotonic()
+
+# --- Combined camera + mic fusion (see cry_fusion.py) ---
+# Both detectors push timestamped scores; soothing starts/stops on each new
+# observation instead of waiting for the YOLO loop to poll boolean flags.
+# soothing needs each detector over its own threshold too, not just a high combined score
+cry_fusion = CryFusion(source_thresholds={"camera": 0.5, "mic": THRESHOLD},
+                       on_threshold=0.6, calm_s=CRY_DELAY)
+
+def _on_cry_start(intensity):
+    print(f"🍼 Camera+mic crying (p={cry_fusion.posterior:.2f}) → Playing heartbeat sound...")
+    if audio_out is not None:
+        audio_out.play("heartbeat", loop=True, fade=HEARTBEAT_FADE_IN)
+    clip_recorder.trigger("cry")
+    emit_from_thread(ui_set_intensity(intensity))
+    emit_from_thread(ui_alert_warning("Crying detected — soothing heartbeat started (camera+mic)."))
+
+def _on_cry_stop():
+    print("🙂 Baby calm — stopping heartbeat.")
+    if audio_out is not None:
+        audio_out.stop("heartbeat", fade=HEARTBEAT_FADE_OUT)
+    emit_from_thread(ui_set_intensity(0))
+    emit_from_thread(ui_alert_info("Baby calm — heartbeat stopped."))
+
+def _on_cry_intensity(intensity):
+    emit_from_thread(ui_set_intensity(intensity))
+
+cry_fusion.on_start = _on_cry_start
+cry_fusion.on_stop = _on_cry_stop
+cry_fusion.on_intensity = _on_cry_intensity
+
+def init_mic():
+    global mic_stream
+    stream = devices.registry.get("mic", samplerate=SAMPLE_RATE, ring_seconds=DURATION * 3)
+    stream.start()
+    # a stream that opens but never delivers audio fails the stage instead of a silent detector
+    if not stream.wait_for(stream.blocksize, timeout=3.0):
+        stream.stop()
+        raise RuntimeError("microphone delivered no audio")
+    mic_stream = stream
+
+startup.add("mic", init_mic)
+# mic detector runs once the mic is capturing and both audio models are loaded
+startup.add(
+    "mic_detector",
+    lambda: threading.Thread(target=run_audio_detector, daemon=True).start(),
+    deps=("mic", "yamnet", "cry_detector"),
+)
+
+YOLO_SECONDS = metrics.registry.histogram("yolo_inference_seconds", "YOLO inference latency (incl. worker IPC)")
 
-# --- Combined camera + mic inference ---
 def camera_yolo_loop():
-    """Continuously run YOLO detection; play sound only if both camera+mic detect crying."""
-    global camera_detected, mic_detected, is_playing, last_cry_time
+    """Continuously run YOLO detection and feed its cry confidence into cry_fusion."""
+    global last_detections
 
     print("🎬 Starting combined camera+mic monitoring loop...")
     last_yolo_time = 0
 
     while True:
-        ret, frame = camera.read()
+        with tracing.span("camera.read", "camera"):
+            ret, frame = camera.read()
         if not ret or frame is None:
             print("⚠️ Failed to grab frame.")
             time.sleep(1)
@@ -339,50 +473,22 @@ def camera_yolo_loop():
             try:
                 print("🔍 [YOLO] Running inference...")
                 start = time.time()
-                results = yolo_model.predict(frame, device="cpu", verbose=False)
+                with tracing.span("yolo.infer", "vision"):
+                    detections, offset, is_full = run_yolo(frame)
+                last_detections = detections
                 duration = time.time() - start
-                print(f"✅ [YOLO] Inference done in {duration:.2f}s")
+                YOLO_SECONDS.observe(duration)
+                mode = "full" if is_full else f"roi@{offset}"
+                print(f"✅ [YOLO] Inference done in {duration:.2f}s ({mode})")
 
                 camera_detected = any(
-                    "cry" in yolo_labels[int(box.cls[0])].lower()
-                    and float(box.conf[0]) > 0.5
-                    for box in results[0].boxes
+                    "cry" in d["label"].lower() and d["conf"] > 0.5
+                    for d in detections
                 )
-                print(f"🧠 Camera detected cry: {camera_detected}")
-
-                # --- Combined logic ---
-                both_detect = camera_detected and mic_detected
-                now = time.time()
-
-                if both_detect:
-                    if not is_playing:
-                        print("🍼 BOTH camera+mic crying → Playing heartbeat sound...")
-                        pygame.mixer.music.play(loops=-1)
-                        is_playing = True
-                        last_cry_time = now
-
-                        # NEW emits
-                        try:
-                            camc = camera_confidence if 'camera_confidence' in locals() else 0.8
-                            micc = mic_confidence   if 'mic_confidence'   in locals() else 0.8
-                        except Exception:
-                            camc, micc = 0.8, 0.8
-
-                        intensity_val = int(min(99, max(0, round(camc * 50 + micc * 50))))
-                        # NEW (thread-safe)
-                        emit_from_thread(ui_set_intensity(intensity_val))
-                        emit_from_thread(ui_alert_warning("Crying detected — soothing heartbeat started (camera+mic)."))
-
-
-                else:
-                    # Only stop after a calm window
-                    if is_playing and (now - last_cry_time) > CRY_DELAY:
-                        print("🙂 Baby calm — stopping heartbeat.")
-                        pygame.mixer.music.stop()
-                        is_playing = False
-                        # NEW emits
-                        emit_from_thread(ui_set_intensity(0))
-                        emit_from_thread(ui_alert_info("Baby calm — heartbeat stopped."))
+                camera_confidence = max(
+                    [d["conf"] for d in detections if "cry" in d["label"].lower()], default=0.0)
+                print(f"🧠 Camera detected cry: {camera_detected} (conf={camera_confidence:.2f})")
+                cry_fusion.observe("camera", camera_confidence)
 
             except Exception as e:
                 print("⚠️ YOLO error:", e)
@@ -392,120 +498,310 @@ def camera_yolo_loop():
 # ======================================================
 # ---------------- TALK TO BABY (from UI) --------------
 # ======================================================
-import tempfile, subprocess, time, os, base64
+talk_sessions = {}   # sid -> TalkSession (streaming ffmpeg -> mixer voice, see talk_stream.py)
 
-current_audio = bytearray()
-is_listening = False
 @sio.on("talk_start")
 async def handle_talk_start(sid):
-    global current_audio, is_listening
-    current_audio = bytearray()
-    is_listening = True
-    print("🎙️ Parent started talking...")
+    old = talk_sessions.pop(sid, None)
+    if old:
+        old.finish()
+    # registered before start(): chunks that arrive meanwhile queue up in the session
+    session = TalkSession(sid, mixer=audio_out)
+    talk_sessions[sid] = session
+    try:
+        await asyncio.get_running_loop().run_in_executor(executor, session.start)
+        print("🎙️ Parent started talking...")
+    except Exception as e:
+        if talk_sessions.get(sid) is session:
+            talk_sessions.pop(sid)
+        print("❌ Error starting talk stream:", e)
 
 @sio.on("talk_chunk")
 async def handle_talk_chunk(sid, data):
-    global current_audio
-    if not is_listening:
+    session = talk_sessions.get(sid)
+    if session is None:
         return
     try:
         chunk = base64.b64decode(data.get("audio", ""))
-        current_audio.extend(chunk)
+        session.feed(chunk)
     except Exception as e:
         print("⚠️ talk_chunk decode error:", e)
 
 @sio.on("talk_stop")
 async def handle_talk_stop(sid):
-    global current_audio, is_listening
-    is_listening = False
-    print("🔇 talk_stop received — converting and playing audio...")
-
+    session = talk_sessions.pop(sid, None)
+    print("🔇 talk_stop received — draining stream...")
+    if session:
+        session.finish()
+
+# --- Capture writing: off the event loop, de-duplicated by content hash ---
+import hashlib
+from collections import OrderedDict
+
+writer_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="capture-writer")
+_capture_hashes = OrderedDict()   # sha1 -> filename, most recent last
+_capture_pending = {}             # sha1 -> Future(filename or None) while its write is in flight
+_capture_lock = asyncio.Lock()
+CAPTURE_HASH_MEMORY = 256
+
+# newest frame from camera_frame_stream_loop (raw BGR + the JPEG we streamed)
+latest_frame_lock = threading.Lock()
+latest_frame = None
+latest_jpeg = None
+
+def _write_file(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+async def save_capture(img_bytes, photo_id="capture", ext=".jpg"):
+    """Write a capture via the writer pool; returns (filename, duplicate)."""
+    digest = hashlib.sha1(img_bytes).hexdigest()
+    # dedup check + name reservation under the lock; the write itself happens outside it,
+    # and an identical capture arriving meanwhile waits for this write instead of repeating it
+    async with _capture_lock:
+        pending = _capture_pending.get(digest)
+        if pending is None:
+            existing = _capture_hashes.get(digest)
+            if existing and photo_index.mtime(existing) is not None:
+                _capture_hashes.move_to_end(digest)
+                return existing, True
+
+            # unique suffix: several captures can land in the same second
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"{photo_id}_{timestamp}_{uuid.uuid4().hex[:8]}{ext}"
+            reservation = asyncio.get_running_loop().create_future()
+            _capture_pending[digest] = reservation
+
+    if pending is not None:
+        existing = await asyncio.shield(pending)
+        if existing is None:
+            raise RuntimeError("identical capture failed to save")
+        return existing, True
+
+    filepath = os.path.join(CAPTURE_DIR, filename)
     try:
-        import tempfile, subprocess, time
-        with tempfile.NamedTemporaryFile(suffix=".m4a", delete=False) as f:
-            f.write(current_audio)
-            temp_path = f.name
-        print(f"💾 Saved {len(current_audio)} bytes to {temp_path}")
-
-        wav_path = f"/tmp/parent_talk_{int(time.time())}.wav"
-        conv = subprocess.run(
-            ["ffmpeg", "-y", "-i", temp_path, "-ar", "44100", "-ac", "2", wav_path],
-            capture_output=True, text=True
-        )
-        if conv.returncode == 0:
-            print("✅ Converted successfully:", wav_path)
-            subprocess.run(["aplay", "-q", wav_path])
-        else:
-            print("❌ FFmpeg error:", conv.stderr)
-    except Exception as e:
-        print("❌ Error during talk_stop:", e)
-
-import os
-from datetime import datetime
+        await asyncio.get_running_loop().run_in_executor(writer_pool, _write_file, filepath, img_bytes)
+        photo_index.add(filename)
+        _capture_hashes[digest] = filename
+        while len(_capture_hashes) > CAPTURE_HASH_MEMORY:
+            _capture_hashes.popitem(last=False)
+    except Exception:
+        filename = None
+        raise
+    finally:
+        del _capture_pending[digest]
+        reservation.set_result(filename)
+    print(f"✅ Saved image: {filepath}")
+    return filename, False
+
+async def emit_capture_saved(sid, filename, duplicate):
+    await sio.emit("capture_saved", {
+        "status": "success",
+        "url": f"/baby_images/{filename}",
+        "timestamp": time.time(),
+        "id": filename,
+        "duplicate": duplicate,
+    }, to=sid)
 
 # New event to handle frame capture
 @sio.on('capture_frame')
 async def handle_capture_frame(sid, data):
-    import base64
-    from datetime import datetime
-
-    os.makedirs(CAPTURE_DIR, exist_ok=True)
-
     photo_id = data.get("photoId", "capture")
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     live_image = data.get("liveImage", "")
 
     try:
         img_data = live_image.replace("data:image/jpeg;base64,", "")
         img_bytes = base64.b64decode(img_data)
-        filename = f"{photo_id}_{timestamp}.jpg"
-        filepath = os.path.join(CAPTURE_DIR, filename)
-        with open(filepath, "wb") as f:
-            f.write(img_bytes)
-
-        public_url = f"/baby_images/{filename}"
-        print(f"✅ Saved image: {filepath}")
-
-        await sio.emit("capture_saved", {
-            "status": "success",
-            "url": public_url,
-            "timestamp": time.time(),
-            "id": filename,
-        }, to=sid)
+        filename, duplicate = await save_capture(img_bytes, photo_id)
+        await emit_capture_saved(sid, filename, duplicate)
 
     except Exception as e:
         print("❌ Error saving capture:", e)
         await sio.emit("capture_saved", {"status": "error", "message": str(e)}, to=sid)
 
-import os
-from datetime import datetime
+@sio.on('capture_snapshot')
+async def handle_capture_snapshot(sid, data=None):
+    """
+    Server-side capture: save the newest frame from our own camera buffer
+    instead of having the browser upload it back.
+    data sample: { "photoId": str, "fullQuality": bool }
+    Without fullQuality the already-encoded stream JPEG is saved as-is.
+    fullQuality saves the same decoded frame losslessly as PNG instead: the
+    UVC camera runs at the 640x480 stream mode, and grabbing a still at the
+    sensor's full resolution would mean switching V4L2 modes under the live
+    stream, so the best we can do is skip the extra JPEG generation (the stream
+    is already encoded at OpenCV's default quality 95).
+    """
+    data = data or {}
+    photo_id = data.get("photoId", "capture")
+
+    try:
+        with latest_frame_lock:
+            frame, jpeg = latest_frame, latest_jpeg
+        if frame is None:
+            raise RuntimeError("no camera frame available yet")
+
+        if data.get("fullQuality"):
+            def _encode():
+                ok, buf = cv2.imencode(".png", frame, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+                if not ok:
+                    raise RuntimeError("PNG encode failed")
+                return buf.tobytes()
+            png = await asyncio.get_running_loop().run_in_executor(writer_pool, _encode)
+            filename, duplicate = await save_capture(png, photo_id, ext=".png")
+        else:
+            filename, duplicate = await save_capture(jpeg, photo_id)
+        await emit_capture_saved(sid, filename, duplicate)
+
+    except Exception as e:
+        print("❌ Error capturing snapshot:", e)
+        await sio.emit("capture_saved", {"status": "error", "message": str(e)}, to=sid)
 
 # Capture and Save Images 
 @app.get("/api/photos")
-async def list_photos():
+async def list_photos(response: Response, limit: int | None = None, cursor: str | None = None,
+                      since: float | None = None, until: float | None = None):
+    """
+    Newest-first listing from the in-memory index.
+    Optional: ?limit=N&cursor=... for pagination (next cursor in the X-Next-Cursor
+    header) and ?since=/&until= unix timestamps for date filtering.
+    """
     try:
-        files = [
-            f for f in os.listdir(CAPTURE_DIR)
-            if f.lower().endswith((".jpg", ".jpeg", ".png"))
-        ]
-        files.sort(key=lambda fn: os.path.getmtime(os.path.join(CAPTURE_DIR, fn)), reverse=True)
+        entries, next_cursor = photo_index.page(limit=limit, cursor=cursor, since=since, until=until)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
 
         photo_list = []
-        for fn in files:
-            full_path = os.path.join(CAPTURE_DIR, fn)
-            timestamp = os.path.getmtime(full_path)
+        for timestamp, fn in entries:
             photo_list.append({
                 "id": fn,
                 "url": f"/baby_images/{fn}",
+                "thumbnail": f"/api/photos/{fn}/thumb",
                 "timestamp": timestamp,
                 "description": "Live baby capture",
                 "tags": ["baby", "monitoring", "capture"]
             })
         return photo_list
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"bad cursor: {e}")
     except Exception as e:
         print("❌ Error listing photos:", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/photos/{photo_id}/thumb")
+async def photo_thumbnail(photo_id: str, request: Request):
+    mtime = photo_index.mtime(photo_id)
+    if mtime is None:
+        raise HTTPException(status_code=404, detail="photo not found")
+
+    etag = f'"{int(mtime * 1000)}-{photo_index.thumb_width}"'
+    headers = {"ETag": etag, "Cache-Control": PHOTO_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    try:
+        path = await asyncio.get_running_loop().run_in_executor(executor, photo_index.thumbnail, photo_id)
+    except Exception as e:
+        print("❌ Error creating thumbnail:", e)
+        raise HTTPException(status_code=500, detail=str(e))
+    return FileResponse(path, media_type="image/jpeg", headers=headers)
+
+
+@app.get("/api/audio/gate")
+async def audio_gate_stats():
+    """How many mic windows the pre-stage skipped vs. sent to YAMNet."""
+    return cry_gate.stats()
+
+@app.get("/api/bed/motion_stats")
+async def bed_motion_stats():
+    """Tick count, skipped samples and timing jitter of the bed trajectory runner."""
+    return bed_control.get_motion_stats()
+
+@app.get("/api/cry_queue")
+async def cry_queue_stats():
+    """Queue depth, batching and latency of the cry-reason classifier."""
+    return cry_queue.stats()
+
+# counters other objects already keep, read when /metrics is scraped
+metrics.registry.counter_func("mic_overflows_total", "Mic input overflows (samples dropped)",
+                              fn=lambda: mic_stream.overflows if mic_stream else 0)
+metrics.registry.counter_func("audio_underflows_total", "Audio output underflows",
+                              fn=lambda: audio_out.underflows if audio_out else 0)
+metrics.registry.counter_func("bed_ticks_skipped_total", "Bed trajectory samples skipped (late ticks)",
+                              fn=lambda: bed_control.runner.stats.skipped)
+metrics.registry.counter_func("bed_ticks_total", "Bed trajectory samples written",
+                              fn=lambda: bed_control.runner.stats.ticks)
+for _stat in ("mean", "p99", "max"):
+    metrics.registry.gauge("bed_tick_lateness_ms", "Bed trajectory tick lateness vs. schedule (last 2000 ticks)",
+                           fn=lambda stat=_stat: bed_control.get_motion_stats()[stat + "_ms"], stat=_stat)
+metrics.registry.counter_func("cry_gate_skipped_total", "Mic windows skipped by the pre-gate",
+                              fn=lambda: cry_gate.stats()["skipped"])
+metrics.registry.counter_func("vision_worker_restarts_total", "YOLO worker restarts",
+                              fn=lambda: vision_worker.restarts if vision_worker else 0)
+metrics.registry.gauge("cry_queue_depth", "Cry-reason jobs waiting", fn=lambda: cry_queue.stats()["depth"])
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text exposition of the in-process metrics (see metrics.py)."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+# --- Tracing (see tracing.py): start, reproduce the stutter, then download the
+# JSON and open it in ui.perfetto.dev or chrome://tracing ---
+@app.post("/api/trace/start")
+async def trace_start():
+    tracing.tracer.start()
+    return tracing.tracer.stats()
+
+@app.post("/api/trace/stop")
+async def trace_stop():
+    tracing.tracer.stop()
+    return tracing.tracer.stats()
+
+@app.get("/api/trace")
+async def trace_export():
+    """Recorded spans as Chrome/Perfetto trace JSON (recording continues if enabled)."""
+    trace = await asyncio.get_running_loop().run_in_executor(executor, tracing.tracer.export)
+    return JSONResponse(trace, headers={"Content-Disposition": 'attachment; filename="baby_monitor_trace.json"'})
+
+@app.get("/api/devices")
+async def device_status():
+    """Which devices are real hardware vs. simulated in this run."""
+    return {"mode": devices.registry.mode, "devices": devices.registry.status(),
+            "servos": bed_control.SERVO_BACKEND, "sim": devices.registry.sim_info()}
+
+@app.get("/api/models")
+async def model_timings():
+    """Per-model load and first-inference (warmup) times from this boot."""
+    return audio_models.registry.report()
+
+# Event clips recorded around cry / vitals alerts
+@app.get("/api/clips")
+async def list_clips(response: Response, limit: int | None = None, cursor: str | None = None,
+                     since: float | None = None, until: float | None = None):
+    """Newest-first listing from the clip index; same limit/cursor/since/until contract as /api/photos."""
+    try:
+        entries, next_cursor = clip_index.page(limit=limit, cursor=cursor, since=since, until=until)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+
+        clip_list = []
+        for timestamp, fn in entries:
+            base = os.path.splitext(fn)[0]
+            clip_list.append({
+                "id": fn,
+                "url": f"/baby_clips/{fn}",
+                "poster": f"/baby_clips/{base}.jpg",
+                "timestamp": timestamp,
+                "description": f"Event clip ({base.split('_')[0]})",
+                "tags": ["baby", "monitoring", "clip"]
+            })
+        return clip_list
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"bad cursor: {e}")
+    except Exception as e:
+        print("❌ Error listing clips:", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
 
 # Start camera loop thread
 # threading.Thread(target=camera_yolo_loop, daemon=True).start()
@@ -513,27 +809,62 @@ async def list_photos():
 
 main_loop: asyncio.AbstractEventLoop | None = None
 
+# --- emit backlog: coroutines handed to the event loop that haven't run yet ---
+EMIT_PENDING = {kind: metrics.registry.gauge("emit_pending", "Emits scheduled from threads, not yet done", kind=kind)
+                for kind in ("frame", "event")}
+EMIT_QUEUE_DEPTH = metrics.registry.histogram(
+    "emit_queue_depth", "Pending thread->loop emits, sampled at each schedule", buckets=metrics.DEPTH_BUCKETS)
+FRAME_ENCODE_SECONDS = metrics.registry.histogram("frame_encode_seconds", "JPEG + base64 encode per streamed frame")
+FRAMES_DROPPED = {reason: metrics.registry.counter("camera_frames_dropped_total", "Frames not streamed", reason=reason)
+                  for reason in ("read_error", "backlog")}
+# Optional backpressure: skip a frame while this many are still waiting to be
+# sent (counted as camera_frames_dropped_total{reason="backlog"}); 0 = never skip.
+STREAM_MAX_PENDING_FRAMES = 0
+
+def schedule_emit(coro, kind="event"):
+    """run_coroutine_threadsafe + backlog accounting for the emit metrics."""
+    gauge = EMIT_PENDING[kind]
+    EMIT_QUEUE_DEPTH.observe(EMIT_PENDING["frame"].value + EMIT_PENDING["event"].value)
+    gauge.inc()
+    if tracing.tracer.enabled:
+        tracing.tracer.counter("emit_pending", {k: g.value for k, g in EMIT_PENDING.items()})
+        coro = tracing.tracer.traced(coro, "emit." + kind)
+    fut = asyncio.run_coroutine_threadsafe(coro, main_loop)
+    fut.add_done_callback(lambda _: gauge.dec())
+    return fut
+
 def camera_frame_stream_loop():
     """Continuously capture frames and emit them to UI."""
+    global latest_frame, latest_jpeg
     print("📡 Starting live camera stream loop...")
 
     while True:
-        ret, frame = camera.read()
+        with tracing.span("camera.read", "camera"):
+            ret, frame = camera.read()
         if not ret or frame is None:
             print("⚠️ Failed to grab frame for UI.")
+            FRAMES_DROPPED["read_error"].inc()
             time.sleep(0.2)
             continue
 
         # Encode to base64 JPEG
         try:
-            _, buffer = cv2.imencode(".jpg", frame)
-            frame_b64 = base64.b64encode(buffer).decode("utf-8")
+            t0 = time.perf_counter()
+            with tracing.span("frame.encode", "camera"):
+                _, buffer = cv2.imencode(".jpg", frame)
+                jpeg = buffer.tobytes()
+                with latest_frame_lock:
+                    latest_frame, latest_jpeg = frame, jpeg
+                clip_recorder.add_frame(jpeg)
+                frame_b64 = base64.b64encode(buffer).decode("utf-8")
+            FRAME_ENCODE_SECONDS.observe(time.perf_counter() - t0)
 
             if main_loop.is_running():
-                asyncio.run_coroutine_threadsafe(
-                    sio.emit("camera_frame", {"image": frame_b64}),
-                    main_loop
-                )
+                if STREAM_MAX_PENDING_FRAMES and EMIT_PENDING["frame"].value >= STREAM_MAX_PENDING_FRAMES:
+                    FRAMES_DROPPED["backlog"].inc()
+                else:
+                    schedule_emit(sio.emit("camera_frame", {"image": frame_b64}), kind="frame")
+                    startup.milestone("first_frame")
         except Exception as e:
             print("⚠️ Frame encode/emit error:", e)
 
@@ -546,9 +877,33 @@ async def startup_event():
     main_loop = asyncio.get_running_loop()
     print("✅ Main event loop captured for camera streaming.")
 
-    # Start camera + YOLO background threads
-    threading.Thread(target=camera_yolo_loop, daemon=True).start()
-    threading.Thread(target=camera_frame_stream_loop, daemon=True).start()
+    # Devices and models come up in parallel in the background; the camera,
+    # YOLO and mic threads start as soon as what they need is ready.
+    startup.start()
+    asyncio.create_task(tracing.tracer.monitor_loop())
+    asyncio.create_task(vitals_clip_loop())
+
+startup.add(
+    "camera_stream",
+    lambda: threading.Thread(target=camera_frame_stream_loop, daemon=True).start(),
+    deps=("camera",),
+)
+startup.add(
+    "camera_yolo",
+    lambda: threading.Thread(target=camera_yolo_loop, daemon=True).start(),
+    deps=("camera", "vision"),
+)
+
+@app.get("/health")
+async def health():
+    """Liveness: the process and its event loop are up (subsystems may still be starting)."""
+    return {"status": "ok", "uptime_s": startup.report()["uptime_s"]}
+
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once every required startup stage is ready, else 503; per-stage detail."""
+    report = startup.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
 
 def emit_from_thread(coro: "coroutine"):
     """Schedule an async emit from a non-async background thread."""
@@ -556,7 +911,7 @@ def emit_from_thread(coro: "coroutine"):
         print("⚠️ main_loop not ready; dropping emit")
         return
     try:
-        asyncio.run_coroutine_threadsafe(coro, main_loop)
+        schedule_emit(coro)
     except Exception as e:
         print("⚠️ emit_from_thread error:", e)
 
@@ -573,6 +928,14 @@ async def emit_bed_state(label="Status", description=""):
     except Exception as e:
         print("⚠️ emit_bed_state error:", e)
 
+async def await_bed(fut):
+    """Wait for the bed actuator to finish a command without holding an executor thread."""
+    try:
+        return await asyncio.wrap_future(fut)
+    except Exception as e:
+        print("⚠️ bed actuator error:", e)
+        return {"status": "error"}
+
 @sio.on("set_bed_position")
 async def handle_set_bed_position(sid, data):
     """
@@ -581,24 +944,13 @@ async def handle_set_bed_position(sid, data):
     mode = (data or {}).get("mode")
     print("[socket] set_bed_position from", sid, "data=", data)
 
-    def _do():
-        mapping = {
-            "flat": bed_control.go_neutral,
-            "head_elevated": bed_control.go_head_up,
-            "left_side": bed_control.go_left_side,
-            "right_side": bed_control.go_right_side,
-            "feeding": bed_control.go_feeding,
-            "sleep": bed_control.go_sleep,
-        }
-        fn = mapping.get(mode)
-        if fn:
-            fn()
-        else:
-            print("[socket] unknown mode:", mode)
+    if mode not in bed_control.PRESETS:
+        print("[socket] unknown mode:", mode)
+        return
 
-    # offload blocking servo moves
-    await asyncio.get_running_loop().run_in_executor(executor, _do)
-    await emit_bed_state(label="FromPreset", description=f"Mode: {mode}")
+    # queued on the bed actuator thread; a newer command preempts this one
+    ack = await await_bed(bed_control.actuator.submit("preset", mode=mode))
+    await emit_bed_state(label="FromPreset", description=f"Mode: {mode} ({ack['status']})")
 
 @sio.on("set_manual_offset")
 async def handle_set_manual_offset(sid, data):
@@ -609,14 +961,15 @@ async def handle_set_manual_offset(sid, data):
     delta = (data or {}).get("delta")
     print("[socket] nudge request from", sid, "=>", axis, delta)
 
-    def _do():
-        try:
-            bed_control.nudge(axis, float(delta))
-        except Exception as e:
-            print("[socket] nudge error:", e)
+    try:
+        fut = bed_control.actuator.submit("nudge", axis=axis, delta=float(delta))
+    except Exception as e:
+        print("[socket] nudge error:", e)
+        return
 
-    await asyncio.get_running_loop().run_in_executor(executor, _do)
-    await emit_bed_state(label="Manual", description=f"Nudged {axis} by {delta}")
+    # rapid nudges are coalesced into one move by the actuator
+    ack = await await_bed(fut)
+    await emit_bed_state(label="Manual", description=f"Nudged {axis} by {delta} ({ack['status']})")
 
 @sio.on("start_motion")
 async def handle_start_motion(sid, data):
@@ -628,41 +981,73 @@ async def handle_start_motion(sid, data):
     duration_seconds = minutes * 60.0
     print("[socket] start_motion from", sid, "=>", motion_type, duration_seconds, "sec")
 
-    def _do():
-        if motion_type == "rock":
-            bed_control.start_gentle_rock(duration_seconds=duration_seconds)
-        elif motion_type == "breathe":
-            bed_control.start_womb_breathing(duration_seconds=duration_seconds)
-        else:
-            print("[socket] unknown motion type:", motion_type)
+    if motion_type == "rock":
+        fut = bed_control.start_gentle_rock(duration_seconds=duration_seconds)
+    elif motion_type == "breathe":
+        fut = bed_control.start_womb_breathing(duration_seconds=duration_seconds)
+    else:
+        print("[socket] unknown motion type:", motion_type)
+        return
 
-    await asyncio.get_running_loop().run_in_executor(executor, _do)
+    # acknowledge now; the motion keeps running on the actuator thread
     await emit_bed_state(label="Motion", description=f"{motion_type} for {minutes} min")
 
+    async def _on_motion_end():
+        ack = await await_bed(fut)
+        await emit_bed_state(label="Motion", description=f"{motion_type} ended ({ack['status']})")
+    asyncio.create_task(_on_motion_end())
+
 @sio.on("stop_motion")
 async def handle_stop_motion(sid):
     print("[socket] stop_motion from", sid)
 
-    def _do():
-        try:
-            bed_control.stop_motion()
-        except Exception as e:
-            print("[socket] stop_motion error:", e)
+    try:
+        fut = bed_control.stop_motion()
+    except Exception as e:
+        print("[socket] stop_motion error:", e)
+        return
 
-    await asyncio.get_running_loop().run_in_executor(executor, _do)
+    await await_bed(fut)
     await emit_bed_state(label="Stopped", description="Motion stopped by user")
 
+@sio.on("calibrate_bed")
+async def handle_calibrate_bed(sid):
+    """Learn servo -> tilt mapping from the accelerometer (moves the bed a few degrees)."""
+    print("[socket] calibrate_bed from", sid)
+    ack = await await_bed(bed_control.actuator.submit("calibrate"))
+    await emit_bed_state(label="Calibrated", description=f"Tilt calibration {ack['status']}")
+
 # ======================================================
 # ----------------- SENSORS SETUP ----------------------
 # ======================================================
-print("🩺 Initializing sensors...")
-i2c = busio.I2C(board.SCL, board.SDA)
-accelerometer = adafruit_adxl34x.ADXL345(i2c)
-dhtDevice = adafruit_dht.DHT11(board.D4)
-hrm = HeartRateMonitor(print_raw=False, print_result=False)
-hrm.start_sensor()
-m = max30102.MAX30102()
-print("✅ All sensors initialized.\n")
+# Each sensor is its own startup stage, so they init in parallel and the
+# sensor stream can send whatever is ready while the rest comes up.
+accelerometer = None
+dhtDevice = None
+hrm = None
+m = None
+
+def init_accelerometer():
+    global accelerometer
+    accelerometer = devices.registry.get("accelerometer")
+    bed_control.set_tilt_sensor(lambda: accelerometer.acceleration)
+
+def init_dht():
+    global dhtDevice
+    dhtDevice = devices.registry.get("dht")
+
+def init_ppg():
+    global m, hrm
+    # one MAX30102 handle (one reset + 1 s settle) shared with the heart-rate thread
+    m = devices.registry.get("ppg")
+    monitor = HeartRateMonitor(print_raw=False, print_result=False, sensor_factory=lambda: m)
+    monitor.start_sensor()
+    hrm = monitor
+
+startup.add("i2c", lambda: devices.registry.get("i2c"))
+startup.add("accelerometer", init_accelerometer, deps=("i2c",))
+startup.add("dht", init_dht)
+startup.add("ppg", init_ppg)
 
 # ======================================================
 # ----------------- SENSOR STREAM ----------------------
@@ -670,6 +1055,31 @@ print("✅ All sensors initialized.\n")
 active_sensor_clients = set()
 running_tasks = {}
 
+# Vitals outside these ranges start an event clip (0 = no reading yet, ignored).
+# One clip when a value leaves its range, at most VITALS_CLIP_MAX per episode;
+# the episode ends once the value has been back in range for VITALS_CLIP_CLEAR_S.
+VITALS_CLIP_LIMITS = {"bpm": (100, 180), "spo2": (90, 100)}
+VITALS_CLIP_CLEAR_S = 30.0
+VITALS_CLIP_REPEAT_S = 300.0
+VITALS_CLIP_MAX = 2
+vitals_clip_watch = VitalsClipWatch(clip_recorder, VITALS_CLIP_LIMITS, clear_s=VITALS_CLIP_CLEAR_S,
+                                    repeat_s=VITALS_CLIP_REPEAT_S, max_clips=VITALS_CLIP_MAX)
+latest_vitals = {}   # newest sensor_data from any client stream
+
+async def vitals_clip_loop(interval=1.0):
+    """Checks the newest vitals once per interval, however many clients are streaming."""
+    last_ts = None
+    while True:
+        await asyncio.sleep(interval)
+        data = latest_vitals.get("data")
+        if data is None or data["ts"] == last_ts:
+            continue
+        last_ts = data["ts"]
+        try:
+            vitals_clip_watch.update(data)
+        except Exception as e:
+            print("⚠️ Vitals clip check error:", e)
+
 @sio.event
 async def connect(sid, environ):
     print(f"✅ Client connected: {sid}")
@@ -681,6 +1091,9 @@ async def disconnect(sid):
     task = running_tasks.pop(sid, None)
     if task:
         task.cancel()
+    talk = talk_sessions.pop(sid, None)
+    if talk:
+        talk.finish()
 
 @sio.on("start_reading")
 async def handle_start_reading(sid):
@@ -695,43 +1108,69 @@ async def handle_stop_reading(sid):
     if task:
         task.cancel()
 
+SENSOR_LOOP_PERIOD = metrics.registry.histogram(
+    "sensor_loop_period_seconds", "Time between sensor_data emits per client", buckets=metrics.PERIOD_BUCKETS)
+HR_CALC_SECONDS = metrics.registry.histogram("hr_calc_seconds", "calc_hr_and_spo2 run time", source="stream")
+I2C_ACCEL_READS = bed_control.I2C_ACCEL_READS   # declared once, shared with the bed's tilt reads
+SENSOR_READ_FAILURES = {sensor: metrics.registry.counter(
+    "sensor_samples_dropped_total", "Sensor reads that failed (last value reused)", sensor=sensor)
+    for sensor in ("adxl345", "dht11", "max30102")}
+
 async def stream_sensor_data(sid):
     last_valid = {"bpm":0,"spo2":0,"temperature":0,"humidity":0,"x":0,"y":0,"z":0}
+    last_emit = None
     try:
         while sid in active_sensor_clients:
             start = time.perf_counter()
+            sampled_at = time.time()
             try:
-                x, y, z = accelerometer.acceleration
+                I2C_ACCEL_READS.inc()
+                with tracing.span("sensor.adxl345", "i2c"):
+                    x, y, z = accelerometer.acceleration
             except Exception:
+                SENSOR_READ_FAILURES["adxl345"].inc()
                 x, y, z = last_valid["x"], last_valid["y"], last_valid["z"]
 
             temperature, humidity = None, None
-            for _ in range(3):
+            for _ in range(3 if dhtDevice is not None else 0):
                 try:
-                    temperature = dhtDevice.temperature
-                    humidity = dhtDevice.humidity
+                    with tracing.span("sensor.dht11", "sensor"):
+                        temperature = dhtDevice.temperature
+                        humidity = dhtDevice.humidity
                     if temperature and humidity:
                         break
                 except Exception:
                     await asyncio.sleep(0.2)
             if temperature is None or humidity is None:
+                SENSOR_READ_FAILURES["dht11"].inc()
                 temperature, humidity = last_valid["temperature"], last_valid["humidity"]
 
-            bpm = hrm.bpm or last_valid["bpm"]
+            bpm = (hrm.bpm if hrm else 0) or last_valid["bpm"]
             spo2 = last_valid["spo2"]
 
             try:
+                if m is None:
+                    raise RuntimeError("MAX30102 not ready")
                 red, ir = await asyncio.get_event_loop().run_in_executor(executor, m.read_sequential)
                 if len(red)>30 and len(ir)>30:
-                    hr,hr_valid,spo2_val,spo2_valid=hrcalc.calc_hr_and_spo2(ir,red)
+                    with HR_CALC_SECONDS.time(), tracing.span("sensor.hr_calc", "sensor"):
+                        hr,hr_valid,spo2_val,spo2_valid=hrcalc.calc_hr_and_spo2(ir,red)
                     if spo2_valid and spo2_val>0: spo2=spo2_val
-            except Exception: pass
+            except Exception:
+                SENSOR_READ_FAILURES["max30102"].inc()
 
             data={"bpm":round(bpm,1),"spo2":round(spo2,1),
                   "temperature":round(temperature,1),"humidity":round(humidity,1),
                   "x":round(x,2),"y":round(y,2),"z":round(z,2)}
-            last_valid=data
+            last_valid=dict(data)
+            data["ts"]=sampled_at   # when this reading started (for latency measurement)
+            latest_vitals["data"] = data
             await sio.emit("sensor_data",data,to=sid)
+            startup.milestone("first_vitals")
+            now = time.perf_counter()
+            if last_emit is not None:
+                SENSOR_LOOP_PERIOD.observe(now - last_emit)
+            last_emit = now
             elapsed=time.perf_counter()-start
             await asyncio.sleep(max(1.0-elapsed,0.1))
     except asyncio.CancelledError:
@@ -751,8 +1190,11 @@ if __name__ == "__main__":
     try:
         uvicorn.run(sio_app, host="0.0.0.0", port=5000)
     finally:
-        hrm.stop_sensor()
+        if hrm: hrm.stop_sensor()
         if camera and camera.isOpened(): camera.release()
         executor.shutdown(wait=False)
-        pygame.mixer.quit()
+        writer_pool.shutdown(wait=True)
+        if vision_worker: vision_worker.stop()
+        if mic_stream: mic_stream.stop()
+        if audio_out: audio_out.close()
         print("🛑 Resources released. Server stopped.")
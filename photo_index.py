@@ -0,0 +1,165 @@
+import bisect
+import os
+import threading
+import time
+
+import cv2
+
+
+class PhotoIndex(object):
+    """
+    In-memory index of a media directory (captures, or event clips), newest first.
+
+    Kept up to date incrementally: add() is called when the server saves a
+    capture, and a background rescan every `rescan_interval` seconds picks up
+    files that were copied in or deleted by hand (and deletes their orphaned
+    thumbnails). Listing never touches the disk.
+    """
+
+    def __init__(self, directory, thumb_dir, exts=(".jpg", ".jpeg", ".png"),
+                 rescan_interval=60.0, thumb_width=320, label="photos"):
+        self.directory = directory
+        self.label = label
+        self.thumb_dir = thumb_dir
+        self.exts = exts
+        self.rescan_interval = rescan_interval
+        self.thumb_width = thumb_width
+
+        self._lock = threading.Lock()
+        self._mtimes = {}     # filename -> mtime
+        self._order = []      # sorted list of (mtime, filename), oldest first
+
+        os.makedirs(thumb_dir, exist_ok=True)
+
+    # ---------- index maintenance ----------
+
+    def _insert(self, fn, mtime):
+        old = self._mtimes.get(fn)
+        if old is not None:
+            if old == mtime:
+                return
+            self._order.remove((old, fn))
+        self._mtimes[fn] = mtime
+        bisect.insort(self._order, (mtime, fn))
+
+    def add(self, fn, mtime=None):
+        if not fn.lower().endswith(self.exts):
+            return
+        if mtime is None:
+            mtime = os.path.getmtime(os.path.join(self.directory, fn))
+        with self._lock:
+            self._insert(fn, mtime)
+
+    def remove(self, fn):
+        with self._lock:
+            mtime = self._mtimes.pop(fn, None)
+            if mtime is not None:
+                self._order.remove((mtime, fn))
+        try:
+            os.remove(self._thumb_path(fn))
+        except OSError:
+            pass
+
+    def rescan(self):
+        seen = {}
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.lower().endswith(self.exts):
+                    seen[entry.name] = entry.stat().st_mtime
+
+        with self._lock:
+            for fn in [f for f in self._mtimes if f not in seen]:
+                self._order.remove((self._mtimes.pop(fn), fn))
+            for fn, mtime in seen.items():
+                self._insert(fn, mtime)
+        self._prune_thumbnails(seen)
+        return len(seen)
+
+    def start(self):
+        n = self.rescan()
+        print(f"🖼️ Index of {self.directory} ready ({n} {self.label})")
+        threading.Thread(target=self._rescan_loop, daemon=True).start()
+
+    def _rescan_loop(self):
+        while True:
+            time.sleep(self.rescan_interval)
+            try:
+                self.rescan()
+            except Exception as e:
+                print("⚠️ Photo index rescan error:", e)
+
+    # ---------- queries ----------
+
+    def mtime(self, fn):
+        return self._mtimes.get(fn)
+
+    def page(self, limit=None, cursor=None, since=None, until=None):
+        """
+        Return (entries, next_cursor), newest first.
+        cursor: opaque string from a previous call ("<mtime>:<filename>").
+        since / until: unix timestamps bounding the capture time.
+        """
+        with self._lock:
+            hi = len(self._order)
+            if cursor:
+                c_mtime, _, c_fn = cursor.partition(":")
+                hi = bisect.bisect_left(self._order, (float(c_mtime), c_fn))
+            if until is not None:
+                hi = min(hi, bisect.bisect_right(self._order, (until, "\uffff")))
+            lo = bisect.bisect_left(self._order, (since, "")) if since is not None else 0
+
+            if limit is not None:
+                start = max(lo, hi - limit)
+            else:
+                start = lo
+            entries = self._order[start:hi][::-1]
+
+        next_cursor = None
+        if limit is not None and start > lo and entries:
+            mtime, fn = entries[-1]
+            next_cursor = f"{mtime!r}:{fn}"
+        return entries, next_cursor
+
+    # ---------- thumbnails ----------
+
+    def _thumb_path(self, fn):
+        # keyed on the full filename, so x.jpg and x.png don't share a thumbnail
+        return os.path.join(self.thumb_dir, fn + ".jpg")
+
+    def _prune_thumbnails(self, photos):
+        """Delete cached thumbnails whose photo is gone."""
+        removed = 0
+        with os.scandir(self.thumb_dir) as it:
+            for entry in it:
+                name = entry.name
+                if not name.endswith(".jpg") or name.endswith(".tmp.jpg"):
+                    continue   # not ours, or being written right now
+                if name[:-len(".jpg")] not in photos:
+                    try:
+                        os.remove(entry.path)
+                        removed += 1
+                    except OSError:
+                        pass
+        if removed:
+            print(f"🧹 Photo index removed {removed} orphaned thumbnails")
+
+    def thumbnail(self, fn):
+        """Return the path of a cached downscaled copy, generating it if needed."""
+        src = os.path.join(self.directory, fn)
+        dst = self._thumb_path(fn)
+
+        src_mtime = os.path.getmtime(src)
+        if os.path.exists(dst) and os.path.getmtime(dst) >= src_mtime:
+            return dst
+
+        img = cv2.imread(src)
+        if img is None:
+            raise ValueError(f"cannot read image {fn}")
+        h, w = img.shape[:2]
+        if w > self.thumb_width:
+            img = cv2.resize(img, (self.thumb_width, int(h * self.thumb_width / w)),
+                             interpolation=cv2.INTER_AREA)
+        tmp = dst + ".tmp.jpg"
+        cv2.imwrite(tmp, img, [cv2.IMWRITE_JPEG_QUALITY, 80])
+        os.replace(tmp, dst)
+        return dst
@@ -0,0 +1,424 @@
+"""
+End-to-end replay benchmark for the integrated server.
+
+Starts newtesting_integrated.py on simulated devices (devices.py) fed with
+recorded inputs, connects N Socket.IO clients and measures what a parent's
+browser would see:
+
+    python replay_bench.py --trace vitals.csv --video cry.mp4 --wav cry.wav \\
+        --episodes episodes.json --clients 4 --duration 180 --json run.json
+    python replay_bench.py ... --baseline baseline.json   # exit 1 on regression
+
+Inputs
+  --trace     sensor CSV (t,red,ir,ax,ay,az,temperature,humidity; see devices.SensorTrace)
+  --video     video file played as the camera (loops)
+  --wav       WAV file played as the microphone (loops)
+  --episodes  JSON list of [start_s, end_s] crying episodes in the WAV (the video
+              should show crying at the same times, fusion needs both)
+
+Reports
+  boot       time until /ready, per-stage startup times, first frame / vitals
+  vitals     sensor_data latency (reading start -> client) and update interval
+  cry        onset -> "Crying detected" emergency_alert latency, detected / missed
+  frames     camera_frame messages and fps delivered per client
+  resources  server CPU % and RSS (process tree, incl. the YOLO worker)
+  metrics    mean of every histogram on /metrics
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import socketio
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# metric path -> (which way is better, allowed relative change against the baseline)
+THRESHOLDS = {
+    "boot.time_to_ready_s": ("lower", 0.30),
+    "vitals.latency_p95_ms": ("lower", 0.25),
+    "vitals.interval_p95_s": ("lower", 0.25),
+    "cry.latency_p50_s": ("lower", 0.25),
+    "cry.latency_max_s": ("lower", 0.50),
+    "cry.detected_ratio": ("higher", 0.0),
+    "frames.fps_per_client_min": ("higher", 0.15),
+    "resources.cpu_avg_pct": ("lower", 0.20),
+    "resources.rss_max_mb": ("lower", 0.15),
+}
+CRY_ALERT_GRACE_S = 30.0    # an alert this long after the episode ended still counts
+
+
+def _percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(round(p / 100.0 * (len(values) - 1))), len(values) - 1)]
+
+
+def _round(v, nd=3):
+    return round(v, nd) if v is not None else None
+
+
+def _get(url, timeout=2.0):
+    with urllib.request.urlopen(url, timeout=timeout) as r:
+        return r.status, r.read()
+
+
+# ==============================
+# SERVER + RESOURCE SAMPLING
+# ==============================
+
+def start_server(args):
+    env = dict(os.environ)
+    env["BABY_DEVICES"] = "sim"
+    for key, value in (("BABY_SIM_TRACE", args.trace), ("BABY_SIM_VIDEO", args.video),
+                       ("BABY_SIM_WAV", args.wav), ("BABY_BASE_DIR", args.base_dir)):
+        if value:
+            env[key] = os.path.abspath(value)
+    log = open(args.server_log, "w")
+    cmd = [sys.executable, "-m", "uvicorn", "newtesting_integrated:sio_app",
+           "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning"]
+    return subprocess.Popen(cmd, cwd=HERE, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_ready(base, proc, timeout):
+    """Poll /ready; returns (seconds until ready, final /ready report)."""
+    t0 = time.monotonic()
+    while time.monotonic() - t0 < timeout:
+        if proc.poll() is not None:
+            raise SystemExit(f"server exited during startup (code {proc.returncode}); see the server log")
+        try:
+            status, body = _get(base + "/ready")
+            if status == 200:
+                return time.monotonic() - t0, json.loads(body)
+        except urllib.error.HTTPError as e:
+            if e.code != 503:
+                raise
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass   # not listening yet
+        time.sleep(0.2)
+    raise SystemExit(f"server not ready after {timeout:.0f}s")
+
+
+def _proc_tree(pid):
+    pids = [pid]
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                for child in f.read().split():
+                    pids.extend(_proc_tree(int(child)))
+    except OSError:
+        pass
+    return pids
+
+
+def _cpu_ticks_and_rss(pid):
+    ticks, rss_kb = 0, 0
+    for p in _proc_tree(pid):
+        try:
+            with open(f"/proc/{p}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            ticks += int(fields[11]) + int(fields[12])     # utime + stime
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss_kb += int(line.split()[1])
+        except (OSError, IndexError, ValueError):
+            continue   # process went away between listing and reading
+    return ticks, rss_kb
+
+
+class ResourceSampler(object):
+    """Samples the server's process-tree CPU % and RSS from /proc on a background thread."""
+
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.cpu_pct = []
+        self.rss_mb = []
+        self._stop = threading.Event()
+        self._hz = os.sysconf("SC_CLK_TCK")
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        last_ticks, _ = _cpu_ticks_and_rss(self.pid)
+        last_t = time.monotonic()
+        while not self._stop.wait(self.interval):
+            ticks, rss_kb = _cpu_ticks_and_rss(self.pid)
+            now = time.monotonic()
+            self.cpu_pct.append(100.0 * (ticks - last_ticks) / self._hz / (now - last_t))
+            self.rss_mb.append(rss_kb / 1024.0)
+            last_ticks, last_t = ticks, now
+
+    def summary(self):
+        return {
+            "cpu_avg_pct": _round(sum(self.cpu_pct) / len(self.cpu_pct), 1) if self.cpu_pct else None,
+            "cpu_p95_pct": _round(_percentile(self.cpu_pct, 95), 1),
+            "rss_avg_mb": _round(sum(self.rss_mb) / len(self.rss_mb), 1) if self.rss_mb else None,
+            "rss_max_mb": _round(max(self.rss_mb), 1) if self.rss_mb else None,
+        }
+
+
+# ==============================
+# SIMULATED CLIENTS
+# ==============================
+
+class BenchClient(object):
+    """One browser: streams vitals, receives camera frames and alerts."""
+
+    def __init__(self, base):
+        self.base = base
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.vitals_latency = []      # seconds, reading start -> received
+        self.vitals_at = []           # receive times
+        self.frames = 0
+        self.alerts = []              # (receive time, severity, message)
+
+        self.sio.on("sensor_data", self._on_sensor_data)
+        self.sio.on("camera_frame", self._on_frame)
+        self.sio.on("emergency_alert", self._on_alert)
+
+    async def _on_sensor_data(self, data):
+        now = time.time()
+        self.vitals_at.append(now)
+        if "ts" in data:
+            self.vitals_latency.append(now - data["ts"])
+
+    async def _on_frame(self, data):
+        self.frames += 1
+
+    async def _on_alert(self, data):
+        self.alerts.append((time.time(), data.get("severity"), data.get("message", "")))
+
+    async def run(self, seconds):
+        await self.sio.connect(self.base, transports=["websocket"])
+        await self.sio.emit("start_reading")
+        await asyncio.sleep(seconds)
+        await self.sio.emit("stop_reading")
+        await self.sio.disconnect()
+
+
+async def run_clients(base, n, seconds):
+    clients = [BenchClient(base) for _ in range(n)]
+    await asyncio.gather(*(c.run(seconds) for c in clients))
+    return clients
+
+
+# ==============================
+# ANALYSIS
+# ==============================
+
+def cry_onsets(episodes, sim, t_start, t_end):
+    """Wall-clock (onset, end) of every WAV episode replayed inside [t_start, t_end]."""
+    started, loop_s = sim.get("mic_started_at"), sim.get("mic_loop_s")
+    if not episodes or not started or not loop_s:
+        return []
+    out = []
+    k = max(int((t_start - started) // loop_s), 0)
+    while started + k * loop_s < t_end:
+        for start_s, end_s in episodes:
+            onset = started + k * loop_s + start_s
+            if t_start <= onset and onset + CRY_ALERT_GRACE_S < t_end:
+                out.append((onset, started + k * loop_s + end_s))
+        k += 1
+    return out
+
+
+def cry_summary(clients, onsets):
+    latencies, missed = [], 0
+    for onset, end in onsets:
+        for c in clients:
+            hits = [t for t, severity, msg in c.alerts
+                    if severity == "warning" and "Crying" in msg and onset <= t <= end + CRY_ALERT_GRACE_S]
+            if hits:
+                latencies.append(hits[0] - onset)
+            else:
+                missed += 1
+    total = len(onsets) * len(clients)
+    return {
+        "episodes": len(onsets),
+        "detected": len(latencies),
+        "missed": missed,
+        "detected_ratio": _round(len(latencies) / total) if total else None,
+        "latency_p50_s": _round(_percentile(latencies, 50)),
+        "latency_p95_s": _round(_percentile(latencies, 95)),
+        "latency_max_s": _round(max(latencies)) if latencies else None,
+    }
+
+
+def vitals_summary(clients):
+    latency = [v for c in clients for v in c.vitals_latency]
+    intervals = [b - a for c in clients for a, b in zip(c.vitals_at, c.vitals_at[1:])]
+    return {
+        "updates": sum(len(c.vitals_at) for c in clients),
+        "latency_p50_ms": _round(_percentile(latency, 50) * 1000, 1) if latency else None,
+        "latency_p95_ms": _round(_percentile(latency, 95) * 1000, 1) if latency else None,
+        "interval_p50_s": _round(_percentile(intervals, 50)),
+        "interval_p95_s": _round(_percentile(intervals, 95)),
+    }
+
+
+def frames_summary(clients, seconds):
+    fps = [c.frames / seconds for c in clients]
+    return {
+        "per_client": [c.frames for c in clients],
+        "fps_per_client_mean": _round(sum(fps) / len(fps), 2),
+        "fps_per_client_min": _round(min(fps), 2),
+    }
+
+
+_SAMPLE = re.compile(r"^(\w+?)_(sum|count)(\{[^}]*\})? (\S+)$")
+
+
+def histogram_means(text):
+    """{metric{labels}: mean} for every histogram in a /metrics scrape."""
+    sums, counts = {}, {}
+    for line in text.splitlines():
+        m = _SAMPLE.match(line)
+        if not m:
+            continue
+        key = m.group(1) + (m.group(3) or "")
+        (sums if m.group(2) == "sum" else counts)[key] = float(m.group(4))
+    return {k: round(sums[k] / counts[k], 6) for k in sums if counts.get(k)}
+
+
+def _lookup(results, path):
+    node = results
+    for part in path.split("."):
+        if not isinstance(node, dict) or part not in node:
+            return None
+        node = node[part]
+    return node
+
+
+def compare(results, baseline, thresholds):
+    """Metrics that got worse than the baseline by more than the allowed fraction."""
+    regressions = []
+    for path, (better, allowed) in thresholds.items():
+        cur, base = _lookup(results, path), _lookup(baseline, path)
+        if cur is None or base is None:
+            continue
+        if better == "lower":
+            worse = cur > base * (1 + allowed) if base else cur > 0
+        else:
+            worse = cur < base * (1 - allowed)
+        if worse:
+            change = (cur - base) / base if base else None
+            regressions.append({"metric": path, "baseline": base, "current": cur,
+                                "change": _round(change), "allowed": allowed, "better": better})
+    return regressions
+
+
+# ==============================
+# MAIN
+# ==============================
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--trace", help="recorded sensor CSV")
+    ap.add_argument("--video", help="video file played as the camera")
+    ap.add_argument("--wav", help="WAV file played as the microphone")
+    ap.add_argument("--base-dir", help="server BABY_BASE_DIR (models; captures and clips are written here)")
+    ap.add_argument("--episodes", help="JSON [[start_s, end_s], ...] crying episodes in the WAV")
+    ap.add_argument("--clients", type=int, default=4, help="simulated Socket.IO clients")
+    ap.add_argument("--duration", type=float, default=120.0, help="measured seconds")
+    ap.add_argument("--warmup", type=float, default=5.0, help="seconds after /ready before measuring")
+    ap.add_argument("--ready-timeout", type=float, default=300.0)
+    ap.add_argument("--port", type=int, default=5077)
+    ap.add_argument("--server-log", default="replay_bench_server.log")
+    ap.add_argument("--json", help="write results to this file")
+    ap.add_argument("--baseline", help="earlier results JSON to check for regressions")
+    ap.add_argument("--thresholds", help="JSON {metric: [\"lower\"|\"higher\", allowed_fraction]} overrides")
+    args = ap.parse_args()
+
+    episodes = []
+    if args.episodes:
+        with open(args.episodes) as f:
+            episodes = json.load(f)
+    thresholds = dict(THRESHOLDS)
+    if args.thresholds:
+        with open(args.thresholds) as f:
+            thresholds.update({k: tuple(v) for k, v in json.load(f).items()})
+
+    base = f"http://127.0.0.1:{args.port}"
+    proc = start_server(args)
+    sampler = None
+    try:
+        time_to_ready, ready = wait_ready(base, proc, args.ready_timeout)
+        print(f"[BENCH] server ready in {time_to_ready:.1f}s")
+        time.sleep(args.warmup)
+
+        sampler = ResourceSampler(proc.pid)
+        sampler.start()
+        t_start = time.time()
+        clients = asyncio.run(run_clients(base, args.clients, args.duration))
+        t_end = time.time()
+        sampler.stop()
+
+        _, body = _get(base + "/api/devices")
+        sim = json.loads(body).get("sim", {})
+        _, metrics_text = _get(base + "/metrics")
+        _, body = _get(base + "/ready")
+        ready = json.loads(body)
+    finally:
+        if sampler is not None:
+            sampler.stop()
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    results = {
+        "config": {
+            "clients": args.clients, "duration_s": args.duration,
+            "trace": args.trace, "video": args.video, "wav": args.wav, "episodes": episodes,
+        },
+        "boot": {
+            "time_to_ready_s": _round(time_to_ready, 2),
+            "stages_s": {name: s["seconds"] for name, s in ready["stages"].items()},
+            "milestones": ready.get("milestones", {}),
+        },
+        "vitals": vitals_summary(clients),
+        "cry": cry_summary(clients, cry_onsets(episodes, sim, t_start, t_end)),
+        "frames": frames_summary(clients, t_end - t_start),
+        "resources": sampler.summary(),
+        "metrics": histogram_means(metrics_text.decode()),
+    }
+
+    for section in ("boot", "vitals", "cry", "frames", "resources"):
+        print(f"[BENCH] {section}: {results[section]}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            results["regressions"] = compare(results, json.load(f), thresholds)
+        for r in results["regressions"]:
+            print(f"❌ [BENCH] regression {r['metric']}: {r['baseline']} -> {r['current']} "
+                  f"(allowed {r['allowed']:.0%}, {r['better']} is better)")
+        if not results["regressions"]:
+            print("✅ [BENCH] no regressions against", args.baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print("[BENCH] results written to", args.json)
+
+    if results.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
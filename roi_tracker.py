@@ -0,0 +1,91 @@
+import time
+
+
+class RoiTracker(object):
+    """
+    Keeps track of where the baby was last seen in the camera frame so YOLO
+    only has to look at an expanded crop around it instead of the full frame.
+
+    - crop(frame) -> (image, (x_off, y_off), is_full) for the next inference
+    - update(detections, (x_off, y_off), is_full) -> detections mapped back to
+      full-frame coordinates; also refreshes the remembered box
+    is_full is passed explicitly: an ROI clamped to the top-left corner also
+    has offset (0, 0).
+    A full-frame pass is forced every `full_frame_every` inferences and as soon
+    as a crop comes back empty, so a baby that moved out of the ROI is found again.
+    """
+
+    def __init__(self, frame_w=640, frame_h=480, expand=1.5, min_size=256,
+                 full_frame_every=6, max_age=30.0, min_conf=0.3):
+        self.frame_w = frame_w
+        self.frame_h = frame_h
+        self.expand = expand
+        self.min_size = min_size
+        self.full_frame_every = full_frame_every
+        self.max_age = max_age
+        self.min_conf = min_conf
+
+        self.box = None          # (x1, y1, x2, y2) in full-frame pixels
+        self.box_time = 0.0
+        self._since_full = 0
+        self._force_full = True
+
+    def reset(self):
+        self.box = None
+        self._force_full = True
+
+    def _roi(self):
+        x1, y1, x2, y2 = self.box
+        cx, cy = (x1 + x2) / 2.0, (y1 + y2) / 2.0
+        w = max((x2 - x1) * self.expand, self.min_size)
+        h = max((y2 - y1) * self.expand, self.min_size)
+        w = min(w, self.frame_w)
+        h = min(h, self.frame_h)
+
+        # shift the window back inside the frame instead of shrinking it
+        rx1 = int(min(max(cx - w / 2.0, 0), self.frame_w - w))
+        ry1 = int(min(max(cy - h / 2.0, 0), self.frame_h - h))
+        return rx1, ry1, int(rx1 + w), int(ry1 + h)
+
+    def crop(self, frame):
+        """Return the image to run inference on, its offset in the frame and whether it is the full frame."""
+        self.frame_h, self.frame_w = frame.shape[:2]
+
+        stale = self.box is None or (time.time() - self.box_time) > self.max_age
+        if self._force_full or stale or self._since_full >= self.full_frame_every:
+            self._since_full = 0
+            self._force_full = False
+            return frame, (0, 0), True
+
+        self._since_full += 1
+        rx1, ry1, rx2, ry2 = self._roi()
+        return frame[ry1:ry2, rx1:rx2], (rx1, ry1), False
+
+    def update(self, detections, offset, is_full):
+        """
+        detections: list of dicts with "xyxy" in crop coordinates.
+        Returns the same list with "xyxy" mapped to full-frame coordinates.
+        """
+        ox, oy = offset
+        mapped = []
+        for det in detections:
+            x1, y1, x2, y2 = det["xyxy"]
+            d = dict(det)
+            d["xyxy"] = (x1 + ox, y1 + oy, x2 + ox, y2 + oy)
+            mapped.append(d)
+
+        confident = [d for d in mapped if d["conf"] >= self.min_conf]
+        if confident:
+            # track the union of everything we saw, so baby + face/hands stay in view
+            self.box = (
+                min(d["xyxy"][0] for d in confident),
+                min(d["xyxy"][1] for d in confident),
+                max(d["xyxy"][2] for d in confident),
+                max(d["xyxy"][3] for d in confident),
+            )
+            self.box_time = time.time()
+        elif not is_full:
+            # nothing inside the crop -> look at the whole frame next time
+            self._force_full = True
+
+        return mapped
@@ -0,0 +1,69 @@
+import threading
+import time
+
+
+class _SimI2CDevice(object):
+    """Stand-in for adafruit_bus_device.I2CDevice that records every write."""
+
+    def __init__(self, owner):
+        self._owner = owner
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+        return False
+
+    def write(self, buf, start=0, end=None):
+        self._owner._record(bytes(buf[start:end]))
+
+
+class SimulatedPCA9685(object):
+    """
+    Simulated PCA9685 for running bed_control without hardware.
+
+    Exposes the bits of adafruit_pca9685.PCA9685 that bed_control uses
+    (frequency, i2c_device) and keeps:
+      - writes: list of (monotonic_ts, start_register, data bytes)
+      - off_counts: current 12-bit OFF count per channel
+    An optional `write_delay` (seconds) mimics I2C transaction time.
+    """
+
+    LED0_ON_L = 0x06
+
+    def __init__(self, frequency=50, write_delay=0.0, keep=100000):
+        self.frequency = frequency
+        self.write_delay = write_delay
+        self.keep = keep
+        self.i2c_device = _SimI2CDevice(self)
+        self.writes = []
+        self.off_counts = [0] * 16
+
+    def _record(self, data):
+        if self.write_delay:
+            time.sleep(self.write_delay)
+        reg, payload = data[0], data[1:]
+        self.writes.append((time.monotonic(), reg, payload))
+        if len(self.writes) > self.keep:
+            del self.writes[:len(self.writes) - self.keep]
+
+        # auto-increment: payload fills consecutive LEDn registers
+        for i, byte in enumerate(payload):
+            r = reg + i - self.LED0_ON_L
+            if r < 0 or r >= 64:
+                continue
+            ch, field = divmod(r, 4)
+            if field == 2:
+                self.off_counts[ch] = (self.off_counts[ch] & 0x0F00) | byte
+            elif field == 3:
+                self.off_counts[ch] = (self.off_counts[ch] & 0x00FF) | ((byte & 0x0F) << 8)
+
+    def pulse_us(self, ch):
+        """Current pulse width on a channel, in microseconds."""
+        return self.off_counts[ch] / 4096.0 * 1000000.0 / self.frequency
+
+    def reset_log(self):
+        self.writes = []
@@ -3,20 +3,30 @@ import { Card, CardContent, CardHeader, CardTitle } from './ui/card';
 import { Button } from './ui/button';
 import { Badge } from './ui/badge';
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogTrigger } from './ui/dialog';
-import { Camera, Download, Share, Heart, Calendar, Clock } from 'lucide-react';
+import { Camera, Download, Share, Heart, Calendar, Clock, Film } from 'lucide-react';
 import { ImageWithFallback } from './figma/ImageWithFallback';
 
 const PI_BASE = "http://192.168.137.6:5000";
+const PAGE_SIZE = 24;
 
 interface Photo {
   id: string;
   url: string;
+  thumbnail?: string;
   timestamp: Date;
   description: string;
   isFavorite: boolean;
   tags: string[];
 }
 
+interface Clip {
+  id: string;
+  url: string;
+  poster: string;
+  timestamp: Date;
+  description: string;
+}
+
 interface PhotoGalleryProps {
   newPhotoData?: { id: string; timestamp: Date; liveImage: string };
 }
@@ -86,33 +96,107 @@ export function PhotoGallery({ newPhotoData }: PhotoGalleryProps) {
   const [selectedPhoto, setSelectedPhoto] = useState<Photo | null>(null);
   const [filter, setFilter] = useState<'all' | 'favorites' | 'recent'>('all');
 
-  // Add new photo when captured from live feed
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [clips, setClips] = useState<Clip[]>([]);
+  const [clipCursor, setClipCursor] = useState<string | null>(null);
+
+  const absolute = (u: string) => (u.startsWith('http') ? u : `${PI_BASE}${u}`);
+
+  // One page of a listing (newest first); the next cursor comes back in X-Next-Cursor
+  const fetchPage = async (path: string, cursor: string | null) => {
+    const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+    if (cursor) params.set('cursor', cursor);
+    const res = await fetch(`${PI_BASE}${path}?${params}`);
+    if (!res.ok) throw new Error(`HTTP ${res.status}`);
+    const data = await res.json();
+    return { items: data as any[], next: res.headers.get('X-Next-Cursor') };
+  };
+
+  const fetchPhotos = async (cursor: string | null) => {
+    const page = await fetchPage('/api/photos', cursor);
+    const converted: Photo[] = page.items.map((p: any) => ({
+      id: String(p.id),
+      url: absolute(p.url),
+      thumbnail: p.thumbnail ? absolute(p.thumbnail) : undefined,
+      timestamp: toDateSafe(p.timestamp),
+      description: p.description || 'Captured moment',
+      isFavorite: false,
+      tags: p.tags ?? ['baby', 'capture'],
+    }));
+    return { photos: converted, next: page.next };
+  };
+
+  const fetchClips = async (cursor: string | null) => {
+    const page = await fetchPage('/api/clips', cursor);
+    const converted: Clip[] = page.items.map((c: any) => ({
+      id: String(c.id),
+      url: absolute(c.url),
+      poster: absolute(c.poster),
+      timestamp: toDateSafe(c.timestamp),
+      description: c.description || 'Event clip',
+    }));
+    return { clips: converted, next: page.next };
+  };
+
   useEffect(() => {
     let isMounted = true;
 
     (async () => {
       try {
-        const res = await fetch(`${PI_BASE}/api/photos`);
-        if (!res.ok) throw new Error(`HTTP ${res.status}`);
-        const data = await res.json();
-
-        const converted: Photo[] = data.map((p: any) => ({
-          id: String(p.id),
-          url: p.url.startsWith('http') ? p.url : `${PI_BASE}${p.url}`,
-          timestamp: toDateSafe(p.timestamp),
-          description: p.description || 'Captured moment',
-          isFavorite: false,
-          tags: p.tags ?? ['baby', 'capture'],
-        }));
-
-        if (isMounted) setPhotos(converted);
+        const page = await fetchPhotos(null);
+        if (isMounted) {
+          setPhotos(page.photos);
+          setNextCursor(page.next);
+        }
       } catch (err) {
         console.error('Failed to fetch /api/photos:', err);
       }
     })();
 
+    (async () => {
+      try {
+        const page = await fetchClips(null);
+        if (isMounted) {
+          setClips(page.clips);
+          setClipCursor(page.next);
+        }
+      } catch (err) {
+        console.error('Failed to fetch /api/clips:', err);
+      }
+    })();
+
     return () => { isMounted = false; };
   }, []);
+
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchPhotos(nextCursor);
+      setPhotos(prev => [...prev, ...page.photos]);
+      setNextCursor(page.next);
+    } catch (err) {
+      console.error('Failed to fetch more /api/photos:', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const loadMoreClips = async () => {
+    if (!clipCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchClips(clipCursor);
+      setClips(prev => [...prev, ...page.clips]);
+      setClipCursor(page.next);
+    } catch (err) {
+      console.error('Failed to fetch more /api/clips:', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   //   if (newPhotoData) {
   //     const descriptions = [
   //       'Live feed capture - Sweet dreams',
@@ -246,7 +330,7 @@ export function PhotoGallery({ newPhotoData }: PhotoGalleryProps) {
                     <DialogTrigger asChild>
                       <div className="cursor-pointer">
                         <ImageWithFallback
-                          src={photo.url}
+                          src={photo.thumbnail ?? photo.url}
                           alt={photo.description}
                           className="w-full aspect-square object-cover rounded-lg"
                         />
@@ -335,9 +419,55 @@ export function PhotoGallery({ newPhotoData }: PhotoGalleryProps) {
               ))}
             </div>
           )}
+          {nextCursor && (
+            <div className="flex justify-center pt-4">
+              <Button variant="outline" size="sm" onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </Button>
+            </div>
+          )}
         </CardContent>
       </Card>
 
+      {/* Event Clips (recorded around cry / vitals alerts) */}
+      {clips.length > 0 && (
+        <Card>
+          <CardHeader>
+            <CardTitle className="flex items-center justify-between">
+              <span className="flex items-center gap-2">
+                <Film className="h-5 w-5" />
+                Event Clips
+              </span>
+              <Badge variant="outline">{clips.length} clips</Badge>
+            </CardTitle>
+          </CardHeader>
+          <CardContent>
+            <div className="grid grid-cols-2 md:grid-cols-3 lg:grid-cols-4 gap-4">
+              {clips.map((clip) => (
+                <a key={clip.id} href={clip.url} target="_blank" rel="noreferrer" className="relative block">
+                  <ImageWithFallback
+                    src={clip.poster}
+                    alt={clip.description}
+                    className="w-full aspect-video object-cover rounded-lg"
+                  />
+                  <div className="absolute top-2 left-2 bg-black/70 text-white px-2 py-1 rounded text-xs">
+                    {formatDate(clip.timestamp)}
+                  </div>
+                  <div className="text-xs text-muted-foreground pt-1">{clip.description}</div>
+                </a>
+              ))}
+            </div>
+            {clipCursor && (
+              <div className="flex justify-center pt-4">
+                <Button variant="outline" size="sm" onClick={loadMoreClips} disabled={loadingMore}>
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </Button>
+              </div>
+            )}
+          </CardContent>
+        </Card>
+      )}
+
       {/* Growth Timeline */}
       <Card>
         <CardHeader>
@@ -351,7 +481,7 @@ export function PhotoGallery({ newPhotoData }: PhotoGalleryProps) {
             {photos.slice(0, 3).map((photo, index) => (
               <div key={photo.id} className="flex items-center gap-3 p-2 rounded-lg bg-muted/50">
                 <ImageWithFallback
-                  src={photo.url}
+                  src={photo.thumbnail ?? photo.url}
                   alt={photo.description}
                   className="w-12 h-12 object-cover rounded"
                 />
@@ -59,11 +59,10 @@ export function VideoFeed({ socket,onCapturePhoto }: VideoFeedProps) {
     // Set the last captured timestamp
     setLastCaptured(timestamp.toLocaleString());
 
-    // 💡 Emit capture request to backend
-    socket.emit('capture_frame', {
+    // 💡 Ask the backend to save its own newest frame (no upload of the image)
+    socket.emit('capture_snapshot', {
       photoId,
-      timestamp,
-      liveImage: frame, // Send the current frame data
+      fullQuality: true,
     });
 
     onCapturePhoto({
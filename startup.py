@@ -0,0 +1,117 @@
+import threading
+import time
+
+
+class Stage(object):
+    """One startup step: a function plus the stages it has to wait for."""
+
+    def __init__(self, name, fn, deps=(), required=True):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.required = required
+        self.state = "pending"      # pending -> waiting -> starting -> ready | failed | skipped
+        self.error = None
+        self.started_at = None
+        self.seconds = None
+        self.done = threading.Event()
+
+
+class StartupManager(object):
+    """
+    Staged, parallel boot.
+
+    Each stage runs on its own thread as soon as the stages it depends on are
+    ready, so independent device inits and model loads overlap instead of
+    running one after another at import time. start() returns immediately;
+    the web server keeps serving while stages finish, and report() / is_ready()
+    back the /health and /ready endpoints. A failed stage marks everything
+    that depends on it as skipped; optional stages (required=False) don't
+    hold back readiness.
+    """
+
+    def __init__(self):
+        self.t0 = time.monotonic()
+        self.stages = {}
+        self.milestones = {}        # name -> seconds since boot (first time only)
+        self._started = False
+
+    def add(self, name, fn, deps=(), required=True):
+        if name in self.stages:
+            raise ValueError(f"duplicate startup stage {name!r}")
+        self.stages[name] = Stage(name, fn, deps, required)
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        for name, stage in self.stages.items():
+            missing = [d for d in stage.deps if d not in self.stages]
+            if missing:
+                raise ValueError(f"stage {name!r} depends on unknown {missing}")
+        for stage in self.stages.values():
+            threading.Thread(target=self._run, args=(stage,), name=f"startup-{stage.name}",
+                             daemon=True).start()
+        print(f"🚀 [startup] {len(self.stages)} stages launched")
+
+    def _run(self, stage):
+        stage.state = "waiting"
+        for dep in stage.deps:
+            self.stages[dep].done.wait()
+            if self.stages[dep].state != "ready":
+                stage.state = "skipped"
+                stage.error = f"dependency {dep!r} {self.stages[dep].state}"
+                print(f"⏭️ [startup] {stage.name} skipped ({stage.error})")
+                stage.done.set()
+                return
+
+        stage.state = "starting"
+        stage.started_at = time.monotonic()
+        try:
+            stage.fn()
+            stage.state = "ready"
+            stage.seconds = time.monotonic() - stage.started_at
+            print(f"✅ [startup] {stage.name} ready in {stage.seconds:.2f}s "
+                  f"(t+{time.monotonic() - self.t0:.2f}s)")
+        except Exception as e:
+            stage.state = "failed"
+            stage.error = f"{e.__class__.__name__}: {e}"
+            stage.seconds = time.monotonic() - stage.started_at
+            print(f"❌ [startup] {stage.name} failed: {stage.error}")
+        finally:
+            stage.done.set()
+
+    def wait(self, name, timeout=None):
+        """Block until stage `name` has finished; True if it is ready."""
+        stage = self.stages[name]
+        stage.done.wait(timeout)
+        return stage.state == "ready"
+
+    def ready(self, name):
+        return self.stages[name].state == "ready"
+
+    def is_ready(self):
+        return all(s.state == "ready" for s in self.stages.values() if s.required)
+
+    def milestone(self, name):
+        """Record the first time something happened (e.g. first vitals sent)."""
+        if name not in self.milestones:
+            self.milestones[name] = round(time.monotonic() - self.t0, 3)
+            print(f"⏱️ [startup] {name} at t+{self.milestones[name]:.2f}s")
+
+    def report(self):
+        return {
+            "ready": self.is_ready(),
+            "uptime_s": round(time.monotonic() - self.t0, 3),
+            "stages": {
+                s.name: {
+                    "state": s.state,
+                    "required": s.required,
+                    "deps": list(s.deps),
+                    "seconds": round(s.seconds, 3) if s.seconds is not None else None,
+                    "error": s.error,
+                }
+                for s in self.stages.values()
+            },
+            "milestones": dict(self.milestones),
+        }
@@ -0,0 +1,135 @@
+import collections
+import queue
+import subprocess
+import threading
+import time
+
+import metrics
+
+
+# ffmpeg starts decoding after a few KB instead of probing seconds of input
+FFMPEG_CMD = [
+    "ffmpeg", "-hide_banner", "-loglevel", "error",
+    "-fflags", "nobuffer", "-flags", "low_delay",
+    "-probesize", "4096", "-analyzeduration", "0",
+    "-i", "pipe:0",
+    "-f", "s16le", "-ar", "44100", "-ac", "2", "pipe:1",
+]
+APLAY_CMD = ["aplay", "-q", "-t", "raw", "-f", "S16_LE", "-r", "44100", "-c", "2",
+             "--buffer-time=100000"]
+
+# first chunk in -> first decoded PCM handed to the mixer (target: well under 0.5 s)
+TALK_FIRST_AUDIO_SECONDS = metrics.registry.histogram(
+    "talk_first_audio_seconds", "Push-to-talk latency: first chunk received -> first PCM to the mixer")
+
+
+class TalkSession(object):
+    """
+    One parent's push-to-talk stream.
+
+    Chunks (webm/opus from MediaRecorder) are fed into a long-lived ffmpeg's
+    stdin as they arrive and its PCM output is played as it comes out, so
+    playback starts within a few hundred ms and nothing is written to /tmp.
+    With a mixer (audio_output.AudioMixer) the PCM goes into a mixer voice so
+    the heartbeat is ducked under it; without one it is piped straight into aplay.
+    feed() never blocks: chunks go through a queue to a writer thread, so
+    it may be called before start() (which spawns processes; run it off the
+    event loop). ffmpeg's stderr is drained continuously so it can't block.
+    """
+
+    def __init__(self, sid, mixer=None, player_cmd=APLAY_CMD):
+        self.sid = sid
+        self.mixer = mixer
+        self.player_cmd = player_cmd
+        self.bytes_in = 0
+        self.first_chunk_at = None      # monotonic time of the first fed chunk
+        self.first_audio_s = None       # first chunk -> first PCM out (mixer path)
+        self._stderr_tail = collections.deque(maxlen=20)
+        self._chunks = queue.Queue()
+        self._decoder = None
+        self._player = None
+        self._voice = None
+
+    def start(self):
+        self._decoder = subprocess.Popen(
+            FFMPEG_CMD, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self._stderr_thread = threading.Thread(target=self._drain_stderr, daemon=True)
+        self._stderr_thread.start()
+        if self.mixer is not None:
+            self._voice = self.mixer.open_voice()
+            threading.Thread(target=self._reader, daemon=True).start()
+        else:
+            self._player = subprocess.Popen(self.player_cmd, stdin=self._decoder.stdout)
+            self._decoder.stdout.close()   # aplay owns the read end now
+        threading.Thread(target=self._writer, daemon=True).start()
+
+    def _reader(self):
+        """ffmpeg PCM (s16le stereo) -> mixer voice, in whole frames."""
+        pending = b""
+        try:
+            while True:
+                data = self._decoder.stdout.read1(8192)
+                if not data:
+                    break
+                if self.first_audio_s is None and self.first_chunk_at is not None:
+                    self.first_audio_s = time.monotonic() - self.first_chunk_at
+                    TALK_FIRST_AUDIO_SECONDS.observe(self.first_audio_s)
+                    print(f"🗣️ talk[{self.sid}] first audio after {self.first_audio_s * 1000:.0f} ms")
+                data = pending + data
+                usable = len(data) - len(data) % 4
+                if usable:
+                    self._voice.write_s16(data[:usable])
+                pending = data[usable:]
+        finally:
+            self._voice.close()
+
+    def _drain_stderr(self):
+        """Keep ffmpeg's stderr flowing (a full pipe would stall it); remember the tail for errors."""
+        for line in self._decoder.stderr:
+            self._stderr_tail.append(line.decode(errors="ignore").rstrip())
+
+    def feed(self, chunk):
+        if self.first_chunk_at is None:
+            self.first_chunk_at = time.monotonic()
+        self.bytes_in += len(chunk)
+        self._chunks.put(chunk)
+
+    def finish(self):
+        """No more input: let ffmpeg/aplay drain what is buffered and exit."""
+        self._chunks.put(None)
+
+    def _writer(self):
+        try:
+            while True:
+                chunk = self._chunks.get()
+                if chunk is None:
+                    break
+                self._decoder.stdin.write(chunk)
+                self._decoder.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            print(f"⚠️ talk[{self.sid}] decoder pipe closed:", e)
+        finally:
+            try:
+                self._decoder.stdin.close()
+            except Exception:
+                pass
+            self._reap()
+
+    def _reap(self, timeout=30.0):
+        try:
+            self._decoder.wait(timeout)
+            if self._player is not None:
+                self._player.wait(timeout)
+            self._stderr_thread.join(1.0)
+            err = "\n".join(self._stderr_tail).strip()
+            if self._decoder.returncode != 0 and err:
+                print(f"❌ talk[{self.sid}] FFmpeg error:", err)
+            else:
+                print(f"✅ talk[{self.sid}] played {self.bytes_in} bytes")
+        except subprocess.TimeoutExpired:
+            self.kill()
+
+    def kill(self):
+        for proc in (self._decoder, self._player):
+            if proc is not None and proc.poll() is None:
+                proc.kill()
@@ -0,0 +1,45 @@
+import os
+import time
+
+os.environ.setdefault("BED_SERVO_BACKEND", "sim")
+
+import pytest  # noqa: E402
+
+import bed_control  # noqa: E402
+from devices import SimAccelerometer  # noqa: E402
+
+
+@pytest.fixture
+def closed_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr(bed_control, "TILT_CALIBRATION_FILE", str(tmp_path / "cal.json"))
+    monkeypatch.setattr(bed_control, "_tilt_cal", None)
+    accel = SimAccelerometer(angles_fn=lambda: dict(bed_control.last_angles))
+    bed_control.set_tilt_sensor(lambda: accel.acceleration)
+    yield
+    monkeypatch.setattr(bed_control, "_tilt_read", None)
+
+
+def _preset(mode):
+    t0 = time.monotonic()
+    ack = bed_control.actuator.submit("preset", mode=mode).result()
+    return ack, time.monotonic() - t0
+
+
+@pytest.mark.parametrize("mode", ["left_side", "feeding"])
+def test_uncalibrated_preset_settles_before_timeout(closed_loop, mode):
+    bed_control.actuator.submit("preset", mode="flat").result()
+    ack, elapsed = _preset(mode)
+    assert ack["status"] == "done"
+    assert bed_control.bed_status["stable"] is True
+    assert bed_control.bed_status["settle_ms"] < bed_control.SETTLE_TIMEOUT_S * 1000
+    assert elapsed < 1.0 + bed_control.SETTLE_TIMEOUT_S
+
+
+def test_calibrated_preset_finishes_on_tilt(closed_loop):
+    assert bed_control.actuator.submit("calibrate").result()["status"] == "done"
+    for mode in ("left_side", "right_side", "feeding"):
+        ack, elapsed = _preset(mode)
+        assert ack["status"] == "done"
+        assert bed_control.bed_status["stable"] is True
+        assert bed_control.bed_status["tilt_error"] <= bed_control.TILT_CORRECTION_TOL_DEG
+        assert elapsed < bed_control.SETTLE_TIMEOUT_S
@@ -0,0 +1,61 @@
+from cry_fusion import CryFusion
+
+
+def _fusion():
+    fusion = CryFusion(on_threshold=0.6, calm_s=5.0)
+    started, events = [], []
+    fusion.on_start = lambda intensity: (started.append(intensity), events.append("start"))
+    fusion.on_stop = lambda: events.append("stop")
+    fusion.events = events
+    return fusion, started
+
+
+def test_confident_camera_alone_does_not_start():
+    fusion, started = _fusion()
+    fusion.observe("mic", 0.1, ts=100.0)
+    fusion.observe("camera", 0.99, ts=100.0)
+    assert not fusion.active and started == []
+
+
+def test_confident_mic_alone_does_not_start():
+    fusion, started = _fusion()
+    fusion.observe("camera", 0.2, ts=100.0)
+    fusion.observe("mic", 0.95, ts=100.0)
+    assert not fusion.active and started == []
+
+
+def test_both_sources_agreeing_starts():
+    fusion, started = _fusion()
+    fusion.observe("camera", 0.8, ts=100.0)
+    fusion.observe("mic", 0.8, ts=100.5)
+    assert fusion.active and len(started) == 1
+
+
+def test_stale_source_evidence_does_not_start():
+    fusion, started = _fusion()
+    fusion.observe("camera", 0.9, ts=100.0)
+    fusion.observe("mic", 0.9, ts=120.0)     # camera evidence has decayed by now
+    assert not fusion.active and started == []
+
+
+def test_one_camera_miss_does_not_stop_while_mic_cries():
+    fusion, _ = _fusion()
+    # YOLO about every 5 s: crying boxes, except one frame with no cry box at all (t=22)
+    camera = {0: 0.9, 5: 0.9, 10: 0.9, 15: 0.9, 22: 0.0, 30: 0.9, 35: 0.9}
+    for t in range(0, 40):
+        if t in camera:
+            fusion.observe("camera", camera[t], ts=float(t))
+        fusion.observe("mic", 0.9, ts=t + 0.5)
+    assert fusion.events == ["start"]
+    assert fusion.active
+
+
+def test_stops_once_every_source_is_calm():
+    fusion, _ = _fusion()
+    fusion.observe("camera", 0.9, ts=0.0)
+    fusion.observe("mic", 0.9, ts=0.5)
+    for t in range(1, 20):
+        fusion.observe("mic", 0.05, ts=float(t))
+    # camera evidence decays below its threshold, then calm_s later it stops
+    assert fusion.events == ["start", "stop"]
+    assert not fusion.active
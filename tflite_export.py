@@ -0,0 +1,214 @@
+"""
+Export the three audio models to TFLite, check them against Keras and benchmark them.
+
+    python tflite_export.py --quant float16
+    python tflite_export.py --quant int8 --bench
+
+- yamnet.tflite               (fixed 5 s / 80000-sample input)
+- baby_cry_detector.tflite    (YAMNet embedding -> cry probability)
+- custom_cnn.tflite           (mel image -> cry reason)
+
+INT8 calibration uses a representative dataset built from the archived
+uploads in cry_uploads/ (see CRY_ARCHIVE_UPLOADS in newtesting_integrated.py).
+YAMNet is always exported as float16: its waveform front-end does not
+quantize well.
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import time
+
+import numpy as np
+
+import audio_models
+from cry_reason import CryReasonClassifier, conf
+from tflite_models import TFLiteModel, TFLiteYamnet
+
+BASE_DIR = os.environ.get("BABY_BASE_DIR", "/home/baby5/yolo")
+YAMNET_LOCAL_PATH = os.path.join(BASE_DIR, "models", "yamnet")
+CRY_DETECTOR_PATH = os.path.join(BASE_DIR, "baby_cry_detector.h5")
+CRY_REASON_PATH = os.path.join(BASE_DIR, "custom_cnn.h5")
+CRY_UPLOAD_DIR = os.path.join(BASE_DIR, "cry_uploads")
+OUT_DIR = os.path.join(BASE_DIR, "models", "tflite")
+
+SAMPLE_RATE = 16000
+WINDOW = SAMPLE_RATE * 5
+
+
+def load_clips(limit=100):
+    """Archived uploads as mono 16 kHz arrays (random noise if there are none yet)."""
+    classifier = CryReasonClassifier(CRY_REASON_PATH)
+    clips = []
+    for path in sorted(glob.glob(os.path.join(CRY_UPLOAD_DIR, "*.wav")))[:limit]:
+        with open(path, "rb") as f:
+            clips.append(classifier.decode_audio(f.read()))
+    if not clips:
+        print("⚠️ no archived cry uploads found — calibrating on noise")
+        rng = np.random.default_rng(0)
+        clips = [rng.normal(0, 0.1, conf.samples).astype(np.float32) for _ in range(16)]
+    print(f"🎧 {len(clips)} clips for calibration / parity")
+    return clips
+
+
+def fit(y, n):
+    return y[:n] if len(y) >= n else np.pad(y, (0, n - len(y)))
+
+
+def convert(converter, quant, representative=None):
+    import tensorflow as tf
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quant == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quant == "int8":
+        converter.representative_dataset = representative
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    return converter.convert()
+
+
+def write(name, blob):
+    os.makedirs(OUT_DIR, exist_ok=True)
+    path = os.path.join(OUT_DIR, name)
+    with open(path, "wb") as f:
+        f.write(blob)
+    print(f"💾 {path} ({len(blob) / 1024:.0f} KB)")
+    return path
+
+
+def export_all(quant, clips):
+    import tensorflow as tf
+
+    yamnet = audio_models.load_yamnet(YAMNET_LOCAL_PATH)
+    cry_detector = audio_models.load_keras(CRY_DETECTOR_PATH)
+    cry_reason = CryReasonClassifier(CRY_REASON_PATH)
+
+    # --- YAMNet (float16 only) ---
+    fn = tf.function(lambda w: yamnet(w)).get_concrete_function(
+        tf.TensorSpec([WINDOW], tf.float32))
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([fn], yamnet)
+    write("yamnet.tflite", convert(converter, "float16"))
+
+    # --- representative inputs for the two classifiers ---
+    embeddings = [np.mean(yamnet(fit(y, WINDOW))[1].numpy(), axis=0) for y in clips]
+    images = [cry_reason.preprocess(y).astype(np.float32) for y in clips]
+
+    def rep(samples):
+        def gen():
+            for x in samples:
+                yield [np.expand_dims(x, 0).astype(np.float32)]
+        return gen
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(cry_detector)
+    write("baby_cry_detector.tflite", convert(converter, quant, rep(embeddings)))
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(cry_reason.model())
+    write("custom_cnn.tflite", convert(converter, quant, rep(images)))
+
+    return yamnet, cry_detector, cry_reason.model(), embeddings, images
+
+
+def parity(keras_fn, lite_fn, inputs):
+    diffs, agree = [], 0
+    for x in inputs:
+        a = np.asarray(keras_fn(x)).reshape(-1)
+        b = np.asarray(lite_fn(x)).reshape(-1)
+        diffs.append(float(np.max(np.abs(a - b))))
+        if a.size > 1:
+            agree += int(np.argmax(a) == np.argmax(b))
+        else:
+            agree += int((a[0] > 0.5) == (b[0] > 0.5))
+    return {"max_abs_diff": max(diffs), "mean_abs_diff": float(np.mean(diffs)),
+            "decision_agreement": agree / len(inputs)}
+
+
+def bench(fn, x, runs=30):
+    fn(x)
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn(x)
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    return {"mean_ms": 1000 * float(np.mean(times)), "p95_ms": 1000 * times[int(0.95 * (runs - 1))]}
+
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def measure_lite_only():
+    """Run in a fresh process: load + run the TFLite models only and report peak RSS."""
+    lite_yamnet = TFLiteYamnet(os.path.join(OUT_DIR, "yamnet.tflite"))
+    lite_detector = TFLiteModel(os.path.join(OUT_DIR, "baby_cry_detector.tflite"))
+    lite_reason = TFLiteModel(os.path.join(OUT_DIR, "custom_cnn.tflite"))
+    lite_yamnet(np.zeros(WINDOW, dtype=np.float32))
+    lite_detector.predict(np.zeros((1, 1024), dtype=np.float32))
+    lite_reason.predict(np.zeros((1, 128, 128, 3), dtype=np.float32))
+    import sys
+    print(json.dumps({"max_rss_mb": round(max_rss_mb(), 1),
+                      "tensorflow_imported": "tensorflow" in sys.modules}))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--quant", choices=["float16", "int8"], default="float16")
+    ap.add_argument("--bench", action="store_true", help="also benchmark Keras vs TFLite latency")
+    ap.add_argument("--report", default=os.path.join(OUT_DIR, "report.json"))
+    ap.add_argument("--measure-lite-only", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.measure_lite_only:
+        measure_lite_only()
+        return
+
+    clips = load_clips()
+    yamnet, cry_detector, cry_reason, embeddings, images = export_all(args.quant, clips)
+    rss_full_tf = max_rss_mb()
+
+    lite_yamnet = TFLiteYamnet(os.path.join(OUT_DIR, "yamnet.tflite"))
+    lite_detector = TFLiteModel(os.path.join(OUT_DIR, "baby_cry_detector.tflite"))
+    lite_reason = TFLiteModel(os.path.join(OUT_DIR, "custom_cnn.tflite"))
+
+    waves = [fit(y, WINDOW) for y in clips]
+    batch = lambda x: np.expand_dims(x, 0)
+    report = {
+        "quant": args.quant,
+        "max_rss_mb_with_tf": round(rss_full_tf, 1),
+        "parity": {
+            "yamnet_embeddings": parity(lambda w: np.mean(yamnet(w)[1].numpy(), axis=0),
+                                        lambda w: np.mean(lite_yamnet(w)[1], axis=0), waves),
+            "cry_detector": parity(lambda e: cry_detector.predict(batch(e), verbose=0),
+                                   lambda e: lite_detector.predict(batch(e)), embeddings),
+            "cry_reason": parity(lambda i: cry_reason.predict(batch(i), verbose=0),
+                                 lambda i: lite_reason.predict(batch(i)), images),
+        },
+    }
+
+    if args.bench:
+        report["latency"] = {
+            "yamnet": {"keras": bench(yamnet, waves[0]), "tflite": bench(lite_yamnet, waves[0])},
+            "cry_detector": {
+                "keras": bench(lambda e: cry_detector.predict(batch(e), verbose=0), embeddings[0]),
+                "tflite": bench(lambda e: lite_detector.predict(batch(e)), embeddings[0]),
+            },
+            "cry_reason": {
+                "keras": bench(lambda i: cry_reason.predict(batch(i), verbose=0), images[0]),
+                "tflite": bench(lambda i: lite_reason.predict(batch(i)), images[0]),
+            },
+        }
+        import subprocess, sys
+        out = subprocess.run([sys.executable, __file__, "--measure-lite-only"],
+                             capture_output=True, text=True, check=True).stdout
+        report["memory_tflite_only"] = json.loads(out.strip().splitlines()[-1])
+
+    os.makedirs(os.path.dirname(args.report), exist_ok=True)
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import numpy as np
+
+
+def _interpreter_class():
+    # the slim tflite-runtime wheel is preferred; full TF only as a fallback
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        from tensorflow.lite import Interpreter
+    return Interpreter
+
+
+class TFLiteModel(object):
+    """
+    Minimal Keras-like wrapper around a TFLite interpreter, so the server can
+    use .tflite models through the same predict(x, verbose=0) call as Keras.
+    Handles (de)quantization for INT8 models.
+    """
+
+    def __init__(self, path, num_threads=2):
+        self.path = path
+        self.interpreter = _interpreter_class()(model_path=path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.outputs = self.interpreter.get_output_details()
+
+    def _quantize(self, x):
+        x = np.asarray(x, dtype=np.float32)
+        scale, zero = self.input["quantization"]
+        if self.input["dtype"] in (np.int8, np.uint8) and scale:
+            info = np.iinfo(self.input["dtype"])
+            x = np.clip(np.round(x / scale + zero), info.min, info.max)
+        return x.astype(self.input["dtype"])
+
+    def _dequantize(self, detail, y):
+        scale, zero = detail["quantization"]
+        if detail["dtype"] in (np.int8, np.uint8) and scale:
+            return (y.astype(np.float32) - zero) * scale
+        return y.astype(np.float32)
+
+    def run(self, x):
+        x = self._quantize(x)
+        if tuple(x.shape) != tuple(self.input["shape"]):
+            self.interpreter.resize_tensor_input(self.input["index"], x.shape)
+            self.interpreter.allocate_tensors()
+            self.input = self.interpreter.get_input_details()[0]
+            self.outputs = self.interpreter.get_output_details()
+        self.interpreter.set_tensor(self.input["index"], x)
+        self.interpreter.invoke()
+        return [self._dequantize(d, self.interpreter.get_tensor(d["index"])) for d in self.outputs]
+
+    def predict(self, x, verbose=0):
+        return self.run(x)[0]
+
+
+class TFLiteYamnet(TFLiteModel):
+    """YAMNet exported to TFLite: model(waveform) -> (scores, embeddings, log_mel), like the SavedModel."""
+
+    def __call__(self, waveform):
+        outs = self.run(np.asarray(waveform, dtype=np.float32).reshape(-1))
+        by_width = {o.shape[-1]: o for o in outs}
+        return by_width[521], by_width[1024], by_width[64]
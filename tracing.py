@@ -0,0 +1,202 @@
+import asyncio
+import itertools
+import os
+import threading
+import time
+
+
+# Off unless BABY_TRACE=1 or started through the API (see newtesting_integrated.py).
+TRACE_ENABLED = os.environ.get("BABY_TRACE", "0") == "1"
+TRACE_EVENTS_PER_THREAD = 20000
+
+
+class _ThreadRing(object):
+    """
+    Fixed-size event ring owned by one thread. Only that thread appends, so
+    recording takes no lock; export() just copies the list (a consistent
+    enough snapshot under the GIL).
+    """
+
+    def __init__(self, tid, name, size):
+        self.tid = tid
+        self.name = name
+        self.size = size
+        self.events = [None] * size
+        self.n = 0                      # total events written
+
+    def add(self, event):
+        self.events[self.n % self.size] = event
+        self.n += 1
+
+    def snapshot(self):
+        # read n first: events written after it are ignored (or already in the copy)
+        n = self.n
+        events = list(self.events)
+        if n <= self.size:
+            return events[:n]
+        i = n % self.size
+        return events[i:] + events[:i]
+
+
+class _NullSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span(object):
+    __slots__ = ("tracer", "name", "cat", "args", "t0")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        t1 = time.perf_counter_ns()
+        self.tracer._ring().add(("X", self.name, self.cat, self.t0, t1 - self.t0, self.args))
+        return False
+
+
+class Tracer(object):
+    """
+    Opt-in span recorder for the background loops, exported as Chrome /
+    Perfetto trace JSON (chrome://tracing or ui.perfetto.dev).
+
+        with tracing.span("yolo.infer", "vision"):
+            ...
+
+    Each thread records complete ("X") events into its own ring buffer, so
+    overlapping spans across the camera, mic, sensor, bed and asyncio threads
+    show where they contend for the GIL and the I2C bus. When disabled,
+    span() returns a shared no-op context manager.
+    """
+
+    def __init__(self, enabled=TRACE_ENABLED, events_per_thread=TRACE_EVENTS_PER_THREAD):
+        self.enabled = enabled
+        self.events_per_thread = events_per_thread
+        self._local = threading.local()
+        self._rings = []
+        self._lock = threading.Lock()     # only taken when a thread records its first event
+        self._epoch = 0                   # bumped by clear(); stale rings are replaced
+        self.t0 = time.perf_counter_ns()
+        self._async_ids = itertools.count(1)
+
+    def _ring(self):
+        ring = getattr(self._local, "ring", None)
+        if ring is None or self._local.epoch != self._epoch:
+            t = threading.current_thread()
+            ring = _ThreadRing(threading.get_ident(), t.name, self.events_per_thread)
+            with self._lock:
+                self._rings.append(ring)
+            self._local.ring = ring
+            self._local.epoch = self._epoch
+        return ring
+
+    # ---------- recording ----------
+
+    def span(self, name, cat="app", args=None):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat, args)
+
+    def instant(self, name, cat="app", args=None):
+        if self.enabled:
+            self._ring().add(("i", name, cat, time.perf_counter_ns(), 0, args))
+
+    def counter(self, name, values):
+        """Counter track, e.g. counter("emit_pending", {"frame": 2, "event": 0})."""
+        if self.enabled:
+            self._ring().add(("C", name, "counter", time.perf_counter_ns(), 0, values))
+
+    def traced(self, coro, name, cat="asyncio"):
+        """
+        Wrap a coroutine so its lifetime shows up as an async slice
+        (begin/end with an id). Coroutines interleave on the event-loop
+        thread, so "X" spans would overlap without nesting on one track.
+        """
+        if not self.enabled:
+            return coro
+
+        async def _run():
+            async_id = next(self._async_ids)
+            self._ring().add(("b", name, cat, time.perf_counter_ns(), async_id, None))
+            try:
+                return await coro
+            finally:
+                self._ring().add(("e", name, cat, time.perf_counter_ns(), async_id, None))
+        return _run()
+
+    async def monitor_loop(self, interval=0.05):
+        """Records asyncio event-loop lag (how late a sleep wakes up) as a counter track."""
+        while True:
+            t = time.perf_counter()
+            await asyncio.sleep(interval)
+            if self.enabled:
+                self.counter("event_loop_lag_ms", {"lag": round((time.perf_counter() - t - interval) * 1000, 3)})
+
+    # ---------- control / export ----------
+
+    def start(self):
+        self.clear()
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+
+    def clear(self):
+        with self._lock:
+            self._rings = []
+            self._epoch += 1
+            self.t0 = time.perf_counter_ns()
+
+    def stats(self):
+        with self._lock:
+            rings = list(self._rings)
+        return {
+            "enabled": self.enabled,
+            "threads": len(rings),
+            "events": sum(min(r.n, r.size) for r in rings),
+            "overwritten": sum(max(r.n - r.size, 0) for r in rings),
+        }
+
+    def export(self):
+        """Chrome trace event format (JSON-serialisable dict)."""
+        with self._lock:
+            rings = list(self._rings)
+        pid = os.getpid()
+        events = []
+        for ring in rings:
+            events.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": ring.tid,
+                           "args": {"name": ring.name}})
+            # dur holds the duration for "X" events and the async id for "b"/"e"
+            for ph, name, cat, ts, dur, args in ring.snapshot():
+                if ts < self.t0:
+                    continue
+                ev = {"ph": ph, "name": name, "cat": cat, "pid": pid, "tid": ring.tid,
+                      "ts": (ts - self.t0) / 1000.0}
+                if ph == "X":
+                    ev["dur"] = dur / 1000.0
+                elif ph in ("b", "e"):
+                    ev["id"] = dur
+                elif ph == "i":
+                    ev["s"] = "t"
+                if args:
+                    ev["args"] = args
+                events.append(ev)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+tracer = Tracer()
+span = tracer.span
+instant = tracer.instant
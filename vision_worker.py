@@ -0,0 +1,244 @@
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+
+# largest frame we ever hand to the worker (640x480 BGR)
+MAX_FRAME_SHAPE = (480, 640, 3)
+# how long a freshly spawned worker gets to load the model
+READY_TIMEOUT_S = 120.0
+
+
+def _worker_main(shm_name, conn, model_path, torch_threads):
+    """
+    Runs in the child process. Keeps YOLO loaded and answers one request at a
+    time: the frame itself lives in shared memory, the pipe only carries
+    (seq, shape, imgsz) in and (seq, detections) out.
+    """
+    import torch
+    from ultralytics import YOLO
+
+    torch.set_num_threads(torch_threads)
+    torch.set_num_interop_threads(1)
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    # the parent owns the segment; don't let this process's tracker unlink it on exit
+    resource_tracker.unregister(shm._name, "shared_memory")
+    model = YOLO(model_path)
+    labels = model.names
+    conn.send(("ready", dict(labels)))
+
+    frame = results = None
+    try:
+        while True:
+            try:
+                msg = conn.recv()
+            except EOFError:
+                break   # parent went away
+            if msg is None:
+                break
+            seq, shape, imgsz = msg
+            try:
+                frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+                results = model.predict(frame, imgsz=imgsz, device="cpu", verbose=False)
+                detections = [
+                    {
+                        "label": labels[int(box.cls[0])],
+                        "conf": float(box.conf[0]),
+                        "xyxy": tuple(float(v) for v in box.xyxy[0]),
+                    }
+                    for box in results[0].boxes
+                ]
+                conn.send((seq, detections))
+            except Exception as e:
+                conn.send((seq, e.__class__.__name__ + ": " + str(e)))
+    finally:
+        # drop the views on shm.buf first, or close() fails with "exported pointers exist"
+        # (ultralytics keeps the input array on its Results)
+        del frame, results
+        shm.close()
+
+
+class VisionWorker(object):
+    """
+    Supervisor for a YOLO process running outside the server process, so
+    PyTorch's threads and the GIL don't stall the asyncio loop and the sensor threads.
+
+    infer(frame, imgsz) copies the frame into shared memory (no pickling) and
+    blocks until the worker answers. A worker that doesn't answer in `timeout`
+    is killed (it may still be reading the shared frame, which the next infer
+    would overwrite); a watchdog thread restarts the worker whenever it dies.
+
+    The worker is a fresh interpreter running this file (subprocess, not
+    fork): restarts happen while the server has many threads, and forking a
+    threaded process can deadlock the child on a lock another thread held.
+    multiprocessing's spawn/forkserver would re-import the server script in
+    the child, which opens the camera/I2C devices at import time.
+    """
+
+    def __init__(self, model_path, torch_threads=2, timeout=10.0):
+        self.model_path = model_path
+        self.torch_threads = torch_threads
+        self.timeout = timeout
+        self.labels = {}
+        self.restarts = 0
+
+        self._shm = shared_memory.SharedMemory(create=True, size=int(np.prod(MAX_FRAME_SHAPE)))
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._proc = None
+        self._conn = None
+        self._ready = False
+        self._stopped = False
+
+    def start(self, wait=True):
+        self._spawn(wait=False)
+        threading.Thread(target=self._watchdog, daemon=True).start()
+        if wait:
+            self.wait_ready()
+
+    def _spawn(self, wait=True):
+        conn, child_conn = mp.Pipe()
+        try:
+            self._proc = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), self._shm.name,
+                 str(child_conn.fileno()), self.model_path, str(self.torch_threads)],
+                pass_fds=(child_conn.fileno(),),
+            )
+        finally:
+            child_conn.close()
+        self._conn = conn
+        self._ready = False
+        print(f"🧠 [vision] worker started (pid={self._proc.pid}, torch_threads={self.torch_threads})")
+        if wait:
+            self._read_ready(READY_TIMEOUT_S)
+
+    def _read_ready(self, timeout):
+        """Read the current worker's "ready" message; EOFError if it died while loading."""
+        if not self._conn.poll(timeout):
+            raise TimeoutError("vision worker did not load the model in time")
+        tag, labels = self._conn.recv()
+        if tag == "ready":
+            self._set_ready(labels)
+
+    def _set_ready(self, labels):
+        self.labels = labels
+        self._ready = True
+        print(f"✅ [vision] worker ready with classes: {labels}")
+
+    def wait_ready(self, timeout=READY_TIMEOUT_S):
+        """
+        Block until a worker has loaded the model (start(wait=False) returns
+        before that). A worker that dies while loading is not an error here:
+        the watchdog respawns it under _lock, so this waits on the lock for
+        the replacement, up to `timeout` seconds overall.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._lock.acquire(timeout=remaining):
+                raise TimeoutError("vision worker did not load the model in time")
+            try:
+                if self._ready:
+                    return
+                if self.is_alive():
+                    try:
+                        self._read_ready(max(deadline - time.monotonic(), 0.0))
+                        if self._ready:
+                            return
+                    except EOFError:
+                        print("⚠️ [vision] worker exited while loading; waiting for its replacement")
+            finally:
+                self._lock.release()
+            time.sleep(0.5)   # let the watchdog notice and take the lock
+
+    def _watchdog(self):
+        while not self._stopped:
+            time.sleep(1.0)
+            if self._proc is not None and not self.is_alive() and not self._stopped:
+                print(f"⚠️ [vision] worker died (exitcode={self._proc.returncode}); restarting...")
+                with self._lock:
+                    self.restarts += 1
+                    try:
+                        self._spawn(wait=True)
+                    except Exception as e:
+                        print("❌ [vision] restart failed:", e)
+                        time.sleep(5.0)
+
+    def is_alive(self):
+        return self._proc is not None and self._proc.poll() is None
+
+    def _kill(self):
+        """Kill a hung worker; the watchdog respawns it."""
+        try:
+            self._proc.kill()
+            self._proc.wait(2.0)
+        except Exception as e:
+            print("⚠️ [vision] kill failed:", e)
+
+    def infer(self, frame, imgsz=640):
+        """Run YOLO on `frame` (HxWx3 uint8, at most 640x480) and return detections."""
+        if frame.nbytes > self._shm.size:
+            raise ValueError(f"frame too large for shared buffer: {frame.shape}")
+
+        with self._lock:
+            if not self.is_alive():
+                raise RuntimeError("vision worker not running")
+
+            self._seq += 1
+            seq = self._seq
+            dst = np.ndarray(frame.shape, dtype=np.uint8, buffer=self._shm.buf)
+            dst[...] = frame
+            try:
+                self._conn.send((seq, frame.shape, imgsz))
+            except OSError as e:
+                raise RuntimeError(f"vision worker pipe closed: {e}")
+
+            deadline = time.time() + self.timeout
+            while True:
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self._conn.poll(remaining):
+                    # the child may still be reading the shared frame: kill it
+                    # before anyone writes the next one
+                    print(f"⚠️ [vision] worker did not answer in {self.timeout:.0f}s; killing it")
+                    self._kill()
+                    raise TimeoutError("vision worker did not answer in time")
+                try:
+                    got_seq, result = self._conn.recv()
+                except EOFError:
+                    raise RuntimeError("vision worker exited during inference")
+                if got_seq == "ready":
+                    self._set_ready(result)   # sent before this request was served
+                    continue
+                if got_seq != seq:
+                    continue  # late answer to a request that already timed out
+                if isinstance(result, str):
+                    raise RuntimeError(result)
+                return result
+
+    def stop(self):
+        self._stopped = True
+        try:
+            if self.is_alive():
+                self._conn.send(None)
+                self._proc.wait(2.0)
+        except Exception:
+            pass
+        if self.is_alive():
+            self._proc.terminate()
+        self._shm.close()
+        self._shm.unlink()
+
+
+if __name__ == "__main__":
+    # worker entry: python vision_worker.py <shm name> <pipe fd> <model path> <torch threads>
+    from multiprocessing.connection import Connection
+
+    shm_name, fd, model_path, torch_threads = sys.argv[1:5]
+    _worker_main(shm_name, Connection(int(fd)), model_path, int(torch_threads))